@@ -0,0 +1,253 @@
+"""
+Admission control for API requests.
+
+Agent runs hold a database connection and LLM quota for seconds at a time.
+Without a limit, a burst of chat requests exhausts both and every request
+times out together. Requests are admitted through lanes, each with a global
+and a per-user concurrency cap and a bounded wait queue; when the queue is
+full (or a waiter times out) the request is shed with 429 and Retry-After.
+
+Cheap endpoints (health, document listing) use their own lane, so they
+never queue behind agent runs, and the agent lane is sized below the
+database pool so some connections are always left for them.
+"""
+
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .db_utils import db_pool
+from .telemetry import ADMISSION_REJECTED
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+# Database connections kept free of agent runs for the light lane
+ADMISSION_RESERVED_CONNECTIONS = int(os.getenv("ADMISSION_RESERVED_CONNECTIONS", "2"))
+ADMISSION_AGENT_MAX_CONCURRENT = int(os.getenv(
+    "ADMISSION_AGENT_MAX_CONCURRENT",
+    str(max(1, db_pool.max_size - ADMISSION_RESERVED_CONNECTIONS))
+))
+ADMISSION_AGENT_MAX_PER_USER = int(os.getenv("ADMISSION_AGENT_MAX_PER_USER", "2"))
+ADMISSION_AGENT_MAX_QUEUE = int(os.getenv("ADMISSION_AGENT_MAX_QUEUE", "32"))
+ADMISSION_LIGHT_MAX_CONCURRENT = int(os.getenv("ADMISSION_LIGHT_MAX_CONCURRENT", "32"))
+ADMISSION_LIGHT_MAX_QUEUE = int(os.getenv("ADMISSION_LIGHT_MAX_QUEUE", "64"))
+# Longest a request waits for a slot before being shed
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; mapped to 429 by the API."""
+    
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        """
+        Initialize the rejection.
+        
+        Args:
+            lane: Lane that rejected the request
+            reason: "queue_full" or "timeout"
+            retry_after: Seconds the client should wait before retrying
+        """
+        super().__init__(f"{lane} lane is at capacity ({reason}), retry in {retry_after}s")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionSlot:
+    """A granted slot; release() is idempotent."""
+    
+    def __init__(self, controller: Optional["AdmissionController"] = None, user_id: Optional[str] = None):
+        """
+        Initialize the slot.
+        
+        Args:
+            controller: Controller that granted it (None when admission is off)
+            user_id: User the slot is counted against
+        """
+        self.controller = controller
+        self.user_id = user_id
+        self.released = controller is None
+    
+    def release(self) -> None:
+        """Give the slot back."""
+        if not self.released:
+            self.released = True
+            self.controller.release(self.user_id)
+
+
+class AdmissionController:
+    """Concurrency caps with a bounded FIFO wait queue for one lane."""
+    
+    def __init__(
+        self,
+        lane: str,
+        max_concurrent: int,
+        max_per_user: Optional[int] = None,
+        max_queue: int = 0,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after: int = ADMISSION_RETRY_AFTER_SECONDS
+    ):
+        """
+        Initialize the controller.
+        
+        Args:
+            lane: Lane name (used in errors and metrics)
+            max_concurrent: Requests running at once
+            max_per_user: Requests running at once per user_id (None for no cap)
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Longest a request waits before being shed
+            retry_after: Retry-After sent with rejections
+        """
+        self.lane = lane
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self._per_user: Dict[str, int] = {}
+        self._waiters: List[Tuple[Optional[str], asyncio.Future]] = []
+    
+    @property
+    def queued(self) -> int:
+        """Requests waiting for a slot."""
+        return len(self._waiters)
+    
+    def _can_admit(self, user_id: Optional[str]) -> bool:
+        """Check both caps."""
+        if self.active >= self.max_concurrent:
+            return False
+        if user_id and self.max_per_user is not None:
+            return self._per_user.get(user_id, 0) < self.max_per_user
+        return True
+    
+    def _admit(self, user_id: Optional[str]) -> None:
+        """Count a request as running."""
+        self.active += 1
+        if user_id:
+            self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+    
+    def _reject(self, reason: str) -> AdmissionRejected:
+        """Build a rejection and count it."""
+        ADMISSION_REJECTED.inc(self.lane, reason)
+        logger.warning("Shedding %s request: %s", self.lane, reason)
+        return AdmissionRejected(self.lane, reason, self.retry_after)
+    
+    async def acquire(self, user_id: Optional[str] = None) -> AdmissionSlot:
+        """
+        Wait for a slot.
+        
+        Args:
+            user_id: User to count the request against
+        
+        Returns:
+            Slot to release when the request finishes
+        
+        Raises:
+            AdmissionRejected: If the queue is full or the wait times out
+        """
+        # Waiters that fit are admitted on every release, so anything still
+        # queued is blocked by a cap and a request that fits may go ahead
+        if self._can_admit(user_id):
+            self._admit(user_id)
+            return AdmissionSlot(self, user_id)
+        
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        
+        waiter = (user_id, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter[1].done():
+                raise self._reject("timeout")
+        except asyncio.CancelledError:
+            # Admitted just as the caller went away: hand the slot on
+            if waiter[1].done():
+                self.release(user_id)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        
+        return AdmissionSlot(self, user_id)
+    
+    def release(self, user_id: Optional[str] = None) -> None:
+        """
+        Free a slot and admit waiters that now fit, oldest first.
+        
+        Args:
+            user_id: User the slot was counted against
+        """
+        self.active -= 1
+        if user_id:
+            remaining = self._per_user.get(user_id, 1) - 1
+            if remaining > 0:
+                self._per_user[user_id] = remaining
+            else:
+                self._per_user.pop(user_id, None)
+        
+        for waiter in list(self._waiters):
+            waiting_user, future = waiter
+            if future.done() or not self._can_admit(waiting_user):
+                continue
+            self._admit(waiting_user)
+            self._waiters.remove(waiter)
+            future.set_result(None)
+    
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None) -> AsyncIterator[AdmissionSlot]:
+        """
+        Hold a slot for the duration of a block.
+        
+        Args:
+            user_id: User to count the request against
+        
+        Yields:
+            The granted slot
+        """
+        granted = await self.acquire(user_id)
+        try:
+            yield granted
+        finally:
+            granted.release()
+
+
+async def admit(controller: AdmissionController, user_id: Optional[str] = None) -> AdmissionSlot:
+    """
+    Acquire a slot, or a no-op slot when admission control is off.
+    
+    Args:
+        controller: Lane to admit through
+        user_id: User to count the request against
+    
+    Returns:
+        Slot to release when the request finishes
+    """
+    if not ADMISSION_ENABLED:
+        return AdmissionSlot()
+    return await controller.acquire(user_id)
+
+
+# Global admission lane instances
+agent_lane = AdmissionController(
+    "agent",
+    max_concurrent=ADMISSION_AGENT_MAX_CONCURRENT,
+    max_per_user=ADMISSION_AGENT_MAX_PER_USER,
+    max_queue=ADMISSION_AGENT_MAX_QUEUE
+)
+light_lane = AdmissionController(
+    "light",
+    max_concurrent=ADMISSION_LIGHT_MAX_CONCURRENT,
+    max_queue=ADMISSION_LIGHT_MAX_QUEUE
+)
@@ -17,6 +17,7 @@ from dotenv import load_dotenv
 from .prompts import SYSTEM_PROMPT
 from .providers import get_llm_model, get_llm_provider, get_llm_model_name
 from .schemas import ProviderType, convert_to_provider_format, convert_from_provider_format
+from .telemetry import span
 from .tools import (
     vector_search_tool,
     graph_search_tool,
@@ -197,7 +198,9 @@ def initialize_cohere_schema_patching():
 async def vector_search(
     ctx: RunContext[AgentDependencies],
     query: str,
-    limit: int = 10
+    limit: int = 10,
+    dedup: bool = False,
+    diversify: bool = False
 ) -> List[Dict[str, Any]]:
     """
     Search for relevant information using semantic similarity.
@@ -209,6 +212,8 @@ async def vector_search(
     Args:
         query: Search query to find similar content
         limit: Maximum number of results to return (1-50)
+        dedup: Collapse near-identical chunks (e.g. from duplicated documents)
+        diversify: Prefer chunks that cover different content over near-repeats
     
     Returns:
         List of matching chunks ordered by similarity (best first)
@@ -218,14 +223,17 @@ async def vector_search(
     
     input_data = VectorSearchInput(
         query=query,
-        limit=limit
+        limit=limit,
+        dedup=dedup,
+        diversify=diversify
     )
     
     logger.debug("Calling vector_search_tool with input: %s", input_data)
     start_time = datetime.now()
     
     try:
-        results = await vector_search_tool(input_data)
+        with span("tool.vector_search"):
+            results = await vector_search_tool(input_data)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds() * 1000
         
@@ -279,7 +287,8 @@ async def graph_search(
     start_time = datetime.now()
     
     try:
-        results = await graph_search_tool(input_data)
+        with span("tool.graph_search"):
+            results = await graph_search_tool(input_data)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds() * 1000
         
@@ -304,6 +313,7 @@ async def graph_search(
             
             # Convert back to database format for agent consumption
             db_data = convert_from_provider_format(provider_data, provider, "relationship")
+            db_data["score"] = r.score
             
             converted_results.append(db_data)
         
@@ -321,7 +331,9 @@ async def hybrid_search(
     ctx: RunContext[AgentDependencies],
     query: str,
     limit: int = 10,
-    text_weight: float = 0.3
+    text_weight: float = 0.3,
+    dedup: bool = False,
+    diversify: bool = False
 ) -> List[Dict[str, Any]]:
     """
     Perform both vector and keyword search for comprehensive results.
@@ -334,6 +346,8 @@ async def hybrid_search(
         query: Search query for hybrid search
         limit: Maximum number of results to return (1-50)
         text_weight: Weight for text similarity vs vector similarity (0.0-1.0)
+        dedup: Collapse near-identical chunks (e.g. from duplicated documents)
+        diversify: Prefer chunks that cover different content over near-repeats
     
     Returns:
         List of chunks ranked by combined relevance score
@@ -344,14 +358,17 @@ async def hybrid_search(
     input_data = HybridSearchInput(
         query=query,
         limit=limit,
-        text_weight=text_weight
+        text_weight=text_weight,
+        dedup=dedup,
+        diversify=diversify
     )
     
     logger.debug("Calling hybrid_search_tool with input: %s", input_data)
     start_time = datetime.now()
     
     try:
-        results = await hybrid_search_tool(input_data)
+        with span("tool.hybrid_search"):
+            results = await hybrid_search_tool(input_data)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds() * 1000
         
@@ -455,7 +472,8 @@ async def list_documents(
 async def get_entity_relationships(
     ctx: RunContext[AgentDependencies],
     entity_name: str,
-    depth: int = 2
+    depth: int = 2,
+    relationship_types: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Get all relationships for a specific entity in the knowledge graph.
@@ -466,14 +484,16 @@ async def get_entity_relationships(
     
     Args:
         entity_name: Name of the entity to explore (e.g., "Google", "OpenAI")
-        depth: Maximum traversal depth for relationships (1-5)
+        depth: Maximum traversal depth for relationships (1-3)
+        relationship_types: Optional relationship names to follow (e.g., ["INVESTED_IN"])
     
     Returns:
         Entity relationships and connected entities with relationship types
     """
     input_data = EntityRelationshipInput(
         entity_name=entity_name,
-        depth=depth
+        depth=depth,
+        relationship_types=relationship_types
     )
     
     return await get_entity_relationships_tool(input_data)
@@ -484,8 +504,10 @@ async def get_entity_timeline(
     ctx: RunContext[AgentDependencies],
     entity_name: str,
     start_date: str = "",
-    end_date: str = ""
-) -> List[Dict[str, Any]]:
+    end_date: str = "",
+    limit: int = 20,
+    cursor: str = ""
+) -> Dict[str, Any]:
     """
     Get the timeline of facts for a specific entity.
     
@@ -497,14 +519,18 @@ async def get_entity_timeline(
         entity_name: Name of the entity (e.g., "Microsoft", "AI")
         start_date: Start date in ISO format (YYYY-MM-DD), optional
         end_date: End date in ISO format (YYYY-MM-DD), optional
+        limit: Maximum number of facts to return (1-100)
+        cursor: next_cursor from a previous call to fetch the next page
     
     Returns:
-        Chronological list of facts about the entity with timestamps
+        Facts about the entity sorted by time (newest first) and next_cursor
     """
     input_data = EntityTimelineInput(
         entity_name=entity_name,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        limit=limit,
+        cursor=cursor
     )
     
     return await get_entity_timeline_tool(input_data)
@@ -536,7 +562,8 @@ async def web_search(
     logger.debug("Calling web_search_tool with input: %s", input_data)
     start_time = datetime.now()
     try:
-        results = await web_search_tool(input_data)
+        with span("tool.web_search"):
+            results = await web_search_tool(input_data)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds() * 1000
         logger.debug("Web search completed in %.2f ms, found %d results", duration, len(results))
@@ -12,20 +12,24 @@ from datetime import datetime
 import uuid
 
 from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from starlette.background import BackgroundTask
 import uvicorn
 from dotenv import load_dotenv
 
 from .agent import rag_agent, AgentDependencies
 from .db_utils import (
     initialize_database,
+    warm_database,
     close_database,
-    create_session,
+    APP_WORKERS,
     get_session,
-    add_message,
-    get_session_messages,
+    get_or_create_session_with_context,
+    get_recent_messages,
+    get_messages_between,
+    list_documents_page,
     test_connection
 )
 from .graph_utils import initialize_graph, close_graph, test_graph_connection
@@ -34,6 +38,9 @@ from .models import (
     ChatResponse,
     SearchRequest,
     SearchResponse,
+    BatchSearchRequest,
+    SearchType,
+    SearchFilters,
     StreamDelta,
     ErrorResponse,
     HealthStatus,
@@ -43,11 +50,25 @@ from .tools import (
     vector_search_tool,
     graph_search_tool,
     hybrid_search_tool,
-    list_documents_tool,
     VectorSearchInput,
     GraphSearchInput,
     HybridSearchInput,
-    DocumentListInput
+    generate_embedding,
+    generate_embeddings
+)
+from .semantic_cache import semantic_cache
+from .message_writer import message_writer, MESSAGE_WRITER_ENABLED
+from .session_cache import session_cache, session_sweeper
+from .worker_stats import SHARED_STATS_ENABLED, stats_publisher, aggregate_stats
+from .streaming import AgentEventStream, sse_event, with_heartbeats
+from .telemetry import TelemetryMiddleware, instrument_agents, registry, span, traced
+from .metrics import register_agent_stats
+from .admission import AdmissionRejected, admit, agent_lane, light_lane
+from .serialization import FastJSONResponse, dumps, slim_chunks
+from .conversation_summary import (
+    CONVERSATION_SUMMARY_ENABLED,
+    CONVERSATION_SUMMARY_BATCH,
+    schedule_summary_update
 )
 from .master_agent import master_agent
 from .smart_master_agent import smart_master_agent
@@ -62,6 +83,10 @@ APP_ENV = os.getenv("APP_ENV", "development")
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = int(os.getenv("APP_PORT", 8000))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Most recent messages sent to the agent verbatim
+CONTEXT_MESSAGES = int(os.getenv("CONTEXT_MESSAGES", "6"))
+# Searches of one /search/batch request running at once (each holds a connection)
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "4"))
 
 # Configure logging
 logging.basicConfig(
@@ -80,11 +105,22 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up agentic RAG API...")
     
+    instrument_agents()
+    
     try:
         # Initialize database connections
         await initialize_database()
         logger.info("Database initialized")
         
+        # Runs before uvicorn starts accepting connections on this worker
+        await warm_database()
+        
+        if MESSAGE_WRITER_ENABLED:
+            message_writer.start()
+        session_sweeper.start()
+        if SHARED_STATS_ENABLED:
+            stats_publisher.start()
+        
         # Initialize graph database (optional - continue if it fails)
         try:
             await initialize_graph()
@@ -118,6 +154,10 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down agentic RAG API...")
     
     try:
+        # Write queued messages while the pool is still open
+        await session_sweeper.stop()
+        await stats_publisher.stop()
+        await message_writer.stop()
         await close_database()
         try:
             await close_graph()
@@ -128,12 +168,20 @@ async def lifespan(app: FastAPI):
         logger.error(f"Shutdown error: {e}")
 
 
+# Agent stats published for aggregation across workers
+stats_publisher.register("master_agent", lambda: (master_agent.agent_stats, len(master_agent.task_history)))
+stats_publisher.register("smart_agent", lambda: (smart_master_agent.agent_stats, len(smart_master_agent.task_history)))
+register_agent_stats("master_agent", lambda: master_agent.agent_stats)
+register_agent_stats("smart_agent", lambda: smart_master_agent.agent_stats)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Agentic RAG with Knowledge Graph",
     description="AI agent combining vector search and knowledge graph for tech company analysis",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add middleware with flexible CORS
@@ -147,25 +195,67 @@ app.add_middleware(
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+app.add_middleware(TelemetryMiddleware)
+
 
 # Helper functions for agent execution
-async def get_or_create_session(request: ChatRequest) -> str:
-    """Get existing session or create new one."""
-    if request.session_id:
-        session = await get_session(request.session_id)
-        if session:
-            return request.session_id
+async def light_admission():
+    """Admit a cheap request through the light lane, apart from agent runs."""
+    slot = await admit(light_lane)
+    try:
+        yield
+    finally:
+        slot.release()
+
+
+@traced("session.lookup")
+async def open_session(
+    request: ChatRequest,
+    context_limit: int = CONTEXT_MESSAGES
+) -> Dict[str, Any]:
+    """
+    Resolve or create the request's session.
+    
+    Sessions recently seen as valid are trusted from the session cache.
+    Otherwise the session is resolved (created if missing or expired) and
+    its latest messages are loaded in a single query.
+    
+    Args:
+        request: Chat request
+        context_limit: Number of recent messages to prefetch
+    
+    Returns:
+        Dict with session_id and, when loaded, metadata and messages
+    """
+    known = session_cache.get(request.session_id) if request.session_id else None
+    if known:
+        return {"session_id": request.session_id, "metadata": None, "messages": None}
     
-    # Create new session
-    return await create_session(
+    # Ids known to be invalid go straight to creating a new session
+    session = await get_or_create_session_with_context(
+        request.session_id if known is None else None,
         user_id=request.user_id,
-        metadata=request.metadata
+        metadata=request.metadata,
+        context_limit=context_limit
     )
+    
+    if request.session_id and session["created"]:
+        session_cache.mark_invalid(request.session_id)
+    session_cache.mark_valid(session["session_id"], session["expires_at"])
+    
+    return session
+
+
+async def get_or_create_session(request: ChatRequest) -> str:
+    """Get existing session or create new one."""
+    session = await open_session(request, context_limit=0)
+    return session["session_id"]
 
 
 async def get_conversation_context(
     session_id: str,
-    max_messages: int = 10
+    max_messages: int = CONTEXT_MESSAGES,
+    messages: Optional[List[Dict[str, Any]]] = None
 ) -> List[Dict[str, str]]:
     """
     Get recent conversation context.
@@ -173,21 +263,94 @@ async def get_conversation_context(
     Args:
         session_id: Session ID
         max_messages: Maximum number of messages to retrieve
+        messages: Recent messages already loaded with the session
     
     Returns:
-        List of messages
+        List of messages, oldest first
     """
-    messages = await get_session_messages(session_id, limit=max_messages)
+    if messages is None:
+        messages = await get_recent_messages(session_id, limit=max_messages)
+    
+    # Include messages still waiting in the write-behind queue
+    pending = message_writer.pending(session_id)
+    if pending:
+        stored_ids = {msg["id"] for msg in messages}
+        messages = messages + [msg for msg in pending if msg["id"] not in stored_ids]
+        messages = sorted(messages, key=lambda msg: datetime.fromisoformat(msg["created_at"]))[-max_messages:]
     
     return [
         {
             "role": msg["role"],
-            "content": msg["content"]
+            "content": msg["content"],
+            "created_at": msg["created_at"]
         }
         for msg in messages
     ]
 
 
+@traced("context.load")
+async def build_agent_prompt(
+    message: str,
+    session_id: str,
+    session: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build the agent prompt from the message and the session's history.
+    
+    The latest CONTEXT_MESSAGES messages are included verbatim. When
+    conversation summaries are enabled, older history is represented by the
+    session's rolling summary, which is refreshed in the background; older
+    messages the summary doesn't cover yet are included verbatim too.
+    
+    Args:
+        message: User message
+        session_id: Session ID
+        session: Session from open_session; its prefetched messages and
+            metadata save queries
+    
+    Returns:
+        Prompt for the agent
+    """
+    session = session or {}
+    context = await get_conversation_context(session_id, messages=session.get("messages"))
+    logger.debug("Found %d context messages", len(context))
+    if not context:
+        return message
+    
+    sections = []
+    
+    # A full window means there may be older messages worth summarizing
+    if CONVERSATION_SUMMARY_ENABLED and len(context) >= CONTEXT_MESSAGES:
+        session_metadata = session.get("metadata")
+        if session_metadata is None:
+            stored = await get_session(session_id)
+            session_metadata = stored["metadata"] if stored else {}
+        if session_metadata.get("conversation_summary"):
+            sections.append(f"Summary of earlier conversation:\n{session_metadata['conversation_summary']}")
+        window_start = context[0]["created_at"]
+        schedule_summary_update(session_id, session_metadata, window_start)
+        
+        # Until the summary catches up, widen the window down to summary_through
+        # so no turn falls between the summary and the verbatim messages
+        unsummarized = await get_messages_between(
+            session_id,
+            after=session_metadata.get("summary_through"),
+            before=window_start,
+            limit=CONVERSATION_SUMMARY_BATCH,
+            latest=True
+        )
+        context = unsummarized + context
+    
+    context_str = "\n".join([
+        f"{msg['role']}: {msg['content']}"
+        for msg in context
+    ])
+    sections.append(f"Previous conversation:\n{context_str}")
+    sections.append(f"Current question: {message}")
+    
+    return "\n\n".join(sections)
+
+
 def extract_tool_calls(result) -> List[ToolCall]:
     """
     Extract tool calls from Pydantic AI result.
@@ -272,6 +435,9 @@ async def save_conversation_turn(
     """
     Save a conversation turn to the database.
     
+    Messages go through the write-behind writer, so this returns before
+    they are stored.
+    
     Args:
         session_id: Session ID
         user_message: User's message
@@ -279,7 +445,7 @@ async def save_conversation_turn(
         metadata: Optional metadata
     """
     # Save user message
-    await add_message(
+    await message_writer.add(
         session_id=session_id,
         role="user",
         content=user_message,
@@ -287,7 +453,7 @@ async def save_conversation_turn(
     )
     
     # Save assistant message
-    await add_message(
+    await message_writer.add(
         session_id=session_id,
         role="assistant",
         content=assistant_message,
@@ -299,7 +465,9 @@ async def execute_agent(
     message: str,
     session_id: str,
     user_id: Optional[str] = None,
-    save_conversation: bool = True
+    save_conversation: bool = True,
+    cache_embedding: Optional[List[float]] = None,
+    session: Optional[Dict[str, Any]] = None
 ) -> tuple[str, List[ToolCall]]:
     """
     Execute the agent with a message.
@@ -309,6 +477,9 @@ async def execute_agent(
         session_id: Session ID
         user_id: Optional user ID
         save_conversation: Whether to save the conversation
+        cache_embedding: Message embedding; when given, a successful answer is
+            stored in the semantic cache
+        session: Session from open_session, used to build the prompt
     
     Returns:
         Tuple of (agent response, tools used)
@@ -326,27 +497,15 @@ async def execute_agent(
         )
         logger.debug("Created agent dependencies: %s", deps)
         
-        # Get conversation context
-        logger.debug("Getting conversation context")
-        context = await get_conversation_context(session_id)
-        logger.debug("Found %d context messages", len(context) if context else 0)
-        
-        # Build prompt with context
-        full_prompt = message
-        if context:
-            context_str = "\n".join([
-                f"{msg['role']}: {msg['content']}"
-                for msg in context[-6:]  # Last 3 turns
-            ])
-            full_prompt = f"Previous conversation:\n{context_str}\n\nCurrent question: {message}"
-            logger.debug("Built full prompt with context (length: %d)", len(full_prompt))
-        else:
-            logger.debug("Using original message as prompt (no context)")
+        # Build prompt with conversation context
+        full_prompt = await build_agent_prompt(message, session_id, session)
+        logger.debug("Built prompt (length: %d)", len(full_prompt))
         
         # Run the agent
         logger.debug("Running agent with full prompt")
         agent_start = datetime.now()
-        result = await rag_agent.run(full_prompt, deps=deps)
+        with span("llm.agent_run"):
+            result = await rag_agent.run(full_prompt, deps=deps)
         agent_end = datetime.now()
         agent_duration = (agent_end - agent_start).total_seconds() * 1000
         
@@ -371,6 +530,12 @@ async def execute_agent(
             )
             logger.debug("Conversation turn saved")
         
+        if cache_embedding is not None:
+            try:
+                await semantic_cache.store(message, cache_embedding, response, tools_used, user_id=user_id)
+            except Exception as e:
+                logger.warning("Semantic cache store failed: %s", e)
+        
         total_time = datetime.now()
         total_duration = (total_time - start_time).total_seconds() * 1000
         logger.debug("Execute agent completed in %.2f ms total", total_duration)
@@ -395,7 +560,7 @@ async def execute_agent(
 
 
 # API Endpoints
-@app.get("/health", response_model=HealthStatus)
+@app.get("/health", response_model=HealthStatus, dependencies=[Depends(light_admission)])
 async def health_check():
     """Health check endpoint."""
     try:
@@ -429,6 +594,18 @@ async def health_check():
         raise HTTPException(status_code=500, detail="Health check failed")
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics (stage latencies are recorded when TELEMETRY_ENABLED is set)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/json")
+async def metrics_json():
+    """Current metric values as JSON (histograms as count and sum)."""
+    return registry.snapshot()
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Non-streaming chat endpoint."""
@@ -436,19 +613,55 @@ async def chat(request: ChatRequest):
     logger.debug("Session ID: %s, User ID: %s", request.session_id, request.user_id)
     
     start_time = datetime.now()
+    slot = await admit(agent_lane, request.user_id)
     
     try:
         # Get or create session
         logger.debug("Getting or creating session")
-        session_id = await get_or_create_session(request)
+        session = await open_session(request)
+        session_id = session["session_id"]
         logger.debug("Using session ID: %s", session_id)
         
+        # Semantic cache: only for new conversations, whose answers don't
+        # depend on earlier turns
+        metadata = {"search_type": str(request.search_type)}
+        cache_embedding = None
+        if semantic_cache.enabled and not request.session_id:
+            try:
+                cache_embedding = await generate_embedding(request.message)
+                cached = await semantic_cache.lookup(cache_embedding, user_id=request.user_id)
+            except Exception as e:
+                logger.warning("Semantic cache lookup failed: %s", e)
+                cache_embedding, cached = None, None
+            
+            if cached:
+                await save_conversation_turn(
+                    session_id=session_id,
+                    user_message=request.message,
+                    assistant_message=cached["response"],
+                    metadata={"user_id": request.user_id, "semantic_cache_hit": True}
+                )
+                metadata["semantic_cache"] = {
+                    "hit": True,
+                    "similarity": cached["similarity"],
+                    "entry_id": cached["entry_id"]
+                }
+                return ChatResponse(
+                    message=cached["response"],
+                    session_id=session_id,
+                    tools_used=cached["tools_used"],
+                    metadata=metadata
+                )
+            metadata["semantic_cache"] = {"hit": False}
+        
         # Execute agent
         logger.debug("Executing agent with message: '%s'", request.message)
         response, tools_used = await execute_agent(
             message=request.message,
             session_id=session_id,
-            user_id=request.user_id
+            user_id=request.user_id,
+            cache_embedding=cache_embedding,
+            session=session
         )
         
         agent_time = datetime.now()
@@ -465,26 +678,31 @@ async def chat(request: ChatRequest):
             message=response,
             session_id=session_id,
             tools_used=tools_used,
-            metadata={"search_type": str(request.search_type)}
+            metadata=metadata
         )
         
     except Exception as e:
         logger.error("Chat endpoint failed: %s", e)
         logger.debug("Chat endpoint error details", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        slot.release()
 
 
 @app.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(request: ChatRequest, http_request: Request):
     """Streaming chat endpoint using Server-Sent Events."""
+    # Held until the stream ends, not just until the response starts
+    slot = await admit(agent_lane, request.user_id)
     try:
         # Get or create session
-        session_id = await get_or_create_session(request)
+        session = await open_session(request)
+        session_id = session["session_id"]
         
         async def generate_stream():
-            """Generate streaming response using agent.iter() pattern."""
+            """Generate SSE frames from the agent run as events happen."""
             try:
-                yield f"data: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n"
+                yield sse_event({"type": "session", "session_id": session_id})
                 
                 # Create dependencies
                 deps = AgentDependencies(
@@ -492,139 +710,73 @@ async def chat_stream(request: ChatRequest):
                     user_id=request.user_id
                 )
                 
-                # Get conversation context
-                context = await get_conversation_context(session_id)
+                # Build input with conversation context
+                full_prompt = await build_agent_prompt(request.message, session_id, session)
                 
-                # Build input with context
-                full_prompt = request.message
-                if context:
-                    context_str = "\n".join([
-                        f"{msg['role']}: {msg['content']}"
-                        for msg in context[-6:]
-                    ])
-                    full_prompt = f"Previous conversation:\n{context_str}\n\nCurrent question: {request.message}"
-                
-                # Save user message immediately
-                await add_message(
+                # Queue user message (written behind, doesn't delay the first token)
+                await message_writer.add(
                     session_id=session_id,
                     role="user",
                     content=request.message,
                     metadata={"user_id": request.user_id}
                 )
                 
-                full_response = ""
-                
-                # Check if we're using Cohere and handle streaming differently
+                # pydantic_ai doesn't support Cohere streaming; its answer is
+                # replayed in word chunks once the run finishes
                 from .providers import get_llm_provider
-                provider = get_llm_provider()
+                streamed = get_llm_provider().lower() != 'cohere'
                 
-                if provider.lower() == 'cohere':
-                    # Use non-streaming for Cohere since pydantic_ai doesn't support Cohere streaming
-                    logger.info("Using non-streaming mode for Cohere")
-                    
-                    # Execute agent normally
-                    response, tools_used = await execute_agent(
-                        message=full_prompt,
-                        session_id=session_id,
-                        user_id=request.user_id,
-                        save_conversation=False  # We'll save it manually
-                    )
-                    
-                    # Send the full response as a single chunk
-                    yield f"data: {json.dumps({'type': 'text', 'content': response})}\n\n"
-                    full_response = response
-                    
-                    # Send tools used information
-                    if tools_used:
-                        tools_data = [
-                            {
-                                "tool_name": tool.tool_name,
-                                "args": tool.args,
-                                "tool_call_id": tool.tool_call_id
-                            }
-                            for tool in tools_used
-                        ]
-                        yield f"data: {json.dumps({'type': 'tools', 'tools': tools_data})}\n\n"
-                    
-                    # Save assistant response
-                    await add_message(
-                        session_id=session_id,
-                        role="assistant",
-                        content=full_response,
-                        metadata={
-                            "streamed": False,  # Not actually streamed for Cohere
-                            "tool_calls": len(tools_used)
-                        }
-                    )
-                    
-                else:
-                    # Use normal streaming for other providers
-                    async with rag_agent.iter(full_prompt, deps=deps) as run:
-                        async for node in run:
-                            if rag_agent.is_model_request_node(node):
-                                # Stream tokens from the model
-                                async with node.stream(run.ctx) as request_stream:
-                                    async for event in request_stream:
-                                        from pydantic_ai.messages import PartStartEvent, PartDeltaEvent, TextPartDelta
-                                        
-                                        if isinstance(event, PartStartEvent) and event.part.part_kind == 'text':
-                                            delta_content = event.part.content
-                                            yield f"data: {json.dumps({'type': 'text', 'content': delta_content})}\n\n"
-                                            full_response += delta_content
-                                            
-                                        elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
-                                            delta_content = event.delta.content_delta
-                                            yield f"data: {json.dumps({'type': 'text', 'content': delta_content})}\n\n"
-                                            full_response += delta_content
-                    
-                    # Extract tools used from the final result
-                    result = run.result
-                    tools_used = extract_tool_calls(result)
-                    
-                    # Send tools used information
-                    if tools_used:
-                        tools_data = [
-                            {
-                                "tool_name": tool.tool_name,
-                                "args": tool.args,
-                                "tool_call_id": tool.tool_call_id
-                            }
-                            for tool in tools_used
-                        ]
-                        yield f"data: {json.dumps({'type': 'tools', 'tools': tools_data})}\n\n"
-                    
-                    # Save assistant response
-                    await add_message(
-                        session_id=session_id,
-                        role="assistant",
-                        content=full_response,
-                        metadata={
-                            "streamed": True,
-                            "tool_calls": len(tools_used)
+                stream = AgentEventStream(rag_agent, full_prompt, deps, stream_text=streamed)
+                async for event in stream:
+                    yield sse_event(event)
+                
+                # Send tools used information
+                tools_used = extract_tool_calls(stream.result)
+                if tools_used:
+                    tools_data = [
+                        {
+                            "tool_name": tool.tool_name,
+                            "args": tool.args,
+                            "tool_call_id": tool.tool_call_id
                         }
-                    )
+                        for tool in tools_used
+                    ]
+                    yield sse_event({"type": "tools", "tools": tools_data})
                 
-                yield f"data: {json.dumps({'type': 'end'})}\n\n"
+                # Save assistant response
+                await message_writer.add(
+                    session_id=session_id,
+                    role="assistant",
+                    content=stream.text,
+                    metadata={
+                        "streamed": streamed,
+                        "tool_calls": len(tools_used)
+                    }
+                )
                 
+                yield sse_event({"type": "end"})
+            
             except Exception as e:
                 logger.error(f"Stream error: {e}")
-                error_chunk = {
-                    "type": "error",
-                    "content": f"Stream error: {str(e)}"
-                }
-                yield f"data: {json.dumps(error_chunk)}\n\n"
+                yield sse_event({"type": "error", "content": f"Stream error: {str(e)}"})
+            finally:
+                slot.release()
         
         return StreamingResponse(
-            generate_stream(),
-            media_type="text/plain",
+            with_heartbeats(generate_stream(), http_request),
+            media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
-                "Content-Type": "text/event-stream"
-            }
+                # Disable proxy buffering (nginx) so frames go out immediately
+                "X-Accel-Buffering": "no"
+            },
+            # Covers a client that disconnects before the body starts
+            background=BackgroundTask(slot.release)
         )
         
     except Exception as e:
+        slot.release()
         logger.error(f"Streaming chat failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -635,21 +787,28 @@ async def search_vector(request: SearchRequest):
     try:
         input_data = VectorSearchInput(
             query=request.query,
-            limit=request.limit
+            limit=request.limit,
+            filters=SearchFilters(**request.filters),
+            dedup=request.dedup,
+            diversify=request.diversify,
+            mmr_lambda=request.mmr_lambda
         )
         
+        stage_timings = {}
         start_time = datetime.now()
-        results = await vector_search_tool(input_data)
+        results = await vector_search_tool(input_data, timings=stage_timings)
         end_time = datetime.now()
         
         query_time = (end_time - start_time).total_seconds() * 1000
         
-        return SearchResponse(
-            results=results,
+        # Returned directly so FastAPI doesn't re-validate and re-encode the models
+        return FastJSONResponse(SearchResponse(
+            results=slim_chunks(results, request.include_metadata, request.full_content),
             total_results=len(results),
             search_type="vector",
-            query_time_ms=query_time
-        )
+            query_time_ms=query_time,
+            stage_timings_ms=stage_timings
+        ))
         
     except Exception as e:
         logger.error(f"Vector search failed: {e}")
@@ -688,50 +847,182 @@ async def search_hybrid(request: SearchRequest):
     try:
         input_data = HybridSearchInput(
             query=request.query,
-            limit=request.limit
+            limit=request.limit,
+            filters=SearchFilters(**request.filters),
+            dedup=request.dedup,
+            diversify=request.diversify,
+            mmr_lambda=request.mmr_lambda
         )
         
+        stage_timings = {}
         start_time = datetime.now()
-        results = await hybrid_search_tool(input_data)
+        results = await hybrid_search_tool(input_data, timings=stage_timings)
         end_time = datetime.now()
         
         query_time = (end_time - start_time).total_seconds() * 1000
         
-        return SearchResponse(
-            results=results,
+        # Returned directly so FastAPI doesn't re-validate and re-encode the models
+        return FastJSONResponse(SearchResponse(
+            results=slim_chunks(results, request.include_metadata, request.full_content),
             total_results=len(results),
             search_type="hybrid",
-            query_time_ms=query_time
-        )
+            query_time_ms=query_time,
+            stage_timings_ms=stage_timings
+        ))
         
     except Exception as e:
         logger.error(f"Hybrid search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/documents")
+async def run_search(
+    request: SearchRequest,
+    query_embedding: Optional[List[float]] = None
+) -> SearchResponse:
+    """
+    Run a vector or hybrid search.
+    
+    Args:
+        request: Search request
+        query_embedding: Precomputed query embedding, generated if omitted
+    
+    Returns:
+        Search response
+    """
+    if request.search_type == SearchType.VECTOR:
+        input_model, tool = VectorSearchInput, vector_search_tool
+    else:
+        input_model, tool = HybridSearchInput, hybrid_search_tool
+    
+    input_data = input_model(
+        query=request.query,
+        limit=request.limit,
+        filters=SearchFilters(**request.filters),
+        dedup=request.dedup,
+        diversify=request.diversify,
+        mmr_lambda=request.mmr_lambda
+    )
+    
+    stage_timings = {}
+    start_time = datetime.now()
+    results = await tool(input_data, query_embedding=query_embedding, timings=stage_timings)
+    query_time = (datetime.now() - start_time).total_seconds() * 1000
+    
+    return SearchResponse(
+        results=slim_chunks(results, request.include_metadata, request.full_content),
+        total_results=len(results),
+        search_type=request.search_type,
+        query_time_ms=query_time,
+        stage_timings_ms=stage_timings
+    )
+
+
+async def stream_batch_search(
+    queries: List[SearchRequest],
+    embeddings: List[List[float]],
+    concurrency: int = BATCH_SEARCH_CONCURRENCY
+):
+    """
+    Run searches concurrently and yield NDJSON lines as each finishes.
+    
+    Args:
+        queries: Search requests
+        embeddings: Query embeddings, in the order of queries
+        concurrency: Searches running at once
+    
+    Yields:
+        One JSON line per query, with its index in the request
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run(index: int, query: SearchRequest, embedding: List[float]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                response = await run_search(query, query_embedding=embedding)
+                return {"index": index, **response.model_dump()}
+            except Exception as e:
+                logger.error(f"Batch search query {index} failed: {e}")
+                return {"index": index, "error": str(e)}
+    
+    tasks = [
+        asyncio.create_task(run(index, query, embedding))
+        for index, (query, embedding) in enumerate(zip(queries, embeddings))
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield dumps(await next_done) + b"\n"
+    finally:
+        # Client gone: stop searches that haven't finished
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """
+    Batch search endpoint.
+    
+    All queries are embedded in one provider call, searched with bounded
+    concurrency and streamed back as NDJSON in completion order. Clients
+    that need each line as soon as it is ready should not ask for gzip,
+    which holds small lines back until a compressed block fills.
+    """
+    slot = await admit(agent_lane)
+    try:
+        embeddings = await generate_embeddings([query.query for query in request.queries])
+        
+        async def generate_lines():
+            """Release the admission slot once the last line is out."""
+            try:
+                async for line in stream_batch_search(request.queries, embeddings):
+                    yield line
+            finally:
+                slot.release()
+        
+        return StreamingResponse(
+            generate_lines(),
+            media_type="application/x-ndjson",
+            background=BackgroundTask(slot.release)
+        )
+        
+    except Exception as e:
+        slot.release()
+        logger.error(f"Batch search failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/documents", dependencies=[Depends(light_admission)])
 async def list_documents_endpoint(
     limit: int = 20,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """List documents endpoint."""
+    """
+    List documents endpoint.
+    
+    Pages are keyset-paginated: pass the returned next_cursor to get the
+    following page. offset still works but scans every skipped document.
+    """
     try:
-        input_data = DocumentListInput(limit=limit, offset=offset)
-        documents = await list_documents_tool(input_data)
+        page = await list_documents_page(limit=limit, cursor=cursor, offset=offset)
+        documents = page["documents"]
         
         return {
             "documents": documents,
             "total": len(documents),
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": page["next_cursor"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Document listing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/sessions/{session_id}")
+@app.get("/sessions/{session_id}", dependencies=[Depends(light_admission)])
 async def get_session_info(session_id: str):
     """Get session information."""
     try:
@@ -751,6 +1042,7 @@ async def get_session_info(session_id: str):
 @app.post("/master-agent/process")
 async def master_agent_process(request: ChatRequest):
     """Process request through master agent for task delegation."""
+    slot = await admit(agent_lane, request.user_id)
     try:
         # Get or create session
         session_id = await get_or_create_session(request)
@@ -776,12 +1068,24 @@ async def master_agent_process(request: ChatRequest):
     except Exception as e:
         logger.error(f"Master agent processing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        slot.release()
 
 
 @app.get("/master-agent/stats")
 async def get_master_agent_stats():
     """Get master agent statistics."""
     try:
+        if SHARED_STATS_ENABLED:
+            await stats_publisher.publish("master_agent")
+            totals = await aggregate_stats("master_agent")
+            return {
+                "agent_stats": totals["agent_stats"],
+                "task_history_count": totals["task_count"],
+                "workers": totals["workers"],
+                "status": "success"
+            }
+        
         return {
             "agent_stats": master_agent.agent_stats,
             "task_history_count": len(master_agent.task_history),
@@ -795,6 +1099,7 @@ async def get_master_agent_stats():
 @app.post("/smart-agent/process")
 async def smart_agent_process(request: ChatRequest):
     """Process request through smart master agent for intelligent task delegation."""
+    slot = await admit(agent_lane, request.user_id)
     try:
         # Get or create session
         session_id = await get_or_create_session(request)
@@ -820,12 +1125,23 @@ async def smart_agent_process(request: ChatRequest):
     except Exception as e:
         logger.error(f"Smart agent processing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        slot.release()
 
 
 @app.get("/smart-agent/stats")
 async def get_smart_agent_stats():
     """Get smart agent statistics."""
     try:
+        if SHARED_STATS_ENABLED:
+            await stats_publisher.publish("smart_agent")
+            totals = await aggregate_stats("smart_agent")
+            return {
+                "agent_stats": totals["agent_stats"],
+                "workers": totals["workers"],
+                "status": "success"
+            }
+        
         return {
             "agent_stats": smart_master_agent.agent_stats,
             "status": "success"
@@ -836,6 +1152,20 @@ async def get_smart_agent_stats():
 
 
 # Exception handlers
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load with 429 and a Retry-After hint."""
+    return JSONResponse(
+        status_code=429,
+        content=ErrorResponse(
+            error=str(exc),
+            error_type=type(exc).__name__,
+            details={"lane": exc.lane, "reason": exc.reason}
+        ).model_dump(),
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
@@ -850,10 +1180,14 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # Development server
 if __name__ == "__main__":
+    # With APP_WORKERS > 1 uvicorn binds the socket once and forks workers;
+    # each worker sizes its pool from DB_POOL_BUDGET and warms it in the
+    # lifespan before accepting requests. Reload only works single-process.
     uvicorn.run(
         "agent.api:app",
         host=APP_HOST,
         port=APP_PORT,
-        reload=APP_ENV == "development",
+        workers=APP_WORKERS,
+        reload=APP_ENV == "development" and APP_WORKERS == 1,
         log_level=LOG_LEVEL.lower()
     )
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Rolling conversation summaries for long sessions.
+
+Only the latest few messages go into the agent prompt verbatim. Older
+messages are folded into a summary kept on sessions.metadata, so the
+prompt stays bounded however long a session runs. Summaries are refreshed
+in the background and never delay a response.
+"""
+
+import os
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Set
+
+from dotenv import load_dotenv
+
+from .db_utils import get_messages_between, update_session
+from .providers import get_llm_model
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_SUMMARY_ENABLED = os.getenv("CONVERSATION_SUMMARY_ENABLED", "false").lower() == "true"
+# Unsummarized messages older than the context window needed before folding them in
+CONVERSATION_SUMMARY_MIN_MESSAGES = int(os.getenv("CONVERSATION_SUMMARY_MIN_MESSAGES", "10"))
+# Messages folded into the summary per update
+CONVERSATION_SUMMARY_BATCH = int(os.getenv("CONVERSATION_SUMMARY_BATCH", "50"))
+CONVERSATION_SUMMARY_MAX_CHARS = int(os.getenv("CONVERSATION_SUMMARY_MAX_CHARS", "2000"))
+
+# Sessions with a summary update in flight, and the tasks doing it
+_updating: Set[str] = set()
+_tasks: Set[asyncio.Task] = set()
+
+
+async def summarize_messages(summary: str, messages: List[Dict[str, Any]]) -> str:
+    """
+    Fold messages into an existing summary with the LLM.
+    
+    Args:
+        summary: Current summary (may be empty)
+        messages: Messages to add, oldest first
+    
+    Returns:
+        Updated summary
+    """
+    from pydantic_ai import Agent
+    
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = f"""
+    Update the running summary of a conversation between a user and an assistant.
+    Keep facts, names, numbers, decisions and open questions the user may refer back to.
+    Stay under {CONVERSATION_SUMMARY_MAX_CHARS} characters. Return only the summary.
+    
+    Current summary:
+    {summary or "(none)"}
+    
+    New messages:
+    {transcript}
+    """
+    
+    response = await Agent(get_llm_model()).run(prompt)
+    return response.data.strip()[:CONVERSATION_SUMMARY_MAX_CHARS]
+
+
+async def update_conversation_summary(
+    session_id: str,
+    session_metadata: Dict[str, Any],
+    window_start: str
+) -> bool:
+    """
+    Summarize the messages between the current summary and the context window.
+    
+    Args:
+        session_id: Session UUID
+        session_metadata: Session metadata holding the current summary
+        window_start: Timestamp of the oldest message sent verbatim
+    
+    Returns:
+        True if the summary was updated
+    """
+    messages = await get_messages_between(
+        session_id,
+        after=session_metadata.get("summary_through"),
+        before=window_start,
+        limit=CONVERSATION_SUMMARY_BATCH
+    )
+    if len(messages) < CONVERSATION_SUMMARY_MIN_MESSAGES:
+        return False
+    
+    summary = await summarize_messages(session_metadata.get("conversation_summary", ""), messages)
+    await update_session(session_id, {
+        "conversation_summary": summary,
+        "summary_through": messages[-1]["created_at"]
+    })
+    logger.debug("Folded %d messages into the summary of session %s", len(messages), session_id)
+    return True
+
+
+def schedule_summary_update(
+    session_id: str,
+    session_metadata: Dict[str, Any],
+    window_start: Optional[str]
+) -> None:
+    """
+    Refresh a session's summary in the background, at most once at a time.
+    
+    Args:
+        session_id: Session UUID
+        session_metadata: Session metadata holding the current summary
+        window_start: Timestamp of the oldest message sent verbatim
+    """
+    if not CONVERSATION_SUMMARY_ENABLED or not window_start or session_id in _updating:
+        return
+    
+    async def run():
+        try:
+            await update_conversation_summary(session_id, session_metadata, window_start)
+        except Exception as e:
+            logger.warning("Conversation summary update failed for %s: %s", session_id, e)
+        finally:
+            _updating.discard(session_id)
+    
+    _updating.add(session_id)
+    task = asyncio.create_task(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -15,12 +15,24 @@ import asyncpg
 from asyncpg.pool import Pool
 from dotenv import load_dotenv
 from .schemas import ProviderType, convert_to_provider_format, convert_from_provider_format
+from .telemetry import traced
+from .pagination import encode_cursor, decode_cursor
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# ivfflat probes / hnsw ef_search for filtered queries on pgvector < 0.8 (no iterative scans)
+VECTOR_FILTER_PROBES = int(os.getenv("VECTOR_FILTER_PROBES", "10"))
+VECTOR_FILTER_EF_SEARCH = int(os.getenv("VECTOR_FILTER_EF_SEARCH", "200"))
+
+# Connections shared by all API worker processes (keep under Postgres max_connections)
+DB_POOL_BUDGET = int(os.getenv("DB_POOL_BUDGET", "20"))
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "5"))
+# Number of API worker processes sharing the budget
+APP_WORKERS = int(os.getenv("APP_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+
 
 class DatabasePool:
     """Manages PostgreSQL connection pool."""
@@ -37,18 +49,57 @@ class DatabasePool:
             raise ValueError("DATABASE_URL environment variable not set")
         
         self.pool: Optional[Pool] = None
+        
+        # Each worker gets an equal share of the connection budget
+        self.max_size = max(1, DB_POOL_BUDGET // max(1, APP_WORKERS))
+        self.min_size = min(DB_POOL_MIN_SIZE, self.max_size)
+        self.waiting = 0
     
     async def initialize(self):
         """Create connection pool."""
         if not self.pool:
             self.pool = await asyncpg.create_pool(
                 self.database_url,
-                min_size=5,
-                max_size=20,
+                min_size=self.min_size,
+                max_size=self.max_size,
                 max_inactive_connection_lifetime=300,
                 command_timeout=60
             )
-            logger.info("Database connection pool initialized")
+            logger.info("Database connection pool initialized (%d-%d connections)", self.min_size, self.max_size)
+    
+    async def warm(self):
+        """
+        Check out the pool's idle connections once before serving traffic.
+        
+        Every connection completes a round trip, so broken connections
+        are replaced now rather than on a user's first request.
+        """
+        if not self.pool:
+            await self.initialize()
+        
+        async def ping():
+            async with self.pool.acquire() as connection:
+                await connection.fetchval("SELECT 1")
+        
+        await asyncio.gather(*(ping() for _ in range(self.min_size)))
+        logger.info("Database connection pool warmed (%d connections)", self.min_size)
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get pool saturation without touching the database.
+        
+        Returns:
+            Dict with size, idle, in_use, max_size and waiting
+        """
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "max_size": self.max_size,
+            "waiting": self.waiting
+        }
     
     async def close(self):
         """Close connection pool."""
@@ -63,8 +114,17 @@ class DatabasePool:
         if not self.pool:
             await self.initialize()
         
-        async with self.pool.acquire() as connection:
-            yield connection
+        # Requests waiting for a free connection, for the saturation gauges
+        self.waiting += 1
+        acquired = False
+        try:
+            async with self.pool.acquire() as connection:
+                self.waiting -= 1
+                acquired = True
+                yield connection
+        finally:
+            if not acquired:
+                self.waiting -= 1
 
 
 # Global database pool instance
@@ -76,6 +136,11 @@ async def initialize_database():
     await db_pool.initialize()
 
 
+async def warm_database():
+    """Open and check the pool's connections before serving traffic."""
+    await db_pool.warm()
+
+
 async def close_database():
     """Close database connection pool."""
     await db_pool.close()
@@ -115,6 +180,7 @@ async def create_session(
         return result["id"]
 
 
+@traced("db.get_session")
 async def get_session(session_id: str) -> Optional[Dict[str, Any]]:
     """
     Get session by ID.
@@ -181,6 +247,133 @@ async def update_session(session_id: str, metadata: Dict[str, Any]) -> bool:
         return result.split()[-1] != "0"
 
 
+@traced("db.get_or_create_session_with_context")
+async def get_or_create_session_with_context(
+    session_id: Optional[str],
+    user_id: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    timeout_minutes: int = 60,
+    context_limit: int = 10
+) -> Dict[str, Any]:
+    """
+    Resolve or create a session and load its latest messages in one query.
+    
+    Args:
+        session_id: Requested session UUID, or None to always create one
+        user_id: User identifier for a new session
+        metadata: Metadata for a new session
+        timeout_minutes: Timeout for a new session
+        context_limit: Number of most recent messages to load
+    
+    Returns:
+        Dict with session_id, created, metadata, expires_at and messages
+        (oldest first, in the format of get_recent_messages)
+    """
+    async with db_pool.acquire() as conn:
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=timeout_minutes)
+        
+        # The session is created only when the requested one is missing or
+        # expired; recent messages come newest-first off idx_messages_session_id
+        result = await conn.fetchrow(
+            """
+            WITH existing AS (
+                SELECT id, metadata, expires_at
+                FROM sessions
+                WHERE id = $1::uuid
+                AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP)
+            ),
+            created AS (
+                INSERT INTO sessions (user_id, metadata, expires_at)
+                SELECT $2, $3::jsonb, $4
+                WHERE NOT EXISTS (SELECT 1 FROM existing)
+                RETURNING id, metadata, expires_at
+            ),
+            session AS (
+                SELECT id, metadata, expires_at, false AS created FROM existing
+                UNION ALL
+                SELECT id, metadata, expires_at, true AS created FROM created
+            ),
+            recent AS (
+                SELECT m.id::text AS id, m.role, m.content, m.metadata, m.created_at
+                FROM messages m
+                WHERE m.session_id = (SELECT id FROM existing)
+                ORDER BY m.created_at DESC
+                LIMIT $5
+            )
+            SELECT
+                s.id::text AS session_id,
+                s.created,
+                s.metadata,
+                s.expires_at,
+                COALESCE((SELECT json_agg(r ORDER BY r.created_at) FROM recent r), '[]') AS messages
+            FROM session s
+            """,
+            session_id,
+            user_id,
+            json.dumps(metadata or {}),
+            expires_at,
+            context_limit
+        )
+        
+        messages = json.loads(result["messages"])
+        
+        return {
+            "session_id": result["session_id"],
+            "created": result["created"],
+            "metadata": json.loads(result["metadata"]),
+            "expires_at": result["expires_at"].isoformat() if result["expires_at"] else None,
+            "messages": [
+                {
+                    "id": msg["id"],
+                    "role": msg["role"],
+                    "content": msg["content"],
+                    "metadata": msg["metadata"] or {},
+                    # json_agg renders the session TimeZone; normalize to UTC like asyncpg rows
+                    "created_at": datetime.fromisoformat(msg["created_at"]).astimezone(timezone.utc).isoformat()
+                }
+                for msg in messages
+            ]
+        }
+
+
+async def delete_expired_sessions(batch_size: int = 1000) -> int:
+    """
+    Delete expired sessions (and their messages) in batches.
+    
+    Each batch walks idx_sessions_expires_at from the oldest expiry and
+    skips rows locked by other workers, so concurrent sweepers and live
+    traffic don't block each other.
+    
+    Args:
+        batch_size: Sessions deleted per statement
+    
+    Returns:
+        Number of sessions deleted
+    """
+    deleted = 0
+    
+    while True:
+        async with db_pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                DELETE FROM sessions
+                WHERE id IN (
+                    SELECT id FROM sessions
+                    WHERE expires_at < CURRENT_TIMESTAMP
+                    ORDER BY expires_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                """,
+                batch_size
+            )
+        
+        count = int(result.split()[-1])
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
 # Message Management Functions
 async def add_message(
     session_id: str,
@@ -216,6 +409,39 @@ async def add_message(
         return result["id"]
 
 
+@traced("db.add_messages")
+async def add_messages(messages: List[Dict[str, Any]]) -> int:
+    """
+    Add several messages in one multi-row insert.
+    
+    Args:
+        messages: Dicts with id, session_id, role, content, metadata and
+            created_at (datetime)
+    
+    Returns:
+        Number of messages inserted
+    """
+    if not messages:
+        return 0
+    
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO messages (id, session_id, role, content, metadata, created_at)
+            SELECT * FROM unnest($1::uuid[], $2::uuid[], $3::text[], $4::text[], $5::jsonb[], $6::timestamptz[])
+            ON CONFLICT (id) DO NOTHING
+            """,
+            [m["id"] for m in messages],
+            [m["session_id"] for m in messages],
+            [m["role"] for m in messages],
+            [m["content"] for m in messages],
+            [json.dumps(m.get("metadata") or {}) for m in messages],
+            [m["created_at"] for m in messages]
+        )
+    
+    return len(messages)
+
+
 async def get_session_messages(
     session_id: str,
     limit: Optional[int] = None
@@ -244,9 +470,9 @@ async def get_session_messages(
         """
         
         if limit:
-            query += f" LIMIT {limit}"
-        
-        results = await conn.fetch(query, session_id)
+            results = await conn.fetch(query + " LIMIT $2", session_id, limit)
+        else:
+            results = await conn.fetch(query, session_id)
         
         return [
             {
@@ -260,6 +486,106 @@ async def get_session_messages(
         ]
 
 
+@traced("db.get_recent_messages")
+async def get_recent_messages(
+    session_id: str,
+    limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Get the latest messages of a session.
+    
+    Reads backwards through idx_messages_session_id (session_id, created_at)
+    so only the requested rows are touched, however long the session is.
+    
+    Args:
+        session_id: Session UUID
+        limit: Number of most recent messages to return
+    
+    Returns:
+        List of messages ordered by creation time (oldest first)
+    """
+    async with db_pool.acquire() as conn:
+        results = await conn.fetch(
+            """
+            SELECT 
+                id::text,
+                role,
+                content,
+                metadata,
+                created_at
+            FROM messages
+            WHERE session_id = $1::uuid
+            ORDER BY created_at DESC
+            LIMIT $2
+            """,
+            session_id,
+            limit
+        )
+        
+        return [
+            {
+                "id": row["id"],
+                "role": row["role"],
+                "content": row["content"],
+                "metadata": json.loads(row["metadata"]),
+                "created_at": row["created_at"].isoformat()
+            }
+            for row in reversed(results)
+        ]
+
+
+async def get_messages_between(
+    session_id: str,
+    after: Optional[str],
+    before: str,
+    limit: int = 50,
+    latest: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Get the messages of a session created in a time window.
+    
+    Args:
+        session_id: Session UUID
+        after: Exclusive lower bound (ISO timestamp), or None for the start
+        before: Exclusive upper bound (ISO timestamp)
+        limit: Maximum number of messages to return
+        latest: Return the last `limit` messages of the window instead of the first
+    
+    Returns:
+        List of messages ordered by creation time (oldest first)
+    """
+    async with db_pool.acquire() as conn:
+        results = await conn.fetch(
+            f"""
+            SELECT 
+                id::text,
+                role,
+                content,
+                created_at
+            FROM messages
+            WHERE session_id = $1::uuid
+            AND ($2::timestamptz IS NULL OR created_at > $2::timestamptz)
+            AND created_at < $3::timestamptz
+            ORDER BY created_at {"DESC" if latest else "ASC"}
+            LIMIT $4
+            """,
+            session_id,
+            datetime.fromisoformat(after) if after else None,
+            datetime.fromisoformat(before),
+            limit
+        )
+        
+        return [
+            {
+                "id": row["id"],
+                "role": row["role"],
+                "content": row["content"],
+                "created_at": row["created_at"].isoformat()
+            }
+            for row in (reversed(results) if latest else results)
+        ]
+
+
 # Document Management Functions
 async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -305,71 +631,201 @@ async def get_document(document_id: str) -> Optional[Dict[str, Any]]:
 async def list_documents(
     limit: int = 100,
     offset: int = 0,
-    metadata_filter: Optional[Dict[str, Any]] = None
+    metadata_filter: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
-    List documents with optional filtering.
+    List documents with optional filtering, newest first.
+    
+    Chunk counts come from documents.chunk_count, kept by the ingestion
+    writer, so listing doesn't join or aggregate chunks.
     
     Args:
         limit: Maximum number of documents to return
         offset: Number of documents to skip
         metadata_filter: Optional metadata filter
+        cursor: Keyset cursor from list_documents_page; documents after it
+            are returned without scanning the skipped ones
     
     Returns:
         List of documents
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
+    params = []
+    conditions = []
+    
+    if metadata_filter:
+        conditions.append(f"d.metadata @> ${len(params) + 1}::jsonb")
+        params.append(json.dumps(metadata_filter))
+    
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(position["created_at"])
+            document_id = str(UUID(position["id"]))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        conditions.append(f"(d.created_at, d.id) < (${len(params) + 1}::timestamptz, ${len(params) + 2}::uuid)")
+        params.extend([created_at, document_id])
+    
+    query = """
+        SELECT 
+            d.id::text,
+            d.title,
+            d.source,
+            d.metadata,
+            d.created_at,
+            d.updated_at,
+            d.chunk_count
+        FROM documents d
+    """
+    
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    
+    query += """
+        ORDER BY d.created_at DESC, d.id DESC
+        LIMIT $%d OFFSET $%d
+    """ % (len(params) + 1, len(params) + 2)
+    
+    params.extend([limit, offset])
+    
     async with db_pool.acquire() as conn:
-        query = """
-            SELECT 
-                d.id::text,
-                d.title,
-                d.source,
-                d.metadata,
-                d.created_at,
-                d.updated_at,
-                COUNT(c.id) AS chunk_count
-            FROM documents d
-            LEFT JOIN chunks c ON d.id = c.document_id
-        """
-        
-        params = []
-        conditions = []
-        
-        if metadata_filter:
-            conditions.append(f"d.metadata @> ${len(params) + 1}::jsonb")
-            params.append(json.dumps(metadata_filter))
-        
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        
-        query += """
-            GROUP BY d.id, d.title, d.source, d.metadata, d.created_at, d.updated_at
-            ORDER BY d.created_at DESC
-            LIMIT $%d OFFSET $%d
-        """ % (len(params) + 1, len(params) + 2)
-        
-        params.extend([limit, offset])
-        
         results = await conn.fetch(query, *params)
-        
-        return [
-            {
-                "id": row["id"],
-                "title": row["title"],
-                "source": row["source"],
-                "metadata": json.loads(row["metadata"]),
-                "created_at": row["created_at"].isoformat(),
-                "updated_at": row["updated_at"].isoformat(),
-                "chunk_count": row["chunk_count"]
-            }
-            for row in results
-        ]
+    
+    return [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "source": row["source"],
+            "metadata": json.loads(row["metadata"]),
+            "created_at": row["created_at"].isoformat(),
+            "updated_at": row["updated_at"].isoformat(),
+            "chunk_count": row["chunk_count"]
+        }
+        for row in results
+    ]
+
+
+async def list_documents_page(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    metadata_filter: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    List one page of documents with a cursor for the next.
+    
+    Args:
+        limit: Page size
+        cursor: Cursor returned with the previous page
+        offset: Number of documents to skip (for clients not using cursors)
+        metadata_filter: Optional metadata filter
+    
+    Returns:
+        Dict with documents and next_cursor (None on the last page)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    # One extra row tells whether another page exists
+    documents = await list_documents(limit + 1, offset, metadata_filter, cursor)
+    
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor({"created_at": last["created_at"], "id": last["id"]})
+    
+    return {"documents": documents, "next_cursor": next_cursor}
 
 
 # Vector Search Functions
+_iterative_scan_supported: Optional[bool] = None
+
+
+def compile_chunk_filters(
+    filters: Optional[Dict[str, Any]],
+    first_param: int
+) -> Tuple[List[str], List[Any]]:
+    """
+    Compile search filters into SQL predicates over chunks c / documents d.
+    
+    Each predicate is written so it can use an index: metadata containment
+    uses the GIN index on documents.metadata, created_at the btree index.
+    
+    Args:
+        filters: Filters as produced by SearchFilters.to_sql_filters()
+        first_param: Number of the first positional parameter to use
+    
+    Returns:
+        Tuple of (predicates, parameters)
+    """
+    predicates = []
+    params = []
+    
+    def param(value: Any, cast: str) -> str:
+        params.append(value)
+        return f"${first_param + len(params) - 1}::{cast}"
+    
+    for key, value in (filters or {}).items():
+        if key == "metadata":
+            if value:
+                predicates.append(f"d.metadata @> {param(json.dumps(value), 'jsonb')}")
+        elif key == "sources":
+            if value:
+                predicates.append(f"d.source = ANY({param(list(value), 'text[]')})")
+        elif key == "document_ids":
+            if value:
+                predicates.append(f"c.document_id = ANY({param([str(v) for v in value], 'uuid[]')})")
+        elif key == "created_after":
+            if value is not None:
+                predicates.append(f"d.created_at >= {param(value, 'timestamptz')}")
+        elif key == "created_before":
+            if value is not None:
+                predicates.append(f"d.created_at < {param(value, 'timestamptz')}")
+        else:
+            raise ValueError(f"Unsupported search filter: {key}")
+    
+    return predicates, params
+
+
+async def _prepare_filtered_scan(conn) -> None:
+    """
+    Let the ANN index keep scanning until enough rows pass the filters.
+    
+    Uses pgvector's iterative index scans (0.8+). Older versions get a wider
+    single scan instead. Must run inside a transaction (SET LOCAL).
+    """
+    global _iterative_scan_supported
+    
+    if _iterative_scan_supported is None:
+        version = await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        try:
+            _iterative_scan_supported = tuple(int(p) for p in version.split(".")[:2]) >= (0, 8)
+        except (AttributeError, ValueError):
+            _iterative_scan_supported = False
+        logger.debug("pgvector %s, iterative index scans: %s", version, _iterative_scan_supported)
+    
+    if _iterative_scan_supported:
+        await conn.execute(
+            "SET LOCAL ivfflat.iterative_scan = relaxed_order; "
+            "SET LOCAL hnsw.iterative_scan = relaxed_order"
+        )
+    else:
+        await conn.execute(
+            f"SET LOCAL ivfflat.probes = {VECTOR_FILTER_PROBES}; "
+            f"SET LOCAL hnsw.ef_search = {VECTOR_FILTER_EF_SEARCH}"
+        )
+
+
+@traced("db.vector_search")
 async def vector_search(
     embedding: List[float],
-    limit: int = 10
+    limit: int = 10,
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     Perform vector similarity search.
@@ -377,6 +833,7 @@ async def vector_search(
     Args:
         embedding: Query embedding vector
         limit: Maximum number of results
+        filters: Optional document filters (see compile_chunk_filters)
     
     Returns:
         List of matching chunks ordered by similarity (best first)
@@ -386,11 +843,43 @@ async def vector_search(
         # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
         embedding_str = '[' + ','.join(map(str, embedding)) + ']'
         
-        results = await conn.fetch(
-            "SELECT * FROM match_chunks($1::vector, $2)",
-            embedding_str,
-            limit
-        )
+        predicates, params = compile_chunk_filters(filters, 3)
+        
+        if not predicates:
+            results = await conn.fetch(
+                "SELECT * FROM match_chunks($1::vector, $2)",
+                embedding_str,
+                limit
+            )
+        else:
+            # relaxed_order can return rows slightly out of order, so the
+            # materialized candidates are re-sorted by exact distance
+            query = f"""
+                WITH candidates AS MATERIALIZED (
+                    SELECT
+                        c.id AS chunk_id,
+                        c.document_id,
+                        c.content,
+                        c.embedding <=> $1::vector AS distance,
+                        c.metadata,
+                        d.title AS document_title,
+                        d.source AS document_source
+                    FROM chunks c
+                    JOIN documents d ON c.document_id = d.id
+                    WHERE c.embedding IS NOT NULL
+                    AND {" AND ".join(predicates)}
+                    ORDER BY c.embedding <=> $1::vector
+                    LIMIT $2
+                )
+                SELECT
+                    chunk_id, document_id, content, 1 - distance AS similarity,
+                    metadata, document_title, document_source
+                FROM candidates
+                ORDER BY distance
+            """
+            async with conn.transaction():
+                await _prepare_filtered_scan(conn)
+                results = await conn.fetch(query, embedding_str, limit, *params)
         
         return [
             {
@@ -406,11 +895,13 @@ async def vector_search(
         ]
 
 
+@traced("db.hybrid_search")
 async def hybrid_search(
     embedding: List[float],
     query_text: str,
     limit: int = 10,
-    text_weight: float = 0.3
+    text_weight: float = 0.3,
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     Perform hybrid search (vector + keyword).
@@ -420,6 +911,7 @@ async def hybrid_search(
         query_text: Query text for keyword search
         limit: Maximum number of results
         text_weight: Weight for text similarity (0-1)
+        filters: Optional document filters (see compile_chunk_filters)
     
     Returns:
         List of matching chunks ordered by combined score (best first)
@@ -429,13 +921,56 @@ async def hybrid_search(
         # PostgreSQL vector format: '[1.0,2.0,3.0]' (no spaces after commas)
         embedding_str = '[' + ','.join(map(str, embedding)) + ']'
         
-        results = await conn.fetch(
-            "SELECT * FROM hybrid_search($1::vector, $2, $3, $4)",
-            embedding_str,
-            query_text,
-            limit,
-            text_weight
-        )
+        predicates, params = compile_chunk_filters(filters, 5)
+        
+        if not predicates:
+            results = await conn.fetch(
+                "SELECT * FROM hybrid_search($1::vector, $2, $3, $4)",
+                embedding_str,
+                query_text,
+                limit,
+                text_weight
+            )
+        else:
+            # Same scoring as the hybrid_search SQL function, restricted to
+            # the filtered documents in both branches
+            where = " AND ".join(predicates)
+            query = f"""
+                WITH vector_results AS (
+                    SELECT c.id AS chunk_id, 1 - (c.embedding <=> $1::vector) AS vector_sim
+                    FROM chunks c
+                    JOIN documents d ON c.document_id = d.id
+                    WHERE c.embedding IS NOT NULL AND {where}
+                ),
+                text_results AS (
+                    SELECT
+                        c.id AS chunk_id,
+                        ts_rank_cd(to_tsvector('english', c.content), plainto_tsquery('english', $2)) AS text_sim
+                    FROM chunks c
+                    JOIN documents d ON c.document_id = d.id
+                    WHERE to_tsvector('english', c.content) @@ plainto_tsquery('english', $2) AND {where}
+                ),
+                scored AS (
+                    SELECT
+                        COALESCE(v.chunk_id, t.chunk_id) AS chunk_id,
+                        COALESCE(v.vector_sim, 0) * (1 - $4::float) + COALESCE(t.text_sim, 0) * $4::float AS combined_score,
+                        COALESCE(v.vector_sim, 0) AS vector_similarity,
+                        COALESCE(t.text_sim, 0) AS text_similarity
+                    FROM vector_results v
+                    FULL OUTER JOIN text_results t ON v.chunk_id = t.chunk_id
+                    ORDER BY combined_score DESC
+                    LIMIT $3
+                )
+                SELECT
+                    s.chunk_id, c.document_id, c.content, s.combined_score,
+                    s.vector_similarity, s.text_similarity, c.metadata,
+                    d.title AS document_title, d.source AS document_source
+                FROM scored s
+                JOIN chunks c ON c.id = s.chunk_id
+                JOIN documents d ON c.document_id = d.id
+                ORDER BY s.combined_score DESC
+            """
+            results = await conn.fetch(query, embedding_str, query_text, limit, text_weight, *params)
         
         return [
             {
@@ -453,6 +988,34 @@ async def hybrid_search(
         ]
 
 
+@traced("db.get_chunk_embeddings")
+async def get_chunk_embeddings(chunk_ids: List[str]) -> Dict[str, List[float]]:
+    """
+    Get the stored embeddings of chunks.
+    
+    Args:
+        chunk_ids: Chunk UUIDs
+    
+    Returns:
+        Embedding per chunk ID (chunks without an embedding are omitted)
+    """
+    if not chunk_ids:
+        return {}
+    
+    async with db_pool.acquire() as conn:
+        results = await conn.fetch(
+            """
+            SELECT id::text AS chunk_id, embedding::text AS embedding
+            FROM chunks
+            WHERE id = ANY($1::uuid[]) AND embedding IS NOT NULL
+            """,
+            chunk_ids
+        )
+        
+        # pgvector's text format '[1,2,3]' is valid JSON
+        return {row["chunk_id"]: json.loads(row["embedding"]) for row in results}
+
+
 # Chunk Management Functions
 async def get_document_chunks(document_id: str) -> List[Dict[str, Any]]:
     """
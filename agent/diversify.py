@@ -0,0 +1,150 @@
+"""
+Near-duplicate suppression and MMR diversification for retrieved chunks.
+
+Overlapping chunks and re-ingested documents make vector search return
+several near-identical passages. SimHash fingerprints collapse chunks whose
+text is nearly the same, and Maximal Marginal Relevance picks the final set
+from the candidate embeddings so each chunk adds something new.
+"""
+
+import os
+import hashlib
+import logging
+from typing import List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .rerank import tokenize
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Fingerprints within this many differing bits (of 64) are near-duplicates
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "6"))
+SIMHASH_SHINGLE_SIZE = int(os.getenv("SIMHASH_SHINGLE_SIZE", "3"))
+# Relevance vs. novelty trade-off for MMR (1.0 = relevance only)
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+
+_BITS = np.arange(64, dtype=np.uint64)
+
+
+def _shingle_hashes(text: str, size: int) -> np.ndarray:
+    """64-bit hashes of the word shingles in text."""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64
+    )
+
+
+def simhash(text: str, shingle_size: int = SIMHASH_SHINGLE_SIZE) -> int:
+    """
+    64-bit SimHash fingerprint of text.
+    
+    Args:
+        text: Text to fingerprint
+        shingle_size: Words per shingle
+    
+    Returns:
+        Fingerprint as an unsigned 64-bit integer
+    """
+    hashes = _shingle_hashes(text, shingle_size)
+    if hashes.size == 0:
+        return 0
+    
+    # (shingles x 64) bit matrix; each bit votes +1/-1 per shingle
+    bits = (hashes[:, None] >> _BITS) & np.uint64(1)
+    votes = (2 * bits.astype(np.int64) - 1).sum(axis=0)
+    return int(((votes > 0).astype(np.uint64) << _BITS).sum())
+
+
+def near_duplicate_keep_mask(
+    texts: Sequence[str],
+    max_distance: int = SIMHASH_MAX_DISTANCE
+) -> np.ndarray:
+    """
+    Mark which texts to keep when collapsing near-duplicates.
+    
+    Texts are assumed to be in rank order; the first of each group of
+    near-duplicates is kept.
+    
+    Args:
+        texts: Candidate texts, best first
+        max_distance: Maximum Hamming distance between near-duplicate fingerprints
+    
+    Returns:
+        Boolean mask, True for texts to keep
+    """
+    if not texts:
+        return np.zeros(0, dtype=bool)
+    
+    fingerprints = np.array([simhash(t) for t in texts], dtype=np.uint64)
+    distances = np.bitwise_count(fingerprints[:, None] ^ fingerprints[None, :])
+    duplicate = distances <= max_distance
+    
+    keep = np.ones(len(texts), dtype=bool)
+    for i in range(1, len(texts)):
+        # Only kept chunks suppress later ones, so duplicates don't chain
+        if (duplicate[i, :i] & keep[:i]).any():
+            keep[i] = False
+    return keep
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = MMR_LAMBDA,
+    relevance: Optional[np.ndarray] = None
+) -> List[int]:
+    """
+    Select k candidates with Maximal Marginal Relevance.
+    
+    Args:
+        query_embedding: Query embedding
+        embeddings: Candidate embeddings, one row per candidate
+        k: Number of candidates to select
+        lambda_mult: Weight of relevance against similarity to already selected candidates
+        relevance: Relevance per candidate; cosine similarity to the query if omitted
+    
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    n = len(embeddings)
+    if n == 0 or k <= 0:
+        return []
+    
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    
+    if relevance is None:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        relevance = vectors @ (query / max(np.linalg.norm(query), 1e-12))
+    relevance = np.asarray(relevance, dtype=np.float32)
+    
+    similarity = vectors @ vectors.T
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+    
+    for _ in range(min(k, n)):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    
+    return selected
@@ -0,0 +1,641 @@
+"""
+Pluggable knowledge graph backends (Neo4j via Graphiti, or PostgreSQL).
+"""
+
+import os
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from .db_utils import db_pool
+from .pagination import encode_cursor, decode_cursor
+from .graph_utils import (
+    graph_client,
+    Subgraph,
+    GRAPH_MAX_DEPTH,
+    GRAPH_HOP_FAN_OUT,
+    GRAPH_NODE_BUDGET,
+    GRAPH_ANCHOR_LIMIT
+)
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def get_graph_backend_name() -> str:
+    """Get the configured graph backend ("neo4j" or "postgres")."""
+    return os.getenv("GRAPH_BACKEND", "neo4j").lower()
+
+
+class GraphBackend(ABC):
+    """Read interface shared by the graph stores."""
+    
+    name: str = ""
+    
+    @abstractmethod
+    async def search(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Search relationship facts.
+        
+        Args:
+            query: Search query
+            query_embedding: Optional query embedding
+            limit: Maximum number of results
+        
+        Returns:
+            Facts with uuid, fact, valid_at, invalid_at, source_node_uuid and score
+        """
+    
+    @abstractmethod
+    async def get_related_entities(
+        self,
+        entity_name: str,
+        relationship_types: Optional[List[str]] = None,
+        depth: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Get the bounded neighborhood of an entity.
+        
+        Args:
+            entity_name: Name of the entity
+            relationship_types: Relationship names to follow (all when omitted)
+            depth: Maximum traversal depth
+        
+        Returns:
+            Subgraph in the format produced by Subgraph.to_dict
+        """
+    
+    @abstractmethod
+    async def get_entity_timeline(
+        self,
+        entity_name: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        ascending: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get one page of an entity's facts ordered by valid_at.
+        
+        Args:
+            entity_name: Name of the entity
+            start_date: Only facts valid at or after this time
+            end_date: Only facts valid at or before this time
+            limit: Maximum number of facts per page
+            cursor: Cursor returned with the previous page
+            ascending: Oldest first instead of newest first
+        
+        Returns:
+            Dict with entity_name, timeline and next_cursor
+        """
+
+
+class Neo4jGraphBackend(GraphBackend):
+    """Graph backend served by Neo4j through the Graphiti client."""
+    
+    name = "neo4j"
+    
+    async def search(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Search facts with the Neo4j full-text and vector indexes."""
+        if not graph_client._initialized:
+            await graph_client.initialize()
+        
+        results = await graph_client._custom_search(query, query_embedding=query_embedding)
+        return results[:limit]
+    
+    async def get_related_entities(
+        self,
+        entity_name: str,
+        relationship_types: Optional[List[str]] = None,
+        depth: int = 1
+    ) -> Dict[str, Any]:
+        """Traverse the Neo4j graph from the best matching entities."""
+        return await graph_client.get_related_entities(
+            entity_name,
+            relationship_types=relationship_types,
+            depth=depth
+        )
+    
+    async def get_entity_timeline(
+        self,
+        entity_name: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        ascending: bool = False
+    ) -> Dict[str, Any]:
+        """Page through an entity's facts using the valid_at range index."""
+        return await graph_client.get_entity_timeline(
+            entity_name,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor,
+            ascending=ascending
+        )
+
+
+# Full-text queries OR the terms together, matching the Neo4j behaviour.
+# The to_tsvector expressions must match the GIN indexes in schema_v2.sql.
+_TSQUERY = "replace(plainto_tsquery('english', $1)::text, '&', '|')::tsquery"
+_ENTITY_TSVECTOR = "to_tsvector('english', e.name || ' ' || e.summary)"
+_RELATIONSHIP_TSVECTOR = "to_tsvector('english', r.name || ' ' || r.fact)"
+
+
+class PostgresGraphBackend(GraphBackend):
+    """Graph backend served from the schema_v2 entities/relationships tables."""
+    
+    name = "postgres"
+    
+    async def upsert_entities(self, entities: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update entities in one statement.
+        
+        Args:
+            entities: Dicts with uuid, name and optional summary, entity_type,
+                group_id and created_at
+        
+        Returns:
+            Number of entities written
+        """
+        if not entities:
+            return 0
+        
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO entities (uuid, name, summary, entity_type, group_id, created_at)
+                SELECT uuid, name, summary, entity_type, group_id, COALESCE(created_at, CURRENT_TIMESTAMP)
+                FROM unnest($1::uuid[], $2::text[], $3::text[], $4::text[], $5::text[], $6::timestamptz[])
+                    AS e(uuid, name, summary, entity_type, group_id, created_at)
+                ON CONFLICT (uuid) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    summary = EXCLUDED.summary,
+                    entity_type = EXCLUDED.entity_type,
+                    group_id = EXCLUDED.group_id,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                [str(e["uuid"]) for e in entities],
+                [e["name"] or "" for e in entities],
+                [e.get("summary") or "" for e in entities],
+                [e.get("entity_type") or "" for e in entities],
+                [e.get("group_id") or "" for e in entities],
+                [e.get("created_at") for e in entities]
+            )
+        
+        return len(entities)
+    
+    async def upsert_relationships(self, relationships: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update relationships in one statement.
+        
+        Relationships whose endpoints are not stored yet are skipped.
+        
+        Args:
+            relationships: Dicts with uuid, name, fact, source_node_uuid,
+                target_node_uuid and optional group_id, valid_at, invalid_at,
+                expired_at and created_at
+        
+        Returns:
+            Number of relationships written
+        """
+        if not relationships:
+            return 0
+        
+        async with db_pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                INSERT INTO relationships (
+                    uuid, name, fact, source_node_uuid, target_node_uuid,
+                    group_id, valid_at, invalid_at, expired_at, created_at
+                )
+                SELECT
+                    r.uuid, r.name, r.fact, r.source_node_uuid, r.target_node_uuid,
+                    r.group_id, r.valid_at, r.invalid_at, r.expired_at,
+                    COALESCE(r.created_at, CURRENT_TIMESTAMP)
+                FROM unnest(
+                    $1::uuid[], $2::text[], $3::text[], $4::uuid[], $5::uuid[],
+                    $6::text[], $7::timestamptz[], $8::timestamptz[], $9::timestamptz[], $10::timestamptz[]
+                ) AS r(
+                    uuid, name, fact, source_node_uuid, target_node_uuid,
+                    group_id, valid_at, invalid_at, expired_at, created_at
+                )
+                WHERE EXISTS (SELECT 1 FROM entities s WHERE s.uuid = r.source_node_uuid)
+                AND EXISTS (SELECT 1 FROM entities t WHERE t.uuid = r.target_node_uuid)
+                ON CONFLICT (uuid) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    fact = EXCLUDED.fact,
+                    group_id = EXCLUDED.group_id,
+                    valid_at = EXCLUDED.valid_at,
+                    invalid_at = EXCLUDED.invalid_at,
+                    expired_at = EXCLUDED.expired_at,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                [str(r["uuid"]) for r in relationships],
+                [r["name"] or "" for r in relationships],
+                [r.get("fact") or "" for r in relationships],
+                [str(r["source_node_uuid"]) for r in relationships],
+                [str(r["target_node_uuid"]) for r in relationships],
+                [r.get("group_id") or "" for r in relationships],
+                [r.get("valid_at") for r in relationships],
+                [r.get("invalid_at") for r in relationships],
+                [r.get("expired_at") for r in relationships],
+                [r.get("created_at") for r in relationships]
+            )
+        
+        # Status string is "INSERT 0 <rows>"
+        return int(result.split()[-1])
+    
+    async def search(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Search facts with the full-text GIN indexes.
+        
+        Facts match either directly or through a matching endpoint entity.
+        query_embedding is accepted for interface compatibility; relationship
+        embeddings are not stored in PostgreSQL.
+        """
+        if not query.strip():
+            return []
+        
+        async with db_pool.acquire() as conn:
+            results = await conn.fetch(
+                f"""
+                WITH q AS (SELECT {_TSQUERY} AS query),
+                matched_entities AS (
+                    SELECT e.uuid, ts_rank({_ENTITY_TSVECTOR}, q.query) AS score
+                    FROM entities e, q
+                    WHERE {_ENTITY_TSVECTOR} @@ q.query
+                    ORDER BY score DESC
+                    LIMIT $2
+                ),
+                candidates AS (
+                    SELECT r.uuid, ts_rank({_RELATIONSHIP_TSVECTOR}, q.query) AS score
+                    FROM relationships r, q
+                    WHERE {_RELATIONSHIP_TSVECTOR} @@ q.query
+                    UNION ALL
+                    SELECT r.uuid, m.score
+                    FROM matched_entities m
+                    JOIN relationships r ON r.source_node_uuid = m.uuid
+                    UNION ALL
+                    SELECT r.uuid, m.score
+                    FROM matched_entities m
+                    JOIN relationships r ON r.target_node_uuid = m.uuid
+                )
+                SELECT
+                    r.uuid::text AS uuid,
+                    r.fact,
+                    r.valid_at,
+                    r.invalid_at,
+                    r.source_node_uuid::text AS source_node_uuid,
+                    max(c.score) AS score
+                FROM candidates c
+                JOIN relationships r ON r.uuid = c.uuid
+                GROUP BY r.uuid
+                ORDER BY score DESC, r.created_at DESC
+                LIMIT $2
+                """,
+                query,
+                limit
+            )
+        
+        return [
+            {
+                "uuid": row["uuid"],
+                "fact": row["fact"] or "",
+                "valid_at": row["valid_at"].isoformat() if row["valid_at"] else None,
+                "invalid_at": row["invalid_at"].isoformat() if row["invalid_at"] else None,
+                "source_node_uuid": row["source_node_uuid"],
+                "score": float(row["score"])
+            }
+            for row in results
+        ]
+    
+    async def get_related_entities(
+        self,
+        entity_name: str,
+        relationship_types: Optional[List[str]] = None,
+        depth: int = 1,
+        max_fan_out: int = GRAPH_HOP_FAN_OUT,
+        node_budget: int = GRAPH_NODE_BUDGET
+    ) -> Dict[str, Any]:
+        """
+        Traverse the graph with a recursive CTE.
+        
+        Anchors come from the entity full-text index. Each step follows at
+        most max_fan_out edges per node, and the closest node_budget nodes
+        are kept.
+        """
+        depth = max(1, min(depth, GRAPH_MAX_DEPTH))
+        subgraph = Subgraph(node_budget)
+        
+        if not entity_name.strip():
+            return subgraph.to_dict(entity_name, depth, relationship_types)
+        
+        async with db_pool.acquire() as conn:
+            nodes = await conn.fetch(
+                f"""
+                WITH RECURSIVE anchors AS (
+                    SELECT e.uuid
+                    FROM entities e
+                    WHERE {_ENTITY_TSVECTOR} @@ {_TSQUERY}
+                    ORDER BY ts_rank({_ENTITY_TSVECTOR}, {_TSQUERY}) DESC
+                    LIMIT $2
+                ),
+                walk (node_uuid, depth, path) AS (
+                    SELECT uuid, 0, ARRAY[uuid] FROM anchors
+                    UNION ALL
+                    SELECT n.next_uuid, w.depth + 1, w.path || n.next_uuid
+                    FROM walk w
+                    CROSS JOIN LATERAL (
+                        SELECT CASE
+                            WHEN r.source_node_uuid = w.node_uuid THEN r.target_node_uuid
+                            ELSE r.source_node_uuid
+                        END AS next_uuid
+                        FROM relationships r
+                        WHERE (r.source_node_uuid = w.node_uuid OR r.target_node_uuid = w.node_uuid)
+                        AND ($4::text[] IS NULL OR r.name = ANY($4::text[]))
+                        ORDER BY r.created_at DESC
+                        LIMIT $5
+                    ) n
+                    WHERE w.depth < $3
+                    AND NOT n.next_uuid = ANY(w.path)
+                ),
+                reached AS (
+                    SELECT node_uuid, min(depth) AS depth
+                    FROM walk
+                    GROUP BY node_uuid
+                    ORDER BY min(depth), node_uuid
+                    LIMIT $6
+                )
+                SELECT e.uuid::text AS uuid, e.name, reached.depth
+                FROM reached
+                JOIN entities e ON e.uuid = reached.node_uuid
+                ORDER BY reached.depth, e.name
+                """,
+                entity_name,
+                GRAPH_ANCHOR_LIMIT,
+                depth,
+                relationship_types or None,
+                max_fan_out,
+                node_budget
+            )
+            
+            for row in nodes:
+                subgraph.add_node(row["uuid"], row["name"], row["depth"])
+            
+            if nodes:
+                node_uuids = [row["uuid"] for row in nodes]
+                edges = await conn.fetch(
+                    """
+                    SELECT
+                        r.uuid::text AS uuid,
+                        r.name,
+                        r.fact,
+                        r.valid_at,
+                        r.source_node_uuid::text AS source_uuid,
+                        r.target_node_uuid::text AS target_uuid
+                    FROM relationships r
+                    WHERE r.source_node_uuid = ANY($1::uuid[])
+                    AND r.target_node_uuid = ANY($1::uuid[])
+                    AND ($2::text[] IS NULL OR r.name = ANY($2::text[]))
+                    ORDER BY r.created_at DESC
+                    """,
+                    node_uuids,
+                    relationship_types or None
+                )
+                for row in edges:
+                    subgraph.add_edge(row)
+        
+        return subgraph.to_dict(entity_name, depth, relationship_types)
+    
+    async def get_entity_timeline(
+        self,
+        entity_name: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        ascending: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Page through an entity's facts ordered by (valid_at, uuid).
+        
+        Filters, ordering and the keyset cursor are evaluated by PostgreSQL
+        using idx_relationships_valid_at.
+        """
+        page = {"entity_name": entity_name, "timeline": [], "next_cursor": None}
+        if not entity_name.strip():
+            return page
+        
+        position = decode_cursor(cursor) if cursor else {}
+        compare = ">" if ascending else "<"
+        direction = "ASC" if ascending else "DESC"
+        
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                WITH anchors AS (
+                    SELECT e.uuid
+                    FROM entities e
+                    WHERE {_ENTITY_TSVECTOR} @@ {_TSQUERY}
+                    ORDER BY ts_rank({_ENTITY_TSVECTOR}, {_TSQUERY}) DESC
+                    LIMIT $2
+                )
+                SELECT r.uuid::text AS uuid, r.fact, r.valid_at, r.invalid_at
+                FROM relationships r
+                WHERE (r.source_node_uuid IN (SELECT uuid FROM anchors)
+                       OR r.target_node_uuid IN (SELECT uuid FROM anchors))
+                AND r.valid_at IS NOT NULL
+                AND ($3::timestamptz IS NULL OR r.valid_at >= $3::timestamptz)
+                AND ($4::timestamptz IS NULL OR r.valid_at <= $4::timestamptz)
+                AND ($5::timestamptz IS NULL OR (r.valid_at, r.uuid) {compare} ($5::timestamptz, $6::uuid))
+                ORDER BY r.valid_at {direction}, r.uuid {direction}
+                LIMIT $7
+                """,
+                entity_name,
+                GRAPH_ANCHOR_LIMIT,
+                start_date,
+                end_date,
+                datetime.fromisoformat(position["valid_at"]) if position else None,
+                position.get("uuid"),
+                # One extra row tells us whether another page exists
+                limit + 1
+            )
+        
+        for row in rows[:limit]:
+            page["timeline"].append({
+                "fact": row["fact"] or "",
+                "uuid": row["uuid"],
+                "valid_at": row["valid_at"].isoformat(),
+                "invalid_at": row["invalid_at"].isoformat() if row["invalid_at"] else None
+            })
+        
+        if len(rows) > limit:
+            last = page["timeline"][-1]
+            page["next_cursor"] = encode_cursor({"valid_at": last["valid_at"], "uuid": last["uuid"]})
+        
+        return page
+    
+    async def sync_from_neo4j(
+        self,
+        since: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """
+        Copy entities and relationships from Neo4j into PostgreSQL.
+        
+        Args:
+            since: Only copy nodes created, and edges created, expired or
+                invalidated, at or after this time
+            batch_size: Rows per read and bulk upsert
+        
+        Returns:
+            Number of entities and relationships written
+        """
+        if not graph_client._initialized:
+            await graph_client.initialize()
+        
+        since_param = since.isoformat() if since else None
+        counts = {"entities": 0, "relationships": 0}
+        
+        entity_fields = """
+            RETURN n.uuid AS uuid, n.name AS name, n.summary AS summary,
+                   n.group_id AS group_id, n.created_at AS created_at,
+                   [label IN labels(n) WHERE label <> 'Entity'][0] AS entity_type
+        """
+        
+        queries = {
+            "entities": (
+                f"""
+                MATCH (n:Entity)
+                WHERE n.uuid > $after
+                AND ($since IS NULL OR n.created_at >= datetime($since))
+                {entity_fields}
+                ORDER BY n.uuid
+                LIMIT $limit
+                """,
+                self.upsert_entities
+            ),
+            "relationships": (
+                # Edges retired since the last sync are copied again so their
+                # expired_at/invalid_at reach PostgreSQL
+                """
+                MATCH (a:Entity)-[r:RELATES_TO]->(b:Entity)
+                WHERE r.uuid > $after
+                AND ($since IS NULL
+                     OR r.created_at >= datetime($since)
+                     OR r.expired_at >= datetime($since)
+                     OR r.invalid_at >= datetime($since))
+                RETURN r.uuid AS uuid, r.name AS name, r.fact AS fact,
+                       a.uuid AS source_node_uuid, b.uuid AS target_node_uuid,
+                       r.group_id AS group_id, r.valid_at AS valid_at,
+                       r.invalid_at AS invalid_at, r.expired_at AS expired_at,
+                       r.created_at AS created_at
+                ORDER BY r.uuid
+                LIMIT $limit
+                """,
+                self.upsert_relationships
+            )
+        }
+        
+        # Entities first so relationship foreign keys resolve
+        for kind, (cypher_query, upsert) in queries.items():
+            after = ""
+            while True:
+                records = await graph_client._read(
+                    cypher_query,
+                    {"after": after, "since": since_param, "limit": batch_size},
+                    use_cache=False
+                )
+                if not records:
+                    break
+                
+                rows = [neo4j_record_to_dict(record) for record in records]
+                if kind == "relationships":
+                    # Endpoints created before `since` weren't part of the entity pass
+                    counts["entities"] += await self._sync_endpoints(rows, entity_fields)
+                counts[kind] += await upsert(rows)
+                after = rows[-1]["uuid"]
+                
+                if len(records) < batch_size:
+                    break
+        
+        logger.info(
+            f"Synced {counts['entities']} entities and {counts['relationships']} relationships to PostgreSQL"
+        )
+        return counts
+    
+    async def _sync_endpoints(self, relationships: List[Dict[str, Any]], entity_fields: str) -> int:
+        """
+        Upsert the entities a batch of relationships points at.
+        
+        Args:
+            relationships: Relationship rows read from Neo4j
+            entity_fields: Cypher RETURN clause for entity rows
+        
+        Returns:
+            Number of entities written
+        """
+        uuids = sorted({
+            str(uuid)
+            for row in relationships
+            for uuid in (row["source_node_uuid"], row["target_node_uuid"])
+        })
+        records = await graph_client._read(
+            f"""
+            MATCH (n:Entity)
+            WHERE n.uuid IN $uuids
+            {entity_fields}
+            """,
+            {"uuids": uuids},
+            use_cache=False
+        )
+        return await self.upsert_entities([neo4j_record_to_dict(record) for record in records])
+
+
+def neo4j_record_to_dict(record: Any) -> Dict[str, Any]:
+    """Convert a Neo4j record to plain Python values (neo4j DateTime -> datetime)."""
+    row = dict(record)
+    for key, value in row.items():
+        if hasattr(value, "to_native"):
+            row[key] = value.to_native()
+    return row
+
+
+# Backend instances
+neo4j_graph_backend = Neo4jGraphBackend()
+postgres_graph_backend = PostgresGraphBackend()
+
+
+def get_graph_backend() -> GraphBackend:
+    """
+    Get the graph backend selected by GRAPH_BACKEND.
+    
+    Returns:
+        PostgreSQL backend when GRAPH_BACKEND=postgres, otherwise Neo4j
+    """
+    if get_graph_backend_name() == "postgres":
+        return postgres_graph_backend
+    return neo4j_graph_backend
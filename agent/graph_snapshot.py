@@ -0,0 +1,597 @@
+"""
+In-process compact snapshot of the knowledge graph for hot-path traversal.
+
+Requests read the current snapshot and never wait on a refresh, except
+for the first load. Stale snapshots are refreshed by a background task
+that builds a new snapshot in a worker thread and swaps it in. Deleted
+edges are dropped by a periodic full rebuild, or right away when the
+graph is cleared.
+"""
+
+import os
+import sys
+import copy
+import asyncio
+import logging
+import time
+from array import array
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .db_utils import db_pool
+from .graph_utils import (
+    graph_client,
+    Subgraph,
+    GRAPH_MAX_DEPTH,
+    GRAPH_HOP_FAN_OUT,
+    GRAPH_NODE_BUDGET
+)
+from .graph_backend import get_graph_backend_name, neo4j_record_to_dict
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Snapshot configuration
+GRAPH_SNAPSHOT_ENABLED = os.getenv("GRAPH_SNAPSHOT", "false").lower() == "true"
+GRAPH_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_REFRESH_SECONDS", "60"))
+# Incremental refreshes can't see deletions; rebuild from scratch this often
+GRAPH_SNAPSHOT_FULL_REBUILD_SECONDS = float(os.getenv("GRAPH_SNAPSHOT_FULL_REBUILD_SECONDS", "3600"))
+
+
+class GraphSnapshot:
+    """
+    Immutable-layout graph snapshot.
+    
+    Nodes are int32 ids with an interned name dictionary. Adjacency is stored
+    in CSR form (indptr/indices) over both edge directions, with a parallel
+    array mapping each adjacency slot back to its edge. Edge facts live in a
+    single UTF-8 string pool addressed by offsets.
+    """
+    
+    def __init__(self):
+        """Initialize an empty snapshot."""
+        # Node interning
+        self._node_ids: Dict[str, int] = {}
+        self._node_uuids: List[str] = []
+        self._node_names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+        
+        # Relationship type interning
+        self._type_ids: Dict[str, int] = {}
+        self._type_names: List[str] = []
+        
+        # Edge columns (growable, converted to numpy without copying)
+        self._edge_ids: Dict[str, int] = {}
+        self._edge_uuids: List[str] = []
+        self._src = array("i")
+        self._dst = array("i")
+        self._type = array("i")
+        self._fact_start = array("q")
+        self._fact_length = array("i")
+        self._fact_pool = bytearray()
+        
+        # CSR adjacency
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.slot_edges = np.zeros(0, dtype=np.int32)
+        self.edge_types = np.zeros(0, dtype=np.int32)
+        
+        self.last_updated: Optional[datetime] = None
+        self.last_refresh: float = 0.0
+        self.last_full_refresh: float = 0.0
+    
+    def copy(self) -> "GraphSnapshot":
+        """
+        Copy the snapshot so it can be updated while the original is read.
+        
+        The CSR arrays are shared; add_edges replaces them rather than
+        writing into them.
+        """
+        clone = copy.copy(self)
+        for name in ("_node_ids", "_name_index", "_type_ids", "_edge_ids"):
+            setattr(clone, name, dict(getattr(self, name)))
+        for name in ("_node_uuids", "_node_names", "_type_names", "_edge_uuids"):
+            setattr(clone, name, list(getattr(self, name)))
+        for name in ("_src", "_dst", "_type", "_fact_start", "_fact_length"):
+            setattr(clone, name, array(getattr(self, name).typecode, getattr(self, name)))
+        clone._fact_pool = bytearray(self._fact_pool)
+        return clone
+    
+    @property
+    def node_count(self) -> int:
+        """Number of nodes."""
+        return len(self._node_names)
+    
+    @property
+    def edge_count(self) -> int:
+        """Number of edges."""
+        return len(self._src)
+    
+    def _intern_node(self, uuid: str, name: str) -> int:
+        """Return the id for a node, adding it if needed."""
+        node_id = self._node_ids.get(uuid)
+        if node_id is None:
+            node_id = len(self._node_names)
+            self._node_ids[uuid] = node_id
+            self._node_uuids.append(uuid)
+            self._node_names.append(sys.intern(name or ""))
+            self._name_index.setdefault((name or "").casefold(), node_id)
+        return node_id
+    
+    def _intern_type(self, name: str) -> int:
+        """Return the id for a relationship type, adding it if needed."""
+        type_id = self._type_ids.get(name)
+        if type_id is None:
+            type_id = len(self._type_names)
+            self._type_ids[name] = type_id
+            self._type_names.append(name)
+        return type_id
+    
+    def add_edges(self, edges: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or update edges and rebuild the adjacency arrays.
+        
+        Args:
+            edges: Dicts with uuid, name, fact, source_uuid, source_name,
+                target_uuid, target_name and optional updated_at
+        
+        Returns:
+            Number of edges added or updated
+        """
+        changed = 0
+        for edge in edges:
+            src = self._intern_node(str(edge["source_uuid"]), edge["source_name"])
+            dst = self._intern_node(str(edge["target_uuid"]), edge["target_name"])
+            fact = (edge.get("fact") or "").encode("utf-8")
+            
+            edge_id = self._edge_ids.get(str(edge["uuid"]))
+            if edge_id is None:
+                self._edge_ids[str(edge["uuid"])] = len(self._src)
+                self._edge_uuids.append(str(edge["uuid"]))
+                self._src.append(src)
+                self._dst.append(dst)
+                self._type.append(self._intern_type(edge.get("name") or ""))
+                self._fact_start.append(len(self._fact_pool))
+                self._fact_length.append(len(fact))
+            else:
+                # Updated facts are appended; the old bytes stay until a full rebuild
+                self._src[edge_id] = src
+                self._dst[edge_id] = dst
+                self._type[edge_id] = self._intern_type(edge.get("name") or "")
+                self._fact_start[edge_id] = len(self._fact_pool)
+                self._fact_length[edge_id] = len(fact)
+            self._fact_pool.extend(fact)
+            
+            updated_at = edge.get("updated_at")
+            if updated_at and (self.last_updated is None or updated_at > self.last_updated):
+                self.last_updated = updated_at
+            changed += 1
+        
+        if changed:
+            self._build_csr()
+        return changed
+    
+    def _build_csr(self):
+        """Rebuild the CSR arrays from the edge columns."""
+        src = np.frombuffer(self._src, dtype=np.int32)
+        dst = np.frombuffer(self._dst, dtype=np.int32)
+        edge_ids = np.arange(len(src), dtype=np.int32)
+        
+        # Both directions, so neighborhoods ignore edge orientation
+        heads = np.concatenate([src, dst])
+        order = np.argsort(heads, kind="stable")
+        self.indices = np.concatenate([dst, src])[order]
+        self.slot_edges = np.concatenate([edge_ids, edge_ids])[order]
+        
+        # Copy so the growable columns are not pinned by exported buffers
+        self.edge_types = np.array(self._type, dtype=np.int32)
+        
+        counts = np.bincount(heads, minlength=self.node_count)
+        self.indptr = np.zeros(self.node_count + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+    
+    def fact(self, edge_id: int) -> str:
+        """Decode the fact text of an edge."""
+        start = self._fact_start[edge_id]
+        return self._fact_pool[start:start + self._fact_length[edge_id]].decode("utf-8")
+    
+    def node_id(self, name: str) -> Optional[int]:
+        """Look up a node id by (case-insensitive) name."""
+        return self._name_index.get(name.casefold())
+    
+    def _neighbors(self, node: int, allowed_types: Optional[np.ndarray]):
+        """Return (neighbor ids, edge ids) for a node, optionally type-filtered."""
+        start, end = self.indptr[node], self.indptr[node + 1]
+        neighbors = self.indices[start:end]
+        edges = self.slot_edges[start:end]
+        if allowed_types is not None:
+            mask = np.isin(self.edge_types[edges], allowed_types)
+            neighbors, edges = neighbors[mask], edges[mask]
+        return neighbors, edges
+    
+    def _allowed_types(self, relationship_types: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Map relationship names to type ids (None means all types)."""
+        if not relationship_types:
+            return None
+        return np.array(
+            [self._type_ids[t] for t in relationship_types if t in self._type_ids],
+            dtype=np.int32
+        )
+    
+    def neighborhood(
+        self,
+        entity_name: str,
+        relationship_types: Optional[List[str]] = None,
+        depth: int = 1,
+        max_fan_out: int = GRAPH_HOP_FAN_OUT,
+        node_budget: int = GRAPH_NODE_BUDGET
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the k-hop neighborhood of an entity.
+        
+        Args:
+            entity_name: Name of the entity
+            relationship_types: Relationship names to follow (all when omitted)
+            depth: Maximum depth to traverse
+            max_fan_out: Maximum edges followed per node per hop
+            node_budget: Maximum number of entities in the subgraph
+        
+        Returns:
+            Subgraph in the same format as GraphitiClient.get_related_entities,
+            or None if the entity is not in the snapshot
+        """
+        root = self.node_id(entity_name)
+        if root is None:
+            return None
+        
+        depth = max(1, min(depth, GRAPH_MAX_DEPTH))
+        allowed_types = self._allowed_types(relationship_types)
+        subgraph = Subgraph(node_budget)
+        subgraph.add_node(self._node_uuids[root], self._node_names[root], 0)
+        frontier = [root]
+        
+        for hop in range(1, depth + 1):
+            if not frontier or subgraph.full:
+                break
+            
+            next_frontier = []
+            for node in frontier:
+                neighbors, edges = self._neighbors(node, allowed_types)
+                # Most recently added edges first, like the database traversals
+                for neighbor, edge_id in zip(neighbors[::-1][:max_fan_out].tolist(), edges[::-1][:max_fan_out].tolist()):
+                    if subgraph.add_node(self._node_uuids[neighbor], self._node_names[neighbor], hop):
+                        next_frontier.append(neighbor)
+                    subgraph.add_edge({
+                        "uuid": self._edge_uuids[edge_id],
+                        "name": self._type_names[self._type[edge_id]],
+                        "fact": self.fact(edge_id),
+                        "valid_at": None,
+                        "source_uuid": self._node_uuids[self._src[edge_id]],
+                        "target_uuid": self._node_uuids[self._dst[edge_id]]
+                    })
+            frontier = next_frontier
+        
+        result = subgraph.to_dict(entity_name, depth, relationship_types)
+        result["search_method"] = "graph_snapshot"
+        return result
+    
+    def _expand(self, frontier: np.ndarray, allowed_types: Optional[np.ndarray]):
+        """Gather (parent, neighbor, edge) arrays for a whole frontier at once."""
+        starts = self.indptr[frontier]
+        lengths = self.indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        # Slot positions of every neighbor of every frontier node
+        slots = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        parents = np.repeat(frontier, lengths)
+        neighbors = self.indices[slots]
+        edges = self.slot_edges[slots]
+        if allowed_types is not None:
+            mask = np.isin(self.edge_types[edges], allowed_types)
+            parents, neighbors, edges = parents[mask], neighbors[mask], edges[mask]
+        return parents, neighbors, edges
+    
+    def shortest_path(
+        self,
+        source_name: str,
+        target_name: str,
+        max_depth: int = 6,
+        relationship_types: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the shortest path between two entities.
+        
+        Runs a bidirectional breadth-first search, expanding the smaller
+        frontier one level at a time with vectorized CSR gathers.
+        
+        Args:
+            source_name: Start entity name
+            target_name: End entity name
+            max_depth: Maximum path length in edges
+            relationship_types: Relationship names to follow (all when omitted)
+        
+        Returns:
+            Path steps (from, to, type, fact), [] if both names are the same
+            entity, or None if no path exists
+        """
+        source = self.node_id(source_name)
+        target = self.node_id(target_name)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return []
+        
+        allowed_types = self._allowed_types(relationship_types)
+        # Per side: parent node and edge for every visited node (-1 = unvisited)
+        parent = [np.full(self.node_count, -1, dtype=np.int32) for _ in range(2)]
+        via = [np.full(self.node_count, -1, dtype=np.int32) for _ in range(2)]
+        dist = [np.full(self.node_count, -1, dtype=np.int32) for _ in range(2)]
+        parent[0][source], dist[0][source] = source, 0
+        parent[1][target], dist[1][target] = target, 0
+        frontiers = [np.array([source], dtype=np.int32), np.array([target], dtype=np.int32)]
+        levels = [0, 0]
+        
+        for _ in range(max_depth):
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            parents, neighbors, edges = self._expand(frontiers[side], allowed_types)
+            levels[side] += 1
+            
+            fresh = parent[side][neighbors] == -1
+            neighbors, first = np.unique(neighbors[fresh], return_index=True)
+            parent[side][neighbors] = parents[fresh][first]
+            via[side][neighbors] = edges[fresh][first]
+            dist[side][neighbors] = levels[side]
+            
+            meeting = neighbors[dist[1 - side][neighbors] != -1]
+            if len(meeting):
+                # Nodes reached earlier by the other side give shorter paths
+                best = int(meeting[np.argmin(dist[1 - side][meeting])])
+                return self._join_paths(parent, via, best, source, target)
+            
+            frontiers[side] = neighbors
+            if not len(neighbors):
+                return None
+        
+        return None
+    
+    def _join_paths(self, parent, via, meeting: int, source: int, target: int) -> List[Dict[str, Any]]:
+        """Build the path source -> meeting -> target from both parent arrays."""
+        nodes = [meeting]
+        edges = []
+        while nodes[0] != source:
+            edges.insert(0, int(via[0][nodes[0]]))
+            nodes.insert(0, int(parent[0][nodes[0]]))
+        while nodes[-1] != target:
+            edges.append(int(via[1][nodes[-1]]))
+            nodes.append(int(parent[1][nodes[-1]]))
+        
+        return [
+            {
+                "from": self._node_names[nodes[i]],
+                "to": self._node_names[nodes[i + 1]],
+                "type": self._type_names[self._type[edge_id]],
+                "fact": self.fact(edge_id)
+            }
+            for i, edge_id in enumerate(edges)
+        ]
+    
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the snapshot."""
+        arrays = (
+            self.indptr.nbytes + self.indices.nbytes + self.slot_edges.nbytes + self.edge_types.nbytes
+            + self._src.itemsize * len(self._src) * 3
+            + self._fact_start.itemsize * len(self._fact_start)
+            + self._fact_length.itemsize * len(self._fact_length)
+            + len(self._fact_pool)
+        )
+        dictionaries = (
+            sys.getsizeof(self._node_ids) + sys.getsizeof(self._name_index)
+            + sys.getsizeof(self._edge_ids)
+            + sum(sys.getsizeof(name) for name in self._node_names)
+            + sum(sys.getsizeof(uuid) for uuid in self._edge_uuids)
+            + sum(sys.getsizeof(uuid) for uuid in self._node_uuids)
+            + sys.getsizeof(self._node_uuids) + sys.getsizeof(self._edge_uuids)
+        )
+        return arrays + dictionaries
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return size statistics."""
+        memory = self.memory_bytes()
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "relationship_types": len(self._type_names),
+            "memory_bytes": memory,
+            "bytes_per_million_edges": int(memory * 1_000_000 / self.edge_count) if self.edge_count else 0,
+            "fact_pool_bytes": len(self._fact_pool),
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None
+        }
+
+
+async def fetch_edges_from_neo4j(since: Optional[datetime] = None, batch_size: int = 5000) -> List[Dict[str, Any]]:
+    """
+    Read relationships from Neo4j.
+    
+    Args:
+        since: Only edges created or expired after this time
+        batch_size: Rows per query page
+    
+    Returns:
+        Edge dicts for GraphSnapshot.add_edges
+    """
+    if not graph_client._initialized:
+        await graph_client.initialize()
+    
+    edges = []
+    after = ""
+    while True:
+        records = await graph_client._read(
+            """
+            MATCH (a:Entity)-[r:RELATES_TO]->(b:Entity)
+            WHERE r.uuid > $after
+            AND ($since IS NULL OR r.created_at > datetime($since) OR r.expired_at > datetime($since))
+            RETURN r.uuid AS uuid, r.name AS name, r.fact AS fact,
+                   a.uuid AS source_uuid, a.name AS source_name,
+                   b.uuid AS target_uuid, b.name AS target_name,
+                   coalesce(r.expired_at, r.created_at) AS updated_at
+            ORDER BY r.uuid
+            LIMIT $limit
+            """,
+            {"after": after, "since": since.isoformat() if since else None, "limit": batch_size},
+            use_cache=False
+        )
+        edges.extend(neo4j_record_to_dict(record) for record in records)
+        if len(records) < batch_size:
+            return edges
+        after = edges[-1]["uuid"]
+
+
+async def fetch_edges_from_postgres(since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Read relationships from the schema_v2 tables.
+    
+    Args:
+        since: Only edges updated after this time
+    
+    Returns:
+        Edge dicts for GraphSnapshot.add_edges
+    """
+    async with db_pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT
+                r.uuid::text AS uuid, r.name, r.fact,
+                s.uuid::text AS source_uuid, s.name AS source_name,
+                t.uuid::text AS target_uuid, t.name AS target_name,
+                r.updated_at
+            FROM relationships r
+            JOIN entities s ON s.uuid = r.source_node_uuid
+            JOIN entities t ON t.uuid = r.target_node_uuid
+            WHERE $1::timestamptz IS NULL OR r.updated_at > $1::timestamptz
+            ORDER BY r.updated_at
+            """,
+            since
+        )
+    return [dict(row) for row in rows]
+
+
+# Global snapshot instance
+graph_snapshot = GraphSnapshot()
+_refresh_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+# Bumped by reset_graph_snapshot so refreshes started before a reset are discarded
+_generation = 0
+
+
+def _apply_edges(base: Optional[GraphSnapshot], edges: List[Dict[str, Any]]):
+    """Build the next snapshot from a base (None for a full rebuild) and changed edges."""
+    snapshot = GraphSnapshot() if base is None else base.copy()
+    return snapshot, snapshot.add_edges(edges)
+
+
+async def refresh_graph_snapshot(full: bool = False) -> Dict[str, Any]:
+    """
+    Load changes since the last refresh into the global snapshot.
+    
+    The new snapshot is built off the event loop and swapped in when ready;
+    readers keep using the previous one meanwhile.
+    
+    Args:
+        full: Rebuild from scratch (drops deleted edges and stale fact bytes);
+            also done on the first load and every GRAPH_SNAPSHOT_FULL_REBUILD_SECONDS
+    
+    Returns:
+        Snapshot statistics
+    """
+    global graph_snapshot
+    
+    async with _refresh_lock:
+        generation = _generation
+        current = graph_snapshot
+        now = time.monotonic()
+        full = (
+            full
+            or current.last_full_refresh == 0.0
+            or now - current.last_full_refresh > GRAPH_SNAPSHOT_FULL_REBUILD_SECONDS
+        )
+        since = None if full else current.last_updated
+        
+        if get_graph_backend_name() == "postgres":
+            edges = await fetch_edges_from_postgres(since)
+        else:
+            edges = await fetch_edges_from_neo4j(since)
+        
+        if not full and not edges:
+            current.last_refresh = time.monotonic()
+            return current.stats()
+        
+        snapshot, changed = await asyncio.to_thread(_apply_edges, None if full else current, edges)
+        snapshot.last_refresh = time.monotonic()
+        if full:
+            snapshot.last_full_refresh = snapshot.last_refresh
+        
+        stats = snapshot.stats()
+        if generation != _generation:
+            logger.info("Graph snapshot was reset during refresh, discarding it")
+            return stats
+        graph_snapshot = snapshot
+        
+        logger.info(
+            f"Graph snapshot refreshed ({'full' if full else 'incremental'}): {changed} edges changed, "
+            f"{stats['edges']} edges, {stats['bytes_per_million_edges'] / 1_000_000:.1f} MB per million edges"
+        )
+        return stats
+
+
+def reset_graph_snapshot() -> None:
+    """
+    Drop the global snapshot after the graph was cleared.
+    
+    The next get_graph_snapshot call rebuilds it from scratch.
+    """
+    global graph_snapshot, _generation
+    
+    _generation += 1
+    graph_snapshot = GraphSnapshot()
+    logger.info("Graph snapshot reset")
+
+
+async def _background_refresh() -> None:
+    """Refresh the snapshot, logging failures."""
+    try:
+        await refresh_graph_snapshot()
+    except Exception as e:
+        logger.warning(f"Graph snapshot refresh failed: {e}")
+
+
+async def get_graph_snapshot() -> Optional[GraphSnapshot]:
+    """
+    Get the global snapshot.
+    
+    The first load is awaited; after that a snapshot older than the refresh
+    interval is returned as is while a background task refreshes it.
+    
+    Returns:
+        The snapshot, or None when GRAPH_SNAPSHOT is disabled or not loaded
+    """
+    global _refresh_task
+    
+    if not GRAPH_SNAPSHOT_ENABLED:
+        return None
+    
+    if graph_snapshot.last_refresh == 0.0:
+        try:
+            await refresh_graph_snapshot(full=True)
+        except Exception as e:
+            logger.warning(f"Graph snapshot load failed: {e}")
+        return graph_snapshot if graph_snapshot.last_refresh else None
+    
+    stale = time.monotonic() - graph_snapshot.last_refresh > GRAPH_SNAPSHOT_REFRESH_SECONDS
+    if stale and (_refresh_task is None or _refresh_task.done()):
+        _refresh_task = asyncio.create_task(_background_refresh())
+    
+    return graph_snapshot
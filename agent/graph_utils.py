@@ -8,9 +8,14 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
+from collections import OrderedDict
 import asyncio
+import time
 
+from neo4j import AsyncGraphDatabase
 from graphiti_core import Graphiti
+from graphiti_core.driver.driver import GraphDriver
+from graphiti_core.driver.neo4j_driver import Neo4jDriver
 from graphiti_core.utils.maintenance.graph_data_operations import clear_data
 from graphiti_core.llm_client.config import LLMConfig
 from graphiti_core.llm_client.openai_client import OpenAIClient
@@ -19,6 +24,8 @@ from graphiti_core.embedder.client import EmbedderClient
 from graphiti_core.cross_encoder.openai_reranker_client import OpenAIRerankerClient
 from dotenv import load_dotenv
 from .schemas import ProviderType, convert_to_provider_format, convert_from_provider_format
+from .pagination import encode_cursor, decode_cursor
+from .telemetry import span
 
 # Load environment variables
 load_dotenv()
@@ -103,7 +110,232 @@ def get_embedding_provider() -> str:
     return os.getenv('EMBEDDING_PROVIDER', 'openai')
 
 
+# Full-text index names used by the search queries below
+ENTITY_NAME_INDEX = "entity_name_fulltext"
+FACT_INDEX = "relates_to_fact_fulltext"
+
+# Vector index over RELATES_TO.fact_embedding
+FACT_EMBEDDING_INDEX = "relates_to_fact_embedding"
+
+# Range indexes for temporal (timeline) queries
+VALID_AT_INDEX = "relates_to_valid_at"
+INVALID_AT_INDEX = "relates_to_invalid_at"
+
+# Weight of the full-text score when combined with fact vector similarity
+GRAPH_TEXT_WEIGHT = float(os.getenv("GRAPH_TEXT_WEIGHT", "0.3"))
+
+# Limits for neighborhood traversal in get_related_entities
+GRAPH_MAX_DEPTH = int(os.getenv("GRAPH_MAX_DEPTH", "3"))
+GRAPH_HOP_FAN_OUT = int(os.getenv("GRAPH_HOP_FAN_OUT", "25"))
+GRAPH_NODE_BUDGET = int(os.getenv("GRAPH_NODE_BUDGET", "200"))
+GRAPH_ANCHOR_LIMIT = int(os.getenv("GRAPH_ANCHOR_LIMIT", "3"))
+
+# Read query result cache
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", "300"))
+GRAPH_CACHE_MAX_ENTRIES = int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "1024"))
+
+# Characters with special meaning in Lucene query syntax
+_LUCENE_SPECIAL_CHARS = set('+-&|!(){}[]^"~*?:\\/')
+
+
+def build_fulltext_query(query: str) -> str:
+    """
+    Build a Lucene query that matches any term of a free-text query.
+    
+    Args:
+        query: Free-text search query
+    
+    Returns:
+        Escaped Lucene query string (empty if the query has no terms)
+    """
+    terms = []
+    for term in query.split():
+        escaped = "".join(f"\\{ch}" if ch in _LUCENE_SPECIAL_CHARS else ch for ch in term)
+        # Bare boolean operators would be parsed as syntax, not terms
+        if escaped.upper() in ("AND", "OR", "NOT"):
+            escaped = escaped.lower()
+        if escaped:
+            terms.append(escaped)
+    
+    return " OR ".join(terms)
+
+
 # Help from this PR for setting up the custom clients: https://github.com/getzep/graphiti/pull/601/files
+class TunedNeo4jDriver(Neo4jDriver):
+    """Neo4j driver for Graphiti with a configurable connection pool."""
+    
+    def __init__(self, uri: str, user: Optional[str], password: Optional[str]):
+        """
+        Initialize driver using pool settings from the environment.
+        
+        Args:
+            uri: Neo4j connection URI
+            user: Neo4j username
+            password: Neo4j password
+        """
+        GraphDriver.__init__(self)
+        self.max_pool_size = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+        self.client = AsyncGraphDatabase.driver(
+            uri=uri,
+            auth=(user or '', password or ''),
+            max_connection_pool_size=self.max_pool_size,
+            connection_acquisition_timeout=float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30")),
+            max_connection_lifetime=float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600")),
+            liveness_check_timeout=float(os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT", "60")),
+            max_transaction_retry_time=float(os.getenv("NEO4J_MAX_RETRY_TIME", "15"))
+        )
+
+
+class GraphQueryCache:
+    """TTL cache for read query results keyed on (query, parameters)."""
+    
+    def __init__(self, ttl: float = GRAPH_CACHE_TTL, max_entries: int = GRAPH_CACHE_MAX_ENTRIES):
+        """
+        Initialize cache.
+        
+        Args:
+            ttl: Seconds an entry stays valid (0 disables caching)
+            max_entries: Maximum number of cached results
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(query: str, parameters: Optional[Dict[str, Any]]) -> str:
+        """Build a cache key from a query and its parameters."""
+        return query + "\x00" + json.dumps(parameters or {}, sort_keys=True, default=str)
+    
+    def get(self, key: str) -> Optional[List[Any]]:
+        """Return cached records, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: str, records: List[Any]):
+        """Store records for a key."""
+        if self.ttl <= 0:
+            return
+        
+        self._entries[key] = (time.monotonic() + self.ttl, records)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        """Drop all cached results (called after graph writes)."""
+        self._entries.clear()
+        self.invalidations += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "ttl_seconds": self.ttl
+        }
+
+
+async def _collect_records(tx, query: str, parameters: Dict[str, Any]) -> List[Any]:
+    """Run a query in a managed transaction and materialize its records."""
+    result = await tx.run(query, parameters=parameters)
+    return [record async for record in result]
+
+
+class Subgraph:
+    """Accumulates a traversal result as indexed nodes and edges."""
+    
+    def __init__(self, node_budget: int):
+        """
+        Initialize an empty subgraph.
+        
+        Args:
+            node_budget: Maximum number of nodes to keep
+        """
+        self.node_budget = node_budget
+        self.node_index: Dict[str, int] = {}
+        self.nodes: List[Dict[str, Any]] = []
+        self.edges: List[Dict[str, Any]] = []
+        self._edge_uuids = set()
+    
+    @property
+    def full(self) -> bool:
+        """Whether the node budget has been used up."""
+        return len(self.nodes) >= self.node_budget
+    
+    def add_node(self, uuid: str, name: str, depth: int) -> bool:
+        """Add a node if unseen and within budget; return True if it was added."""
+        if uuid in self.node_index or self.full:
+            return False
+        self.node_index[uuid] = len(self.nodes)
+        self.nodes.append({"name": name, "uuid": uuid, "depth": depth})
+        return True
+    
+    def add_edge(self, record: Any):
+        """Add an edge whose endpoints are both in the subgraph."""
+        source = self.node_index.get(record["source_uuid"])
+        target = self.node_index.get(record["target_uuid"])
+        if source is None or target is None or record["uuid"] in self._edge_uuids:
+            return
+        self._edge_uuids.add(record["uuid"])
+        self.edges.append({
+            "source": source,
+            "target": target,
+            "type": record["name"],
+            "fact": record["fact"] or "",
+            "uuid": str(record["uuid"]),
+            "valid_at": str(record["valid_at"]) if record["valid_at"] else None
+        })
+    
+    def to_dict(
+        self,
+        central_entity: str,
+        depth: int,
+        relationship_types: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Render the subgraph; edges refer to nodes by list index."""
+        adjacency: Dict[int, List[int]] = {}
+        for edge in self.edges:
+            adjacency.setdefault(edge["source"], []).append(edge["target"])
+            adjacency.setdefault(edge["target"], []).append(edge["source"])
+        
+        return {
+            "central_entity": central_entity,
+            "depth": depth,
+            "relationship_types": relationship_types,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "adjacency": adjacency,
+            "truncated": self.full,
+            "related_entities": [node["name"] for node in self.nodes if node["depth"] > 0],
+            "related_facts": [
+                {
+                    "fact": edge["fact"],
+                    "uuid": edge["uuid"],
+                    "valid_at": edge["valid_at"],
+                    "source_entity": self.nodes[edge["source"]]["name"],
+                    "target_entity": self.nodes[edge["target"]]["name"]
+                }
+                for edge in self.edges
+            ],
+            "search_method": "bounded_traversal"
+        }
+
+
 class GraphitiClient:
     """Manages Graphiti knowledge graph operations."""
     
@@ -148,6 +380,10 @@ class GraphitiClient:
         
         self.graphiti: Optional[Graphiti] = None
         self._initialized = False
+        self._fact_embedding_dimension: Optional[int] = None
+        self.query_cache = GraphQueryCache()
+        # Read sessions currently holding a pooled connection
+        self.active_reads = 0
     
     async def initialize(self):
         """Initialize Graphiti client."""
@@ -192,11 +428,13 @@ class GraphitiClient:
                 self.neo4j_password,
                 llm_client=llm_client,
                 embedder=embedder,
-                cross_encoder=OpenAIRerankerClient(client=llm_client, config=llm_config)
+                cross_encoder=OpenAIRerankerClient(client=llm_client, config=llm_config),
+                graph_driver=TunedNeo4jDriver(self.neo4j_uri, self.neo4j_user, self.neo4j_password)
             )
             
             # Build indices and constraints
             await self.graphiti.build_indices_and_constraints()
+            await self._build_search_indices()
             
             self._initialized = True
             logger.info(f"Graphiti client initialized successfully with LLM: {self.llm_choice} and embedder: {self.embedding_model} (provider: {self.embedding_provider})")
@@ -205,6 +443,136 @@ class GraphitiClient:
             logger.error(f"Failed to initialize Graphiti: {e}")
             raise
     
+    async def _build_search_indices(self):
+        """Create the full-text and range indexes used by search and timelines."""
+        statements = [
+            f"CREATE FULLTEXT INDEX {ENTITY_NAME_INDEX} IF NOT EXISTS "
+            f"FOR (n:Entity) ON EACH [n.name]",
+            f"CREATE FULLTEXT INDEX {FACT_INDEX} IF NOT EXISTS "
+            f"FOR ()-[r:RELATES_TO]-() ON EACH [r.fact]",
+            f"CREATE INDEX {VALID_AT_INDEX} IF NOT EXISTS "
+            f"FOR ()-[r:RELATES_TO]-() ON (r.valid_at)",
+            f"CREATE INDEX {INVALID_AT_INDEX} IF NOT EXISTS "
+            f"FOR ()-[r:RELATES_TO]-() ON (r.invalid_at)"
+        ]
+        
+        async with self.graphiti.driver.session(database="neo4j") as session:
+            for statement in statements:
+                await session.run(statement)
+            
+            # The vector index needs the embedding dimension; take it from
+            # existing fact embeddings if there are any
+            result = await session.run(
+                """
+                MATCH ()-[r:RELATES_TO]->()
+                WHERE r.fact_embedding IS NOT NULL
+                RETURN size(r.fact_embedding) AS dimension
+                LIMIT 1
+                """
+            )
+            record = await result.single()
+        
+        if record:
+            await self._ensure_fact_vector_index(record["dimension"])
+        
+        logger.info("Full-text search indexes ensured")
+    
+    async def _ensure_fact_vector_index(self, dimension: int):
+        """
+        Create the vector index over fact embeddings if it does not exist.
+        
+        Args:
+            dimension: Embedding dimension
+        """
+        if self._fact_embedding_dimension == dimension:
+            return
+        
+        statement = (
+            f"CREATE VECTOR INDEX {FACT_EMBEDDING_INDEX} IF NOT EXISTS "
+            f"FOR ()-[r:RELATES_TO]-() ON (r.fact_embedding) "
+            f"OPTIONS {{indexConfig: {{"
+            f"`vector.dimensions`: {int(dimension)}, "
+            f"`vector.similarity_function`: 'cosine'}}}}"
+        )
+        
+        async with self.graphiti.driver.session(database="neo4j") as session:
+            await session.run(statement)
+        
+        self._fact_embedding_dimension = dimension
+        logger.info(f"Fact vector index ensured ({dimension} dimensions)")
+    
+    async def backfill_fact_embeddings(
+        self,
+        batch_size: int = 100,
+        max_batches: Optional[int] = None
+    ) -> int:
+        """
+        Embed relationship facts that do not have a fact_embedding yet.
+        
+        Facts are embedded in batches with the Graphiti embedder and written
+        back with a single UNWIND per batch.
+        
+        Args:
+            batch_size: Number of facts per embedding call
+            max_batches: Optional cap on the number of batches
+        
+        Returns:
+            Number of facts embedded
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        total = 0
+        batches = 0
+        
+        while max_batches is None or batches < max_batches:
+            async with self.graphiti.driver.session(database="neo4j") as session:
+                result = await session.run(
+                    """
+                    MATCH ()-[r:RELATES_TO]->()
+                    WHERE r.fact_embedding IS NULL AND r.fact IS NOT NULL AND r.fact <> ''
+                    RETURN r.uuid AS uuid, r.fact AS fact
+                    LIMIT $limit
+                    """,
+                    parameters={"limit": batch_size}
+                )
+                pending = [(record["uuid"], record["fact"]) async for record in result]
+            
+            if not pending:
+                break
+            
+            embeddings = await self.graphiti.embedder.create_batch([fact for _, fact in pending])
+            rows = [
+                {"uuid": uuid, "embedding": list(embedding)}
+                for (uuid, _), embedding in zip(pending, embeddings)
+                if embedding
+            ]
+            if not rows:
+                logger.warning("Fact embedding batch returned no vectors, stopping backfill")
+                break
+            
+            await self._ensure_fact_vector_index(len(rows[0]["embedding"]))
+            
+            async with self.graphiti.driver.session(database="neo4j") as session:
+                await session.run(
+                    """
+                    UNWIND $rows AS row
+                    MATCH ()-[r:RELATES_TO {uuid: row.uuid}]->()
+                    SET r.fact_embedding = row.embedding
+                    """,
+                    parameters={"rows": rows}
+                )
+            
+            self.query_cache.invalidate()
+            total += len(rows)
+            batches += 1
+            logger.info(f"Embedded {total} graph facts so far")
+            
+            if len(pending) < batch_size:
+                break
+        
+        return total
+    
     async def close(self):
         """Close Graphiti connection."""
         if self.graphiti:
@@ -213,6 +581,58 @@ class GraphitiClient:
             self._initialized = False
             logger.info("Graphiti client closed")
     
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Get driver pool usage without touching Neo4j.
+        
+        Returns:
+            Dict with active_reads and max_size
+        """
+        driver = self.graphiti.driver if self.graphiti else None
+        return {
+            "active_reads": self.active_reads,
+            "max_size": getattr(driver, "max_pool_size", 0)
+        }
+    
+    async def _read(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> List[Any]:
+        """
+        Run a read query in a managed read transaction, with result caching.
+        
+        Transient failures are retried by the driver.
+        
+        Args:
+            query: Cypher query
+            parameters: Query parameters
+            use_cache: Whether to serve and store results from the query cache
+        
+        Returns:
+            Result records
+        """
+        parameters = parameters or {}
+        key = GraphQueryCache.make_key(query, parameters) if use_cache else None
+        
+        if key is not None:
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        self.active_reads += 1
+        try:
+            with span("graph.query"):
+                async with self.graphiti.driver.session(database="neo4j") as session:
+                    records = await session.execute_read(_collect_records, query, parameters)
+        finally:
+            self.active_reads -= 1
+        
+        if key is not None:
+            self.query_cache.put(key, records)
+        return records
+    
     async def add_episode(
         self,
         episode_id: str,
@@ -246,6 +666,7 @@ class GraphitiClient:
             source_description=source,
             reference_time=episode_timestamp
         )
+        self.query_cache.invalidate()
         
         logger.info(f"Added episode {episode_id} to knowledge graph")
     
@@ -286,12 +707,17 @@ class GraphitiClient:
             logger.error(f"Graph search failed: {e}")
             return []
     
-    async def _custom_search(self, query: str) -> List[Dict[str, Any]]:
+    async def _custom_search(
+        self,
+        query: str,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Custom search implementation using direct Neo4j queries.
         
         Args:
             query: Search query
+            query_embedding: Optional query embedding for fact similarity search
         
         Returns:
             Search results
@@ -301,12 +727,20 @@ class GraphitiClient:
         
         results = []
         
-        # Use text search only (semantic search requires fact_embedding which doesn't exist)
-        try:
-            text_results = await self._text_search(query)
-            results.extend(text_results)
-        except Exception as e:
-            logger.warning(f"Text search failed: {e}")
+        # Prefer kNN over fact embeddings (combined with full-text) when the
+        # query was embedded with the same model as the stored facts
+        if query_embedding and len(query_embedding) == self._fact_embedding_dimension:
+            try:
+                results = await self._vector_search(query, query_embedding, limit=10)
+            except Exception as e:
+                logger.warning(f"Fact vector search failed, falling back to text search: {e}")
+        
+        if not results:
+            try:
+                text_results = await self._text_search(query)
+                results.extend(text_results)
+            except Exception as e:
+                logger.warning(f"Text search failed: {e}")
         
         # Remove duplicates and limit results
         seen_uuids = set()
@@ -318,17 +752,111 @@ class GraphitiClient:
         
         return unique_results[:10]  # Limit to 10 results
     
-    async def _text_search(self, query: str) -> List[Dict[str, Any]]:
-        """Perform text-based search."""
+    async def _vector_search(
+        self,
+        query: str,
+        query_embedding: List[float],
+        limit: int = 10,
+        text_weight: float = GRAPH_TEXT_WEIGHT
+    ) -> List[Dict[str, Any]]:
+        """
+        Search facts by embedding similarity, blended with the full-text score.
+        
+        Both indexes are queried in one Cypher call. Full-text scores are
+        normalized by the best hit so they can be mixed with cosine scores.
+        
+        Args:
+            query: Search query (used for the full-text part)
+            query_embedding: Query embedding
+            limit: Maximum number of results
+            text_weight: Weight of the full-text score (0-1)
+        
+        Returns:
+            Search results ordered by combined score
+        """
+        fulltext_query = build_fulltext_query(query)
+        if not fulltext_query:
+            text_weight = 0.0
+        
+        cypher_query = """
+        CALL {
+            CALL db.index.vector.queryRelationships($vector_index, $k, $embedding)
+            YIELD relationship, score
+            RETURN relationship AS r, score AS vector_score, 0.0 AS text_score
+            UNION ALL
+            CALL db.index.fulltext.queryRelationships($fact_index, $query, {limit: $k})
+            YIELD relationship, score
+            WHERE $query <> ''
+            RETURN relationship AS r, 0.0 AS vector_score, score AS text_score
+        }
+        WITH r, max(vector_score) AS vector_score, max(text_score) AS text_score
+        WITH collect({r: r, vector_score: vector_score, text_score: text_score}) AS rows,
+             max(text_score) AS max_text_score
+        UNWIND rows AS row
+        WITH row.r AS r,
+             row.vector_score AS vector_score,
+             CASE WHEN max_text_score > 0 THEN row.text_score / max_text_score ELSE 0.0 END AS text_score
+        MATCH (a:Entity)-[r]->(b:Entity)
+        RETURN
+            r.uuid AS uuid,
+            a.uuid AS source_node_uuid,
+            r.fact AS fact,
+            r.valid_at AS valid_at,
+            r.invalid_at AS invalid_at,
+            vector_score * (1 - $text_weight) + text_score * $text_weight AS score
+        ORDER BY score DESC LIMIT $limit
+        """
+        
+        records = await self._read(
+            cypher_query,
+            {
+                "vector_index": FACT_EMBEDDING_INDEX,
+                "fact_index": FACT_INDEX,
+                "embedding": query_embedding,
+                "query": fulltext_query,
+                # Over-fetch candidates from each index before blending
+                "k": limit * 2,
+                "limit": limit,
+                "text_weight": text_weight
+            }
+        )
+        
+        return [
+            {
+                "uuid": str(record["uuid"]),
+                "fact": record["fact"] or "",
+                "valid_at": str(record["valid_at"]) if record["valid_at"] else None,
+                "invalid_at": str(record["invalid_at"]) if record["invalid_at"] else None,
+                "source_node_uuid": str(record["source_node_uuid"]) if record["source_node_uuid"] else None,
+                "score": float(record["score"])
+            }
+            for record in records
+        ]
+    
+    async def _text_search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Perform full-text search over entity names and relationship facts."""
         if not self.graphiti or not self.graphiti.driver:
             return []
         
-        # Simple text search that works with our data structure
+        fulltext_query = build_fulltext_query(query)
+        if not fulltext_query:
+            return []
+        
+        # Facts matched directly and facts attached to matching entities,
+        # keeping the best Lucene score per relationship
         cypher_query = """
-        MATCH (a:Entity)-[r:RELATES_TO]->(b:Entity)
-        WHERE toLower(a.name) CONTAINS toLower($query) 
-           OR toLower(b.name) CONTAINS toLower($query)
-           OR toLower(r.fact) CONTAINS toLower($query)
+        CALL {
+            CALL db.index.fulltext.queryRelationships($fact_index, $query, {limit: $limit})
+            YIELD relationship, score
+            RETURN relationship AS r, score
+            UNION ALL
+            CALL db.index.fulltext.queryNodes($entity_index, $query, {limit: $limit})
+            YIELD node, score
+            MATCH (node)-[r:RELATES_TO]-(:Entity)
+            RETURN r, score
+        }
+        WITH r, max(score) AS score
+        MATCH (a:Entity)-[r]->(b:Entity)
         RETURN
             r.uuid AS uuid,
             r.group_id AS group_id,
@@ -340,33 +868,32 @@ class GraphitiClient:
             r.expired_at AS expired_at,
             r.valid_at AS valid_at,
             r.invalid_at AS invalid_at,
-            properties(r) AS attributes,
-            1.0 AS score
+            score
         ORDER BY score DESC LIMIT $limit
         """
         
         try:
-            async with self.graphiti.driver.session(database="neo4j") as session:
-                result = await session.run(
-                    cypher_query,
-                    parameters={
-                        "query": query,
-                        "limit": 5
-                    }
-                )
-                
-                results = []
-                async for record in result:
-                    results.append({
-                        "uuid": str(record["uuid"]),
-                        "fact": record["fact"] or "",
-                        "valid_at": str(record["valid_at"]) if record["valid_at"] else None,
-                        "invalid_at": str(record["invalid_at"]) if record["invalid_at"] else None,
-                        "source_node_uuid": str(record["source_node_uuid"]) if record["source_node_uuid"] else None,
-                        "score": record["score"]
-                    })
-                
-                return results
+            records = await self._read(
+                cypher_query,
+                {
+                    "query": fulltext_query,
+                    "fact_index": FACT_INDEX,
+                    "entity_index": ENTITY_NAME_INDEX,
+                    "limit": limit
+                }
+            )
+            
+            return [
+                {
+                    "uuid": str(record["uuid"]),
+                    "fact": record["fact"] or "",
+                    "valid_at": str(record["valid_at"]) if record["valid_at"] else None,
+                    "invalid_at": str(record["invalid_at"]) if record["invalid_at"] else None,
+                    "source_node_uuid": str(record["source_node_uuid"]) if record["source_node_uuid"] else None,
+                    "score": float(record["score"])
+                }
+                for record in records
+            ]
         except Exception as e:
             logger.warning(f"Text search query failed: {e}")
             return []
@@ -375,125 +902,191 @@ class GraphitiClient:
         self,
         entity_name: str,
         relationship_types: Optional[List[str]] = None,
-        depth: int = 1
+        depth: int = 1,
+        max_fan_out: int = GRAPH_HOP_FAN_OUT,
+        node_budget: int = GRAPH_NODE_BUDGET
     ) -> Dict[str, Any]:
         """
-        Get entities related to a given entity using custom Neo4j queries.
+        Get the neighborhood of an entity with a bounded breadth-first traversal.
+        
+        Anchor entities are found through the entity name full-text index and
+        expanded one hop per query. Each hop keeps at most max_fan_out edges
+        per node, and traversal stops once node_budget entities are reached.
         
         Args:
             entity_name: Name of the entity
-            relationship_types: Types of relationships to follow (not used)
-            depth: Maximum depth to traverse (not used)
+            relationship_types: Relationship names to follow (all when omitted)
+            depth: Maximum depth to traverse (capped at GRAPH_MAX_DEPTH)
+            max_fan_out: Maximum edges followed per node per hop
+            node_budget: Maximum number of entities in the subgraph
         
         Returns:
-            Related entities and relationships
+            Subgraph in adjacency form plus the flat related facts and entities
         """
         if not self._initialized:
             await self.initialize()
         
+        depth = max(1, min(depth, GRAPH_MAX_DEPTH))
+        subgraph = Subgraph(node_budget)
+        empty = subgraph.to_dict(entity_name, depth, relationship_types)
+        
         if not self.graphiti or not self.graphiti.driver:
-            return {
-                "central_entity": entity_name,
-                "related_facts": [],
-                "search_method": "custom_neo4j_search"
-            }
+            return empty
         
-        # Use custom Cypher query to find relationships involving the entity
-        cypher_query = """
-        MATCH (n:Entity)-[r:RELATES_TO]->(m:Entity)
-        WHERE (n.name CONTAINS $entity_name OR m.name CONTAINS $entity_name OR r.fact CONTAINS $entity_name)
-        AND r.group_id IS NOT NULL
-        RETURN
-            r.uuid AS uuid,
-            r.group_id AS group_id,
-            n.uuid AS source_node_uuid,
-            m.uuid AS target_node_uuid,
-            n.name AS source_name,
-            m.name AS target_name,
-            r.created_at AS created_at,
-            r.name AS name,
-            r.fact AS fact,
-            r.expired_at AS expired_at,
-            r.valid_at AS valid_at,
-            r.invalid_at AS invalid_at,
-            properties(r) AS attributes
-        ORDER BY r.created_at DESC
-        LIMIT 10
-        """
+        fulltext_query = build_fulltext_query(entity_name)
+        if not fulltext_query:
+            return empty
         
         try:
-            async with self.graphiti.driver.session(database="neo4j") as session:
-                result = await session.run(
-                    cypher_query,
-                    parameters={
-                        "entity_name": entity_name
+            records = await self._read(
+                """
+                CALL db.index.fulltext.queryNodes($entity_index, $query, {limit: $limit})
+                YIELD node, score
+                RETURN node.uuid AS uuid, node.name AS name
+                """,
+                {
+                    "entity_index": ENTITY_NAME_INDEX,
+                    "query": fulltext_query,
+                    "limit": GRAPH_ANCHOR_LIMIT
+                }
+            )
+            frontier = []
+            for record in records:
+                if subgraph.add_node(record["uuid"], record["name"], 0):
+                    frontier.append(record["uuid"])
+            
+            for hop in range(1, depth + 1):
+                if not frontier or subgraph.full:
+                    break
+                
+                records = await self._read(
+                    """
+                    UNWIND $frontier AS node_uuid
+                    MATCH (n:Entity {uuid: node_uuid})-[r:RELATES_TO]-(m:Entity)
+                    WHERE $relationship_types IS NULL OR r.name IN $relationship_types
+                    WITH n, r, m
+                    ORDER BY r.created_at DESC
+                    WITH n, collect({r: r, m: m})[..$fan_out] AS edges
+                    UNWIND edges AS edge
+                    WITH edge.r AS r, edge.m AS m
+                    RETURN
+                        r.uuid AS uuid,
+                        r.name AS name,
+                        r.fact AS fact,
+                        r.valid_at AS valid_at,
+                        startNode(r).uuid AS source_uuid,
+                        endNode(r).uuid AS target_uuid,
+                        m.uuid AS neighbor_uuid,
+                        m.name AS neighbor_name
+                    """,
+                    {
+                        "frontier": frontier,
+                        "relationship_types": relationship_types or None,
+                        "fan_out": max_fan_out
                     }
                 )
-                facts = []
-                related_entities = set()
-                async for record in result:
-                    fact_data = {
-                        "fact": record["fact"] or "",
-                        "uuid": str(record["uuid"]),
-                        "valid_at": str(record["valid_at"]) if record["valid_at"] else None,
-                        "source_entity": record["source_name"],
-                        "target_entity": record["target_name"]
-                    }
-                    facts.append(fact_data)
-                    if record["source_name"]:
-                        related_entities.add(record["source_name"])
-                    if record["target_name"]:
-                        related_entities.add(record["target_name"])
-                return {
-                    "central_entity": entity_name,
-                    "related_facts": facts,
-                    "related_entities": list(related_entities),
-                    "search_method": "custom_neo4j_search"
-                }
+                
+                next_frontier = []
+                for record in records:
+                    if subgraph.add_node(record["neighbor_uuid"], record["neighbor_name"], hop):
+                        next_frontier.append(record["neighbor_uuid"])
+                    subgraph.add_edge(record)
+                
+                frontier = next_frontier
+            
+            return subgraph.to_dict(entity_name, depth, relationship_types)
         except Exception as e:
-            logger.warning(f"Custom entity search failed: {e}")
-            return {
-                "central_entity": entity_name,
-                "related_facts": [],
-                "search_method": "custom_neo4j_search"
-            }
+            logger.warning(f"Entity traversal failed: {e}")
+            return empty
     
     async def get_entity_timeline(
         self,
         entity_name: str,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
+        end_date: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        ascending: bool = False
+    ) -> Dict[str, Any]:
         """
-        Get timeline of facts for an entity using custom search.
+        Get one page of the timeline of facts for an entity.
+        
+        Facts without a valid_at time are not part of the timeline. Date
+        filters, ordering and the keyset cursor on (valid_at, uuid) are all
+        evaluated in Neo4j against the valid_at range index.
         
         Args:
             entity_name: Name of the entity
-            start_date: Start of time range (not currently used)
-            end_date: End of time range (not currently used)
+            start_date: Only facts valid at or after this time
+            end_date: Only facts valid at or before this time
+            limit: Maximum number of facts per page
+            cursor: Cursor returned with the previous page
+            ascending: Oldest first instead of newest first
         
         Returns:
-            Timeline of facts
+            Facts sorted by valid_at and the cursor for the next page (or None)
         """
         if not self._initialized:
             await self.initialize()
         
-        # Use custom search instead of Graphiti's problematic search
-        results = await self._custom_search(f"timeline history of {entity_name}")
+        page = {"entity_name": entity_name, "timeline": [], "next_cursor": None}
         
-        timeline = []
-        for result in results:
-            timeline.append({
-                "fact": result.get("fact", ""),
-                "uuid": result.get("uuid", ""),
-                "valid_at": result.get("valid_at"),
-                "invalid_at": result.get("invalid_at")
+        fulltext_query = build_fulltext_query(entity_name)
+        if not fulltext_query:
+            return page
+        
+        position = decode_cursor(cursor) if cursor else {}
+        compare = ">" if ascending else "<"
+        direction = "ASC" if ascending else "DESC"
+        
+        cypher_query = f"""
+        CALL db.index.fulltext.queryNodes($entity_index, $query, {{limit: $anchors}})
+        YIELD node
+        MATCH (node)-[r:RELATES_TO]-(:Entity)
+        WHERE r.valid_at IS NOT NULL
+          AND ($start_date IS NULL OR r.valid_at >= datetime($start_date))
+          AND ($end_date IS NULL OR r.valid_at <= datetime($end_date))
+          AND ($after_time IS NULL
+               OR r.valid_at {compare} datetime($after_time)
+               OR (r.valid_at = datetime($after_time) AND r.uuid {compare} $after_uuid))
+        WITH DISTINCT r
+        RETURN r.uuid AS uuid, r.fact AS fact, r.valid_at AS valid_at, r.invalid_at AS invalid_at
+        ORDER BY r.valid_at {direction}, r.uuid {direction}
+        LIMIT $fetch
+        """
+        
+        try:
+            records = await self._read(
+                cypher_query,
+                {
+                    "entity_index": ENTITY_NAME_INDEX,
+                    "query": fulltext_query,
+                    "anchors": GRAPH_ANCHOR_LIMIT,
+                    "start_date": start_date.isoformat() if start_date else None,
+                    "end_date": end_date.isoformat() if end_date else None,
+                    "after_time": position.get("valid_at"),
+                    "after_uuid": position.get("uuid"),
+                    # One extra row tells us whether another page exists
+                    "fetch": limit + 1
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Entity timeline query failed: {e}")
+            return page
+        
+        for record in records[:limit]:
+            page["timeline"].append({
+                "fact": record["fact"] or "",
+                "uuid": str(record["uuid"]),
+                "valid_at": str(record["valid_at"]) if record["valid_at"] else None,
+                "invalid_at": str(record["invalid_at"]) if record["invalid_at"] else None
             })
         
-        # Sort by valid_at if available
-        timeline.sort(key=lambda x: x.get('valid_at') or '', reverse=True)
+        if len(records) > limit:
+            last = page["timeline"][-1]
+            page["next_cursor"] = encode_cursor({"valid_at": last["valid_at"], "uuid": last["uuid"]})
         
-        return timeline
+        return page
     
     async def get_graph_statistics(self) -> Dict[str, Any]:
         """
@@ -505,13 +1098,28 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
-        # Use custom search instead of Graphiti's problematic search
         try:
-            test_results = await self._custom_search("test")
+            records = await self._read(
+                """
+                CALL { MATCH (n:Entity) RETURN count(n) AS entities }
+                CALL { MATCH (e:Episodic) RETURN count(e) AS episodes }
+                CALL { MATCH ()-[r:RELATES_TO]->() RETURN count(r) AS relationships }
+                CALL {
+                    MATCH ()-[r:RELATES_TO]->()
+                    WHERE r.fact_embedding IS NOT NULL
+                    RETURN count(r) AS embedded_facts
+                }
+                RETURN entities, episodes, relationships, embedded_facts
+                """
+            )
+            counts = records[0] if records else {}
             return {
                 "graphiti_initialized": True,
-                "sample_search_results": len(test_results),
-                "note": "Detailed statistics require direct Neo4j access"
+                "entities": counts.get("entities", 0),
+                "episodes": counts.get("episodes", 0),
+                "relationships": counts.get("relationships", 0),
+                "embedded_facts": counts.get("embedded_facts", 0),
+                "query_cache": self.query_cache.stats()
             }
         except Exception as e:
             return {
@@ -524,6 +1132,8 @@ class GraphitiClient:
         if not self._initialized:
             await self.initialize()
         
+        self.query_cache.invalidate()
+        
         try:
             # Use Graphiti's proper clear_data function with the driver
             await clear_data(self.graphiti.driver)
@@ -567,11 +1177,18 @@ class GraphitiClient:
                 self.neo4j_password,
                 llm_client=llm_client,
                 embedder=embedder,
-                cross_encoder=OpenAIRerankerClient(client=llm_client, config=llm_config)
+                cross_encoder=OpenAIRerankerClient(client=llm_client, config=llm_config),
+                graph_driver=TunedNeo4jDriver(self.neo4j_uri, self.neo4j_user, self.neo4j_password)
             )
             await self.graphiti.build_indices_and_constraints()
+            await self._build_search_indices()
             
             logger.warning("Reinitialized Graphiti client (fresh indices created)")
+        finally:
+            from .graph_snapshot import reset_graph_snapshot
+            
+            # The snapshot would keep serving the deleted edges
+            reset_graph_snapshot()
 
 
 # Global Graphiti client instance
@@ -621,27 +1238,28 @@ async def add_to_knowledge_graph(
 
 
 async def search_knowledge_graph(
-    query: str
+    query: str,
+    query_embedding: Optional[List[float]] = None
 ) -> List[Dict[str, Any]]:
     """
     Search the knowledge graph.
     
     Args:
         query: Search query
+        query_embedding: Optional query embedding for fact similarity search
     
     Returns:
         Search results
     """
-    # Ensure the global client is initialized
-    if not graph_client._initialized:
-        await graph_client.initialize()
+    from .graph_backend import get_graph_backend
     
-    return await graph_client._custom_search(query)
+    return await get_graph_backend().search(query, query_embedding=query_embedding)
 
 
 async def get_entity_relationships(
     entity: str,
-    depth: int = 2
+    depth: int = 2,
+    relationship_types: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Get relationships for an entity.
@@ -649,11 +1267,57 @@ async def get_entity_relationships(
     Args:
         entity: Entity name
         depth: Maximum traversal depth
+        relationship_types: Relationship names to follow (all when omitted)
     
     Returns:
         Entity relationships
     """
-    return await graph_client.get_related_entities(entity, depth=depth)
+    from .graph_backend import get_graph_backend
+    from .graph_snapshot import get_graph_snapshot
+    
+    # Serve from the in-process snapshot when enabled and the entity is known
+    snapshot = await get_graph_snapshot()
+    if snapshot is not None:
+        result = snapshot.neighborhood(entity, relationship_types=relationship_types, depth=depth)
+        if result is not None:
+            return result
+    
+    return await get_graph_backend().get_related_entities(
+        entity,
+        relationship_types=relationship_types,
+        depth=depth
+    )
+
+
+async def get_entity_timeline(
+    entity: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get one page of an entity's timeline.
+    
+    Args:
+        entity: Entity name
+        start_date: Only facts valid at or after this time
+        end_date: Only facts valid at or before this time
+        limit: Maximum number of facts per page
+        cursor: Cursor returned with the previous page
+    
+    Returns:
+        Timeline page with next_cursor
+    """
+    from .graph_backend import get_graph_backend
+    
+    return await get_graph_backend().get_entity_timeline(
+        entity,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit,
+        cursor=cursor
+    )
 
 
 async def test_graph_connection() -> bool:
@@ -0,0 +1,272 @@
+"""
+Write-behind persistence for chat messages.
+
+Messages are queued in memory and written by a background task in
+multi-row inserts, flushed when the batch is full or the flush interval
+has passed. Request handlers therefore never wait on the messages table.
+Each message gets its id and timestamp when it is queued, so ordering and
+identity do not depend on when the batch lands.
+
+While the database is unreachable, messages stay queued (up to
+max_pending) and flushes back off exponentially. A batch rejected for its
+data (e.g. a message whose session was swept) is retried row by row, so
+only the offending messages are dropped.
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+import asyncpg
+from dotenv import load_dotenv
+
+from .db_utils import add_messages
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_WRITER_ENABLED = os.getenv("MESSAGE_WRITER_ENABLED", "true").lower() == "true"
+MESSAGE_WRITER_BATCH_SIZE = int(os.getenv("MESSAGE_WRITER_BATCH_SIZE", "100"))
+MESSAGE_WRITER_FLUSH_INTERVAL_MS = int(os.getenv("MESSAGE_WRITER_FLUSH_INTERVAL_MS", "50"))
+# Queued messages kept while the database is unreachable before dropping the oldest
+MESSAGE_WRITER_MAX_PENDING = int(os.getenv("MESSAGE_WRITER_MAX_PENDING", "10000"))
+# Delay before retrying a failed flush, doubled on each consecutive failure
+MESSAGE_WRITER_RETRY_BASE_MS = int(os.getenv("MESSAGE_WRITER_RETRY_BASE_MS", "100"))
+MESSAGE_WRITER_RETRY_MAX_MS = int(os.getenv("MESSAGE_WRITER_RETRY_MAX_MS", "30000"))
+
+# Errors caused by the rows themselves; retrying the same rows can't succeed
+DATA_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+
+class MessageWriter:
+    """Batches message inserts behind an in-memory queue."""
+    
+    def __init__(
+        self,
+        batch_size: int = MESSAGE_WRITER_BATCH_SIZE,
+        flush_interval_ms: int = MESSAGE_WRITER_FLUSH_INTERVAL_MS,
+        max_pending: int = MESSAGE_WRITER_MAX_PENDING,
+        retry_base_ms: int = MESSAGE_WRITER_RETRY_BASE_MS,
+        retry_max_ms: int = MESSAGE_WRITER_RETRY_MAX_MS
+    ):
+        """
+        Initialize the writer.
+        
+        Args:
+            batch_size: Messages per insert; a full batch is flushed at once
+            flush_interval_ms: Longest a queued message waits for a flush
+            max_pending: Queue bound while inserts are failing
+            retry_base_ms: Backoff after the first failed flush
+            retry_max_ms: Backoff ceiling
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.retry_base = retry_base_ms / 1000
+        self.retry_max = retry_max_ms / 1000
+        # Current backoff; 0 while inserts are succeeding
+        self.retry_delay = 0.0
+        self._queue: List[Dict[str, Any]] = []
+        self._in_flight: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is active."""
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def depth(self) -> int:
+        """Messages queued or being written."""
+        return len(self._queue) + len(self._in_flight)
+    
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self.running:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Message writer started")
+    
+    async def stop(self) -> None:
+        """Stop the flusher after writing everything still queued."""
+        if not self.running:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        if self._queue:
+            logger.error("Message writer stopped with %d unwritten messages", len(self._queue))
+        logger.info("Message writer stopped")
+    
+    async def add(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Queue a message for writing.
+        
+        Writes immediately when the flusher is not running (e.g. scripts
+        using the API helpers without the app lifespan).
+        
+        Args:
+            session_id: Session UUID
+            role: Message role (user/assistant/system)
+            content: Message content
+            metadata: Optional message metadata
+        
+        Returns:
+            Message ID
+        """
+        message = {
+            "id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "metadata": metadata or {},
+            "created_at": datetime.now(timezone.utc)
+        }
+        
+        if not self.running:
+            await add_messages([message])
+            return message["id"]
+        
+        self._queue.append(message)
+        self._trim()
+        if len(self._queue) >= self.batch_size and not self.retry_delay:
+            self._wakeup.set()
+        
+        return message["id"]
+    
+    def pending(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Get messages of a session that may not be in the database yet.
+        
+        Args:
+            session_id: Session UUID
+        
+        Returns:
+            Messages in the format of get_recent_messages, oldest first
+        """
+        return [
+            {
+                "id": m["id"],
+                "role": m["role"],
+                "content": m["content"],
+                "metadata": m["metadata"],
+                "created_at": m["created_at"].isoformat()
+            }
+            for m in self._in_flight + self._queue
+            if m["session_id"] == session_id
+        ]
+    
+    def _trim(self) -> None:
+        """Drop the oldest queued messages beyond max_pending."""
+        overflow = len(self._queue) - self.max_pending
+        if overflow > 0:
+            dropped = self._queue[:overflow]
+            del self._queue[:overflow]
+            logger.error(
+                "Message writer queue full, dropped %d messages (oldest %s)",
+                len(dropped), dropped[0]["id"]
+            )
+    
+    def _requeue(self, messages: List[Dict[str, Any]], error: Exception) -> None:
+        """Put messages back at the head of the queue and back off."""
+        self._queue[:0] = messages
+        self._trim()
+        self.retry_delay = min(max(self.retry_delay * 2, self.retry_base), self.retry_max)
+        logger.error(
+            "Message batch insert failed, %d messages queued, retrying in %.1fs: %s",
+            len(self._queue), self.retry_delay, error
+        )
+    
+    async def _write_rows(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        Write a rejected batch one message at a time, dropping bad rows.
+        
+        Args:
+            batch: Messages of the rejected batch
+        
+        Returns:
+            Number of messages written
+        """
+        written = 0
+        for index, message in enumerate(batch):
+            try:
+                written += await add_messages([message])
+            except DATA_ERRORS as e:
+                logger.error("Dropped message %s of session %s: %s", message["id"], message["session_id"], e)
+            except Exception as e:
+                self._requeue(batch[index:], e)
+                break
+        return written
+    
+    async def flush(self) -> int:
+        """
+        Write queued messages in batches.
+        
+        Stops at the first connection failure, leaving the rest queued and
+        raising retry_delay; the run loop waits that long before the next try.
+        
+        Returns:
+            Number of messages written
+        """
+        written = 0
+        while self._queue:
+            self._in_flight = self._queue[:self.batch_size]
+            del self._queue[:self.batch_size]
+            try:
+                written += await add_messages(self._in_flight)
+            except DATA_ERRORS as e:
+                logger.warning("Message batch rejected, retrying row by row: %s", e)
+                self.retry_delay = 0.0
+                written += await self._write_rows(self._in_flight)
+            except Exception as e:
+                self._requeue(self._in_flight, e)
+            else:
+                self.retry_delay = 0.0
+            finally:
+                self._in_flight = []
+            
+            if self.retry_delay:
+                break
+        
+        return written
+    
+    async def _run(self) -> None:
+        """Flush on a full batch, the interval, or shutdown, backing off after failures."""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    timeout=self.retry_delay or self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            if self._closing:
+                # Keep going while batches succeed so nothing is left behind
+                while self._queue and await self.flush():
+                    pass
+                return
+            
+            if self._queue:
+                await self.flush()
+
+
+# Global message writer instance
+message_writer = MessageWriter()
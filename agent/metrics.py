@@ -0,0 +1,137 @@
+"""
+Saturation metrics read from live objects at scrape time.
+
+Each collector reads counters the components already keep in memory (pool
+sizes, queue depths, cache counters), so serving /metrics never waits on
+Postgres, Neo4j or a provider, even when those are the saturated part.
+"""
+
+import logging
+from typing import Callable, Dict, Tuple
+
+from .db_utils import db_pool
+from .graph_utils import graph_client
+from .session_cache import session_cache
+from .message_writer import message_writer
+from .admission import agent_lane, light_lane
+from .telemetry import CallbackMetric, registry
+
+logger = logging.getLogger(__name__)
+
+# Agent stats source: returns {"agent": {"calls": n, "success": n, "errors": n}}
+AgentStatsSource = Callable[[], Dict[str, Dict[str, int]]]
+
+_agent_stats_sources: Dict[str, AgentStatsSource] = {}
+
+
+def _db_pool_connections() -> Dict[Tuple[str, ...], float]:
+    """Connections in use and idle."""
+    stats = db_pool.stats()
+    return {("in_use",): stats["in_use"], ("idle",): stats["idle"]}
+
+
+def _graph_cache_lookups() -> Dict[Tuple[str, ...], float]:
+    """Graph query cache hits and misses."""
+    cache = graph_client.query_cache
+    return {("hit",): cache.hits, ("miss",): cache.misses}
+
+
+def _agent_tasks() -> Dict[Tuple[str, ...], float]:
+    """Master agent task counters."""
+    series: Dict[Tuple[str, ...], float] = {}
+    for component, source in _agent_stats_sources.items():
+        for agent, counters in source().items():
+            for counter, value in counters.items():
+                series[(component, agent, counter)] = value
+    return series
+
+
+def _admission(attribute: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    """Read a counter of every admission lane."""
+    return lambda: {(lane.lane,): getattr(lane, attribute) for lane in (agent_lane, light_lane)}
+
+
+def register_agent_stats(component: str, source: AgentStatsSource) -> None:
+    """
+    Export a master agent's agent_stats as rag_agent_tasks_total.
+    
+    Args:
+        component: Stats owner (e.g. "smart_agent")
+        source: Callable returning the agent_stats dict
+    """
+    _agent_stats_sources[component] = source
+
+
+def _scalar(read: Callable[[], float]) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    """Wrap a single value as an unlabelled series."""
+    return lambda: {(): read()}
+
+
+registry.register(CallbackMetric(
+    "rag_db_pool_connections",
+    "Postgres pool connections by state",
+    ("state",),
+    _db_pool_connections
+))
+registry.register(CallbackMetric(
+    "rag_db_pool_max_size",
+    "Postgres pool size limit for this worker",
+    (),
+    _scalar(lambda: db_pool.max_size)
+))
+registry.register(CallbackMetric(
+    "rag_db_pool_waiting",
+    "Requests waiting for a Postgres connection",
+    (),
+    _scalar(lambda: db_pool.waiting)
+))
+registry.register(CallbackMetric(
+    "rag_neo4j_active_reads",
+    "Neo4j read sessions holding a driver connection",
+    (),
+    _scalar(lambda: graph_client.pool_stats()["active_reads"])
+))
+registry.register(CallbackMetric(
+    "rag_neo4j_pool_max_size",
+    "Neo4j driver connection pool limit",
+    (),
+    _scalar(lambda: graph_client.pool_stats()["max_size"])
+))
+registry.register(CallbackMetric(
+    "rag_graph_cache_lookups_total",
+    "Graph query cache lookups by result (hit, miss)",
+    ("result",),
+    _graph_cache_lookups,
+    metric_type="counter"
+))
+registry.register(CallbackMetric(
+    "rag_session_cache_entries",
+    "Sessions held in the session cache",
+    (),
+    _scalar(lambda: len(session_cache))
+))
+registry.register(CallbackMetric(
+    "rag_message_writer_pending",
+    "Chat messages queued or being written",
+    (),
+    _scalar(lambda: message_writer.depth)
+))
+registry.register(CallbackMetric(
+    "rag_admission_active",
+    "Requests holding an admission slot, by lane",
+    ("lane",),
+    _admission("active")
+))
+registry.register(CallbackMetric(
+    "rag_admission_queued",
+    "Requests waiting for an admission slot, by lane",
+    ("lane",),
+    _admission("queued")
+))
+registry.register(CallbackMetric(
+    "rag_agent_tasks_total",
+    "Master agent task counters (calls, success, errors) for this worker",
+    ("component", "agent", "counter"),
+    _agent_tasks,
+    metric_type="counter"
+))
@@ -35,14 +35,54 @@ class ChatRequest(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
 
 
+class SearchFilters(BaseModel):
+    """Document filters applied inside the search SQL."""
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Document metadata must contain these key/values")
+    sources: List[str] = Field(default_factory=list, description="Only documents from these sources")
+    document_ids: List[UUID] = Field(default_factory=list, description="Only chunks of these documents")
+    created_after: Optional[datetime] = Field(None, description="Only documents created at or after this time")
+    created_before: Optional[datetime] = Field(None, description="Only documents created before this time")
+    
+    model_config = ConfigDict(extra="forbid")
+    
+    def to_sql_filters(self) -> Dict[str, Any]:
+        """Return only the filters that are set, as expected by db_utils."""
+        return self.model_dump(exclude_defaults=True)
+
+
 class SearchRequest(BaseModel):
     """Search request model."""
     query: str = Field(..., description="Search query")
     search_type: SearchType = Field(default=SearchType.HYBRID, description="Type of search")
     limit: int = Field(default=10, ge=1, le=50, description="Maximum results")
-    filters: Dict[str, Any] = Field(default_factory=dict, description="Search filters")
+    filters: Dict[str, Any] = Field(default_factory=dict, description="Search filters (see SearchFilters)")
+    dedup: bool = Field(default=False, description="Collapse near-duplicate chunks")
+    diversify: bool = Field(default=False, description="Select chunks with Maximal Marginal Relevance")
+    mmr_lambda: float = Field(default=0.7, ge=0.0, le=1.0, description="MMR relevance weight (1 = relevance only)")
+    include_metadata: bool = Field(default=False, description="Return chunk metadata")
+    full_content: bool = Field(default=False, description="Return whole chunks instead of snippets")
     
     model_config = ConfigDict(use_enum_values=True)
+    
+    @field_validator('filters')
+    @classmethod
+    def validate_filters(cls, v: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate filters against SearchFilters, keeping only those set."""
+        return SearchFilters(**v).to_sql_filters()
+
+
+class BatchSearchRequest(BaseModel):
+    """Batch search request model."""
+    queries: List[SearchRequest] = Field(..., min_length=1, max_length=100, description="Searches to run")
+    
+    @field_validator('queries')
+    @classmethod
+    def validate_search_types(cls, v: List[SearchRequest]) -> List[SearchRequest]:
+        """Only embedding-based searches can be batched."""
+        for query in v:
+            if query.search_type not in (SearchType.VECTOR, SearchType.HYBRID):
+                raise ValueError(f"Batch search supports vector and hybrid queries, not {query.search_type}")
+        return v
 
 
 # Response Models
@@ -81,6 +121,7 @@ class GraphSearchResult(BaseModel):
     valid_at: Optional[str] = None
     invalid_at: Optional[str] = None
     source_node_uuid: Optional[str] = None
+    score: Optional[float] = None
 
 
 class EntityRelationship(BaseModel):
@@ -98,6 +139,7 @@ class SearchResponse(BaseModel):
     total_results: int = 0
     search_type: SearchType
     query_time_ms: float
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
 
 
 class ToolCall(BaseModel):
@@ -0,0 +1,46 @@
+"""
+Opaque keyset pagination cursors.
+"""
+
+import json
+import base64
+import binascii
+from typing import Dict, Any
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """
+    Encode a keyset position as an opaque URL-safe cursor.
+    
+    Args:
+        position: Sort key values of the last returned row
+    
+    Returns:
+        Cursor string
+    """
+    payload = json.dumps(position, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+    
+    Returns:
+        Sort key values of the last returned row
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    if not isinstance(position, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position
@@ -0,0 +1,253 @@
+"""
+Reranking stage for retrieved chunks.
+
+Vector and hybrid search over-fetch candidates from PostgreSQL; a reranker
+rescores them and only the top-k are handed to the agent.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .models import ChunkResult
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Reranker selection: "lexical" (default), "cross-encoder" or "none"
+RERANKER = os.getenv("RERANKER", "lexical").lower()
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Candidates fetched per requested result, capped at RERANK_MAX_CANDIDATES
+RERANK_OVERFETCH = int(os.getenv("RERANK_OVERFETCH", "3"))
+RERANK_MAX_CANDIDATES = int(os.getenv("RERANK_MAX_CANDIDATES", "50"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+# Share of the lexical score in the blended score; the rest is the retrieval score
+RERANK_LEXICAL_WEIGHT = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.3"))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class Reranker(ABC):
+    """Scores candidate chunks against a query."""
+    
+    name = "base"
+    
+    @abstractmethod
+    def score_batch(self, query: str, candidates: List[ChunkResult]) -> np.ndarray:
+        """
+        Score one batch of candidates.
+        
+        Args:
+            query: Search query
+            candidates: Candidate chunks
+        
+        Returns:
+            Relevance scores in [0, 1], one per candidate
+        """
+        pass
+    
+    def score(self, query: str, candidates: List[ChunkResult], batch_size: int = RERANK_BATCH_SIZE) -> np.ndarray:
+        """
+        Score candidates in batches.
+        
+        Args:
+            query: Search query
+            candidates: Candidate chunks
+            batch_size: Candidates scored per batch
+        
+        Returns:
+            Relevance scores, one per candidate
+        """
+        if not candidates:
+            return np.zeros(0, dtype=np.float32)
+        
+        return np.concatenate([
+            self.score_batch(query, candidates[i:i + batch_size])
+            for i in range(0, len(candidates), batch_size)
+        ])
+
+
+class LexicalReranker(Reranker):
+    """
+    BM25 over the candidate set, blended with the retrieval score.
+    
+    Term statistics come from the candidates themselves, so no index is
+    needed; the per-term arithmetic is vectorized over a (candidates x query
+    terms) frequency matrix.
+    """
+    
+    name = "lexical"
+    
+    def __init__(self, lexical_weight: float = RERANK_LEXICAL_WEIGHT, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize the reranker.
+        
+        Args:
+            lexical_weight: Share of the BM25 score in the blended score
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.lexical_weight = lexical_weight
+        self.k1 = k1
+        self.b = b
+    
+    def score(self, query: str, candidates: List[ChunkResult], batch_size: int = RERANK_BATCH_SIZE) -> np.ndarray:
+        """Score all candidates at once; BM25 statistics span the whole set."""
+        if not candidates:
+            return np.zeros(0, dtype=np.float32)
+        return self.score_batch(query, candidates)
+    
+    def score_batch(self, query: str, candidates: List[ChunkResult]) -> np.ndarray:
+        """Score candidates with BM25 blended with their retrieval score."""
+        retrieval = np.array([c.score for c in candidates], dtype=np.float32)
+        
+        terms = {term: i for i, term in enumerate(dict.fromkeys(tokenize(query)))}
+        if not terms:
+            return retrieval
+        
+        tf = np.zeros((len(candidates), len(terms)), dtype=np.float32)
+        lengths = np.empty(len(candidates), dtype=np.float32)
+        for row, candidate in enumerate(candidates):
+            tokens = tokenize(candidate.content)
+            lengths[row] = len(tokens)
+            columns = [terms[t] for t in tokens if t in terms]
+            if columns:
+                np.add.at(tf[row], columns, 1.0)
+        
+        n = len(candidates)
+        df = np.count_nonzero(tf, axis=0)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+        bm25 = (idf * tf * (self.k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+        
+        top = bm25.max()
+        lexical = bm25 / top if top > 0 else bm25
+        
+        return (1 - self.lexical_weight) * retrieval + self.lexical_weight * lexical
+
+
+class CrossEncoderReranker(Reranker):
+    """Local cross-encoder model (sentence-transformers) run on CPU."""
+    
+    name = "cross-encoder"
+    
+    def __init__(self, model_name: str = RERANK_MODEL):
+        """
+        Load the cross-encoder.
+        
+        Args:
+            model_name: Hugging Face model name
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("sentence-transformers not installed. Run: pip install sentence-transformers")
+        
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device="cpu")
+    
+    def score_batch(self, query: str, candidates: List[ChunkResult]) -> np.ndarray:
+        """Score (query, chunk) pairs; logits are squashed into [0, 1]."""
+        logits = np.asarray(
+            self.model.predict([(query, c.content) for c in candidates], batch_size=len(candidates)),
+            dtype=np.float32
+        )
+        return 1 / (1 + np.exp(-logits))
+
+
+_reranker: Optional[Reranker] = None
+_reranker_loaded = False
+
+
+def get_reranker() -> Optional[Reranker]:
+    """
+    Get the configured reranker, loading it on first use.
+    
+    Returns:
+        Reranker instance, or None when reranking is disabled
+    """
+    global _reranker, _reranker_loaded
+    
+    if not _reranker_loaded:
+        if RERANKER == "cross-encoder":
+            try:
+                _reranker = CrossEncoderReranker()
+            except Exception as e:
+                logger.warning("Cross-encoder unavailable (%s), falling back to lexical reranking", e)
+                _reranker = LexicalReranker()
+        elif RERANKER == "none":
+            _reranker = None
+        else:
+            _reranker = LexicalReranker()
+        _reranker_loaded = True
+    
+    return _reranker
+
+
+def candidate_count(limit: int, diversify: bool = False) -> int:
+    """
+    Number of candidates to fetch for a result limit.
+    
+    Args:
+        limit: Results wanted after reranking
+        diversify: Whether candidates will also be deduplicated or diversified
+    
+    Returns:
+        Candidates to retrieve
+    """
+    if get_reranker() is None and not diversify:
+        return limit
+    return max(limit, min(limit * RERANK_OVERFETCH, RERANK_MAX_CANDIDATES))
+
+
+async def rerank(
+    query: str,
+    candidates: List[ChunkResult],
+    top_k: int,
+    reranker: Optional[Reranker] = None
+) -> Tuple[List[ChunkResult], Dict[str, float]]:
+    """
+    Rerank candidates and keep the top-k.
+    
+    Args:
+        query: Search query
+        candidates: Retrieved chunks
+        top_k: Number of chunks to keep
+        reranker: Reranker to use (defaults to the configured one)
+    
+    Returns:
+        Tuple of (top-k chunks with reranked scores, stage timings in ms)
+    """
+    reranker = reranker or get_reranker()
+    if reranker is None or len(candidates) <= 1:
+        return candidates[:top_k], {}
+    
+    start = time.perf_counter()
+    # Model inference is CPU bound; keep it off the event loop
+    scores = await asyncio.to_thread(reranker.score, query, candidates)
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    duration = (time.perf_counter() - start) * 1000
+    
+    reranked = [
+        candidates[i].model_copy(update={"score": float(scores[i])})
+        for i in order
+    ]
+    logger.debug(
+        "Reranked %d candidates to %d with %s in %.2f ms",
+        len(candidates), len(reranked), reranker.name, duration
+    )
+    return reranked, {"rerank_ms": duration}
@@ -0,0 +1,215 @@
+"""
+Semantic answer cache for the chat endpoint.
+
+Answers are stored in PostgreSQL with the embedding of the question that
+produced them. A new question whose embedding is close enough to a cached
+one reuses the answer instead of running the agent again. Entries are tied
+to the corpus version, which ingestion bumps, so new content invalidates
+them, and to the asking user, so answers never cross users. Only answers
+built purely from read-only corpus tools are cached; anything that touched
+email, local files or the web is always recomputed.
+"""
+
+import os
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from .db_utils import db_pool
+from .models import ToolCall
+from .telemetry import traced, CACHE_LOOKUPS
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Minimum cosine similarity between questions for a cache hit
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+
+# Agent tools that only read the ingested corpus; answers using any other tool aren't cached
+CACHEABLE_TOOLS = frozenset({
+    "vector_search",
+    "hybrid_search",
+    "graph_search",
+    "get_document",
+    "list_documents",
+    "get_entity_relationships",
+    "get_entity_timeline"
+})
+
+
+def is_cacheable(tools_used: List[ToolCall]) -> bool:
+    """
+    Check whether an answer may be served to a later question.
+    
+    Args:
+        tools_used: Tools the agent called for the answer
+    
+    Returns:
+        True if every tool is a read-only corpus tool
+    """
+    return all(tool.tool_name in CACHEABLE_TOOLS for tool in tools_used)
+
+
+class SemanticCache:
+    """Embedding-keyed answer cache stored in the semantic_cache table."""
+    
+    def __init__(
+        self,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            enabled: Whether lookups and stores are performed
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Maximum age of a usable entry
+        """
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+    
+    @traced("db.semantic_cache_lookup")
+    async def lookup(
+        self,
+        embedding: List[float],
+        user_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question embedding.
+        
+        Args:
+            embedding: Embedding of the user's question
+            user_id: Asking user; only their entries are considered
+        
+        Returns:
+            Dict with entry_id, response, tools_used and similarity, or None
+        """
+        if not self.enabled:
+            return None
+        
+        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+        
+        async with db_pool.acquire() as conn:
+            # Nearest entry of this user for the current corpus version;
+            # counted as a hit only if it clears the threshold
+            row = await conn.fetchrow(
+                """
+                WITH nearest AS (
+                    SELECT id, response, tools_used, 1 - (embedding <=> $1::vector) AS similarity
+                    FROM semantic_cache
+                    WHERE corpus_version = (SELECT version FROM corpus_state)
+                    AND created_at > CURRENT_TIMESTAMP - make_interval(secs => $3)
+                    AND user_id IS NOT DISTINCT FROM $4
+                    ORDER BY embedding <=> $1::vector
+                    LIMIT 1
+                )
+                UPDATE semantic_cache s
+                SET hit_count = s.hit_count + 1, last_hit_at = CURRENT_TIMESTAMP
+                FROM nearest n
+                WHERE s.id = n.id AND n.similarity >= $2
+                RETURNING s.id::text AS entry_id, n.response, n.tools_used, n.similarity
+                """,
+                embedding_str,
+                self.threshold,
+                float(self.ttl_seconds),
+                user_id
+            )
+        
+        if not row:
+            CACHE_LOOKUPS.inc("semantic", "miss")
+            return None
+        
+        CACHE_LOOKUPS.inc("semantic", "hit")
+        logger.debug("Semantic cache hit %s (similarity %.4f)", row["entry_id"], row["similarity"])
+        return {
+            "entry_id": row["entry_id"],
+            "response": row["response"],
+            "tools_used": [ToolCall(**t) for t in json.loads(row["tools_used"])],
+            "similarity": row["similarity"]
+        }
+    
+    @traced("db.semantic_cache_store")
+    async def store(
+        self,
+        query: str,
+        embedding: List[float],
+        response: str,
+        tools_used: List[ToolCall],
+        user_id: Optional[str] = None
+    ) -> bool:
+        """
+        Cache an answer under the current corpus version.
+        
+        Answers that used a tool outside CACHEABLE_TOOLS are not stored.
+        
+        Args:
+            query: User's question
+            embedding: Embedding of the question
+            response: Agent's answer
+            tools_used: Tools the agent called
+            user_id: Asking user
+        
+        Returns:
+            Whether the answer was stored
+        """
+        if not self.enabled:
+            return False
+        
+        if not is_cacheable(tools_used):
+            logger.debug(
+                "Not caching answer that used %s",
+                sorted({t.tool_name for t in tools_used} - CACHEABLE_TOOLS)
+            )
+            return False
+        
+        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+        
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO semantic_cache (query, embedding, response, tools_used, user_id, corpus_version)
+                SELECT $1, $2::vector, $3, $4::jsonb, $5, version FROM corpus_state
+                """,
+                query,
+                embedding_str,
+                response,
+                json.dumps([t.model_dump() for t in tools_used]),
+                user_id
+            )
+        
+        return True
+
+
+async def bump_corpus_version() -> int:
+    """
+    Mark the corpus as changed, invalidating all cached answers.
+    
+    Returns:
+        New corpus version
+    """
+    async with db_pool.acquire() as conn:
+        async with conn.transaction():
+            version = await conn.fetchval(
+                """
+                UPDATE corpus_state
+                SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                RETURNING version
+                """
+            )
+            await conn.execute("DELETE FROM semantic_cache WHERE corpus_version < $1", version)
+    
+    logger.info("Corpus version bumped to %s, semantic cache cleared", version)
+    return version
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache()
@@ -0,0 +1,137 @@
+"""
+Fast JSON encoding for API responses and stream events.
+
+orjson is used when installed (it serializes datetimes, UUIDs and enums
+natively and is several times faster than the json module); otherwise
+encoding falls back to the standard library with the same output shape.
+Search responses can also be slimmed down before encoding, dropping
+chunk metadata and cutting chunk content to a snippet.
+"""
+
+import os
+import json
+import logging
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, List
+from uuid import UUID
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from .models import ChunkResult
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "auto" uses orjson when installed, "orjson" requires it, "json" forces the standard library
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto").lower()
+# Characters of chunk content returned when full content isn't requested
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "300"))
+
+_orjson = None
+
+
+def get_orjson():
+    """
+    Get the orjson module, or None when it is unavailable or disabled.
+    
+    Raises:
+        ImportError: If JSON_ENCODER=orjson and orjson isn't installed
+    """
+    global _orjson
+    
+    if _orjson is None:
+        if JSON_ENCODER == "json":
+            _orjson = False
+        else:
+            try:
+                import orjson
+            except ImportError:
+                if JSON_ENCODER == "orjson":
+                    raise ImportError("orjson not installed. Run: pip install orjson")
+                logger.info("orjson not installed, encoding responses with the json module")
+                _orjson = False
+            else:
+                _orjson = orjson
+    
+    return _orjson or None
+
+
+def _default(obj: Any) -> Any:
+    """Encode types neither encoder handles natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode data as compact UTF-8 JSON.
+    
+    Args:
+        data: JSON-compatible data, Pydantic models included
+    
+    Returns:
+        Encoded JSON
+    """
+    orjson = get_orjson()
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    if isinstance(data, BaseModel):
+        return data.model_dump_json().encode("utf-8")
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with dumps().
+    
+    Endpoints that return it directly (with a Pydantic model as content)
+    skip FastAPI's response validation and jsonable_encoder pass.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        """Encode the response body."""
+        return dumps(content)
+
+
+def slim_chunks(
+    chunks: List[ChunkResult],
+    include_metadata: bool = False,
+    full_content: bool = False,
+    snippet_chars: int = SEARCH_SNIPPET_CHARS
+) -> List[ChunkResult]:
+    """
+    Drop what the client didn't ask for from search results.
+    
+    Args:
+        chunks: Search results
+        include_metadata: Keep chunk metadata
+        full_content: Keep the whole chunk content instead of a snippet
+        snippet_chars: Snippet length
+    
+    Returns:
+        Slimmed copies of the results (the originals are left unchanged)
+    """
+    if include_metadata and full_content:
+        return chunks
+    
+    slimmed = []
+    for chunk in chunks:
+        update = {}
+        if not include_metadata and chunk.metadata:
+            update["metadata"] = {}
+        if not full_content and len(chunk.content) > snippet_chars:
+            update["content"] = chunk.content[:snippet_chars]
+        slimmed.append(chunk.model_copy(update=update) if update else chunk)
+    return slimmed
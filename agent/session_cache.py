@@ -0,0 +1,193 @@
+"""
+In-process session cache and expired-session sweeper.
+
+Chat requests resolve their session on every call. Valid sessions are
+cached for a short time (never beyond their expiry) and unknown or expired
+ids are cached negatively, so repeated lookups skip the database. The
+sweeper periodically deletes expired sessions in batches.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .db_utils import delete_expired_sessions
+from .telemetry import CACHE_LOOKUPS
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "30"))
+SESSION_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_NEGATIVE_TTL_SECONDS", "60"))
+SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE", "10000"))
+# Seconds between expired-session sweeps (0 disables the sweeper)
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
+SESSION_SWEEP_BATCH_SIZE = int(os.getenv("SESSION_SWEEP_BATCH_SIZE", "1000"))
+
+
+class SessionCache:
+    """TTL cache of session validity, with negative entries."""
+    
+    def __init__(
+        self,
+        ttl_seconds: float = SESSION_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = SESSION_CACHE_NEGATIVE_TTL_SECONDS,
+        max_size: int = SESSION_CACHE_MAX_SIZE
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            ttl_seconds: How long a valid session is trusted
+            negative_ttl_seconds: How long an unknown/expired id is remembered
+            max_size: Maximum number of entries
+        """
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_size = max_size
+        # session_id -> (valid, monotonic deadline); dicts keep insertion order
+        self._entries: Dict[str, Tuple[bool, float]] = {}
+    
+    def get(self, session_id: str) -> Optional[bool]:
+        """
+        Look up a session.
+        
+        Args:
+            session_id: Session UUID
+        
+        Returns:
+            True if known valid, False if known invalid, None if unknown
+        """
+        entry = self._entries.get(session_id)
+        if entry is None:
+            CACHE_LOOKUPS.inc("session", "miss")
+            return None
+        
+        valid, deadline = entry
+        if time.monotonic() >= deadline:
+            del self._entries[session_id]
+            CACHE_LOOKUPS.inc("session", "miss")
+            return None
+        
+        CACHE_LOOKUPS.inc("session", "hit")
+        return valid
+    
+    def mark_valid(self, session_id: str, expires_at: Optional[str] = None) -> None:
+        """
+        Remember a session as valid.
+        
+        Args:
+            session_id: Session UUID
+            expires_at: Session expiry (ISO timestamp); caps the cache TTL
+        """
+        ttl = self.ttl_seconds
+        if expires_at:
+            remaining = (datetime.fromisoformat(expires_at) - datetime.now().astimezone()).total_seconds()
+            ttl = min(ttl, remaining)
+        if ttl > 0:
+            self._set(session_id, True, ttl)
+    
+    def mark_invalid(self, session_id: str) -> None:
+        """
+        Remember a session id as unknown or expired.
+        
+        Args:
+            session_id: Session UUID
+        """
+        self._set(session_id, False, self.negative_ttl_seconds)
+    
+    def invalidate(self, session_id: str) -> None:
+        """
+        Forget a session.
+        
+        Args:
+            session_id: Session UUID
+        """
+        self._entries.pop(session_id, None)
+    
+    def clear(self) -> None:
+        """Forget all sessions."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        """Number of cached entries."""
+        return len(self._entries)
+    
+    def _set(self, session_id: str, valid: bool, ttl: float) -> None:
+        """Store an entry, evicting the oldest when full."""
+        self._entries.pop(session_id, None)
+        if len(self._entries) >= self.max_size:
+            del self._entries[next(iter(self._entries))]
+        self._entries[session_id] = (valid, time.monotonic() + ttl)
+
+
+class SessionSweeper:
+    """Periodically deletes expired sessions."""
+    
+    def __init__(
+        self,
+        interval_seconds: float = SESSION_SWEEP_INTERVAL_SECONDS,
+        batch_size: int = SESSION_SWEEP_BATCH_SIZE
+    ):
+        """
+        Initialize the sweeper.
+        
+        Args:
+            interval_seconds: Seconds between sweeps
+            batch_size: Sessions deleted per statement
+        """
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Start sweeping in the background (no-op if disabled)."""
+        if self.interval_seconds <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Session sweeper started (every %ss)", self.interval_seconds)
+    
+    async def stop(self) -> None:
+        """Stop sweeping."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def sweep(self) -> int:
+        """
+        Delete expired sessions now.
+        
+        Returns:
+            Number of sessions deleted
+        """
+        deleted = await delete_expired_sessions(self.batch_size)
+        if deleted:
+            logger.info("Deleted %d expired sessions", deleted)
+        return deleted
+    
+    async def _run(self) -> None:
+        """Sweep every interval, surviving database errors."""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning("Expired session sweep failed: %s", e)
+
+
+# Global session cache instance
+session_cache = SessionCache()
+
+# Global session sweeper instance
+session_sweeper = SessionSweeper()
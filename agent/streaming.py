@@ -0,0 +1,228 @@
+"""
+Server-Sent Events streaming for agent runs.
+
+Agent runs are turned into a sequence of events (text deltas, tool call
+starts and finishes) and written as SSE frames. A bounded queue between
+the agent and the socket applies backpressure, idle periods send
+heartbeat comments, and a client disconnect cancels the run.
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, Any, List
+
+from dotenv import load_dotenv
+from pydantic_ai.messages import (
+    PartStartEvent,
+    PartDeltaEvent,
+    TextPartDelta,
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+    ToolReturnPart
+)
+
+from .telemetry import SSE_STREAMS_OPEN
+from .serialization import dumps
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Frames buffered ahead of a slow client before the agent run waits
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+# Words per text event when a non-streaming provider's answer is replayed
+PSEUDO_STREAM_WORDS = int(os.getenv("PSEUDO_STREAM_WORDS", "8"))
+
+HEARTBEAT_FRAME = ": ping\n\n"
+
+_WORD_PATTERN = re.compile(r"\s*\S+")
+
+
+def sse_event(data: Dict[str, Any]) -> str:
+    """
+    Format an event as an SSE data frame.
+    
+    Args:
+        data: JSON-serializable event with a "type" key
+    
+    Returns:
+        SSE frame
+    """
+    return f"data: {dumps(data).decode('utf-8')}\n\n"
+
+
+def split_words(text: str, words_per_chunk: int = PSEUDO_STREAM_WORDS) -> List[str]:
+    """
+    Split text into chunks at word boundaries.
+    
+    Whitespace is kept with the word that follows it, so joining the
+    chunks gives back the original text.
+    
+    Args:
+        text: Text to split
+        words_per_chunk: Words per chunk
+    
+    Returns:
+        List of chunks
+    """
+    words = _WORD_PATTERN.findall(text)
+    chunks = [
+        "".join(words[i:i + words_per_chunk])
+        for i in range(0, len(words), words_per_chunk)
+    ]
+    consumed = sum(len(chunk) for chunk in chunks)
+    if consumed < len(text):
+        # Trailing whitespace
+        if chunks:
+            chunks[-1] += text[consumed:]
+        else:
+            chunks.append(text)
+    return chunks
+
+
+class AgentEventStream:
+    """Runs an agent and yields its text and tool events as they happen."""
+    
+    def __init__(self, agent, prompt: str, deps, stream_text: bool = True):
+        """
+        Initialize the stream.
+        
+        Args:
+            agent: Pydantic AI agent
+            prompt: Prompt to run
+            deps: Agent dependencies
+            stream_text: Stream model tokens; when False (providers without
+                streaming support) the final answer is replayed in chunks
+        """
+        self.agent = agent
+        self.prompt = prompt
+        self.deps = deps
+        self.stream_text = stream_text
+        self.result = None
+        self._parts: List[str] = []
+    
+    @property
+    def text(self) -> str:
+        """Text streamed so far."""
+        return "".join(self._parts)
+    
+    def _text_event(self, content: str) -> Dict[str, Any]:
+        """Record and wrap a piece of answer text."""
+        self._parts.append(content)
+        return {"type": "text", "content": content}
+    
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield text, tool_start and tool_end events."""
+        tool_names: Dict[str, str] = {}
+        
+        async with self.agent.iter(self.prompt, deps=self.deps) as run:
+            async for node in run:
+                if self.stream_text and self.agent.is_model_request_node(node):
+                    async with node.stream(run.ctx) as request_stream:
+                        async for event in request_stream:
+                            if isinstance(event, PartStartEvent) and event.part.part_kind == 'text':
+                                if event.part.content:
+                                    yield self._text_event(event.part.content)
+                            elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+                                yield self._text_event(event.delta.content_delta)
+                
+                elif self.agent.is_call_tools_node(node):
+                    async with node.stream(run.ctx) as handle_stream:
+                        async for event in handle_stream:
+                            if isinstance(event, FunctionToolCallEvent):
+                                tool_names[event.part.tool_call_id] = event.part.tool_name
+                                yield {
+                                    "type": "tool_start",
+                                    "tool_name": event.part.tool_name,
+                                    "args": event.part.args_as_dict(),
+                                    "tool_call_id": event.part.tool_call_id
+                                }
+                            elif isinstance(event, FunctionToolResultEvent):
+                                yield {
+                                    "type": "tool_end",
+                                    "tool_name": tool_names.get(event.tool_call_id, event.result.tool_name),
+                                    "tool_call_id": event.tool_call_id,
+                                    "success": isinstance(event.result, ToolReturnPart)
+                                }
+            
+            self.result = run.result
+        
+        if not self.stream_text:
+            for chunk in split_words(str(self.result.data)):
+                yield self._text_event(chunk)
+                # Let the frame go out before the next one
+                await asyncio.sleep(0)
+
+
+async def with_heartbeats(
+    frames: AsyncIterator[str],
+    request=None,
+    heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS,
+    queue_size: int = SSE_QUEUE_SIZE
+) -> AsyncIterator[str]:
+    """
+    Relay SSE frames through a bounded queue, adding heartbeats.
+    
+    The frames are produced in a separate task. When the client reads
+    slowly the queue fills and the producer waits. When no frame arrives
+    for heartbeat_seconds a comment frame keeps proxies from closing the
+    connection, and the client is checked for a disconnect. Closing this
+    generator (client gone) cancels the producer and with it the agent run.
+    
+    Args:
+        frames: SSE frames to send
+        request: Starlette request used to detect disconnects
+        heartbeat_seconds: Idle time before a heartbeat
+        queue_size: Frames buffered ahead of the client
+    
+    Yields:
+        SSE frames
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    done = object()
+    failures: List[BaseException] = []
+    
+    async def produce():
+        try:
+            async for frame in frames:
+                await queue.put(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failures.append(e)
+        finally:
+            if hasattr(frames, "aclose"):
+                await frames.aclose()
+        await queue.put(done)
+    
+    producer = asyncio.create_task(produce())
+    SSE_STREAMS_OPEN.inc()
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if request is not None and await request.is_disconnected():
+                    logger.info("Stream client disconnected, cancelling agent run")
+                    return
+                yield HEARTBEAT_FRAME
+                continue
+            
+            if frame is done:
+                break
+            yield frame
+        
+        if failures:
+            raise failures[0]
+    finally:
+        SSE_STREAMS_OPEN.dec()
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
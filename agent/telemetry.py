@@ -0,0 +1,514 @@
+"""
+Request-scoped latency instrumentation.
+
+Pipeline stages (session lookup, context load, embedding, database and
+graph queries, LLM calls, persistence) are timed with span(). Each span is
+exported as an OpenTelemetry span, nested under the request's root span,
+and recorded in a Prometheus histogram served by /metrics.
+
+With TELEMETRY_ENABLED unset, span() returns a shared no-op context
+manager and traced() adds a single flag check per call.
+"""
+
+import os
+import time
+import bisect
+import logging
+import functools
+from contextlib import nullcontext
+from typing import Dict, Any, Callable, List, Optional, Tuple, Sequence
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "false").lower() == "true"
+
+# Histogram buckets in seconds, from a fast index lookup to a long LLM run
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NOOP_SPAN = nullcontext()
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _label_key(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a label set as a compact key for the JSON view."""
+    return ",".join(f"{name}={value}" for name, value in zip(names, values))
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with labels."""
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Initialize the histogram.
+        
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+            buckets: Upper bounds in ascending order (+Inf is implicit)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+    
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """
+        Record an observation.
+        
+        Args:
+            value: Observed value
+            labelvalues: Label values, in labelnames order
+        """
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def collect(self) -> Dict[Tuple[str, ...], Dict[str, Any]]:
+        """
+        Get a snapshot of every series.
+        
+        Returns:
+            Dict of label values -> {"count", "sum", "buckets": [(le, cumulative)]}
+        """
+        snapshot = {}
+        for labelvalues, (counts, total) in self._series.items():
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            snapshot[labelvalues] = {"count": cumulative, "sum": total, "buckets": buckets}
+        return snapshot
+    
+    def render(self) -> List[str]:
+        """
+        Render the histogram in the Prometheus text format.
+        
+        Returns:
+            Exposition lines
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram"
+        ]
+        for labelvalues, series in self.collect().items():
+            for bound, cumulative in series["buckets"]:
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get count and sum per series for the JSON metrics view.
+        
+        Returns:
+            Dict of label key -> {"count", "sum"}
+        """
+        return {
+            _label_key(self.labelnames, labelvalues): {"count": series["count"], "sum": series["sum"]}
+            for labelvalues, series in self.collect().items()
+        }
+
+
+class Counter:
+    """Monotonic Prometheus counter with labels."""
+    
+    metric_type = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the counter.
+        
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """
+        Add to a series.
+        
+        Args:
+            labelvalues: Label values, in labelnames order
+            amount: Increment
+        """
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+    
+    def value(self, *labelvalues: str) -> float:
+        """Get the current value of a series."""
+        return self._values.get(labelvalues, 0)
+    
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        """Get a copy of every series."""
+        values = dict(self._values)
+        if not self.labelnames and not values:
+            values[()] = 0
+        return values
+    
+    def render(self) -> List[str]:
+        """
+        Render the metric in the Prometheus text format.
+        
+        Returns:
+            Exposition lines
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        for labelvalues, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+    
+    def snapshot(self) -> Any:
+        """
+        Get values for the JSON metrics view.
+        
+        Returns:
+            The value for an unlabelled metric, else a dict of label key -> value
+        """
+        values = self.collect()
+        if not self.labelnames:
+            return values.get((), 0)
+        return {_label_key(self.labelnames, labelvalues): value for labelvalues, value in values.items()}
+
+
+class Gauge(Counter):
+    """Prometheus gauge that can go up and down."""
+    
+    metric_type = "gauge"
+    
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        """
+        Subtract from a series.
+        
+        Args:
+            labelvalues: Label values, in labelnames order
+            amount: Decrement
+        """
+        self.inc(*labelvalues, amount=-amount)
+    
+    def set(self, value: float, *labelvalues: str) -> None:
+        """
+        Set a series.
+        
+        Args:
+            value: New value
+            labelvalues: Label values, in labelnames order
+        """
+        self._values[labelvalues] = value
+
+
+class CallbackMetric(Counter):
+    """
+    Metric whose series are read from live objects at scrape time.
+    
+    The callback must only read in-memory state (no I/O), so a scrape
+    never waits on a database or the network.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        metric_type: str = "gauge"
+    ):
+        """
+        Initialize the metric.
+        
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+            callback: Returns a dict of label values -> value
+            metric_type: "gauge" or "counter"
+        """
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.metric_type = metric_type
+    
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        """Read the current series, logging (not raising) callback errors."""
+        try:
+            return self.callback()
+        except Exception as e:
+            logger.warning("Collecting %s failed: %s", self.name, e)
+            return {}
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /metrics."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.metrics: List[Any] = []
+    
+    def register(self, metric: Any) -> Any:
+        """
+        Add a metric.
+        
+        Args:
+            metric: Object with a render() method returning exposition lines
+        
+        Returns:
+            The metric
+        """
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+        
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all metrics as a JSON-serializable dict.
+        
+        Returns:
+            Dict of metric name -> value(s)
+        """
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+
+# Global metrics registry instance
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "rag_stage_duration_seconds",
+    "Duration of RAG pipeline stages",
+    ("stage", "status")
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "rag_request_duration_seconds",
+    "Duration of HTTP requests, including streamed bodies",
+    ("method", "endpoint", "status")
+))
+EMBEDDING_IN_FLIGHT = registry.register(Gauge(
+    "rag_embedding_requests_in_flight",
+    "Query embedding requests waiting on the provider"
+))
+EMBEDDING_REQUESTS = registry.register(Counter(
+    "rag_embedding_requests_total",
+    "Query embedding requests by outcome (ok, rate_limited, error)",
+    ("outcome",)
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "rag_cache_lookups_total",
+    "Cache lookups by cache and result (hit, miss)",
+    ("cache", "result")
+))
+SSE_STREAMS_OPEN = registry.register(Gauge(
+    "rag_sse_streams_open",
+    "Chat streams currently open"
+))
+ADMISSION_REJECTED = registry.register(Counter(
+    "rag_admission_rejected_total",
+    "Requests shed with 429 by lane and reason (queue_full, timeout)",
+    ("lane", "reason")
+))
+
+_tracer = None
+
+
+def get_tracer():
+    """
+    Get the OpenTelemetry tracer, or None without opentelemetry-api.
+    
+    Spans go to whatever tracer provider the process configures (no-op
+    by default).
+    """
+    global _tracer
+    
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            logger.warning("opentelemetry-api not installed, only histograms are recorded")
+            _tracer = False
+        else:
+            _tracer = trace.get_tracer("agent")
+    
+    return _tracer or None
+
+
+class Span:
+    """Times a stage and exports it as an OpenTelemetry span."""
+    
+    __slots__ = ("name", "attributes", "_start", "_otel")
+    
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the span.
+        
+        Args:
+            name: Stage name, e.g. "db.vector_search"
+            attributes: Span attributes
+        """
+        self.name = name
+        self.attributes = attributes
+        self._start = 0.0
+        self._otel = None
+    
+    def __enter__(self) -> "Span":
+        tracer = get_tracer()
+        if tracer is not None:
+            self._otel = tracer.start_as_current_span(self.name, attributes=self.attributes)
+            self._otel.__enter__()
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self._start
+        STAGE_SECONDS.observe(duration, self.name, "error" if exc_type else "ok")
+        if self._otel is not None:
+            self._otel.__exit__(exc_type, exc, tb)
+        return False
+
+
+def span(name: str, **attributes: Any):
+    """
+    Time a pipeline stage.
+    
+    Usable as a context manager in sync and async code; OpenTelemetry
+    context propagates through asyncio tasks, so spans nest per request.
+    
+    Args:
+        name: Stage name, e.g. "db.vector_search"
+        attributes: Span attributes
+    
+    Returns:
+        Context manager (a shared no-op when telemetry is disabled)
+    """
+    if not TELEMETRY_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attributes or None)
+
+
+def traced(name: str):
+    """
+    Decorate an async function so each call is timed as a span.
+    
+    Args:
+        name: Stage name
+    
+    Returns:
+        Decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not TELEMETRY_ENABLED:
+                return await func(*args, **kwargs)
+            with Span(name):
+                return await func(*args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+class TelemetryMiddleware:
+    """ASGI middleware opening a root span and timing each HTTP request."""
+    
+    def __init__(self, app):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: ASGI application
+        """
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TELEMETRY_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        status = {"code": 500}
+        
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        tracer = get_tracer()
+        root = (
+            tracer.start_as_current_span(f"{scope['method']} {scope['path']}", attributes={"http.method": scope["method"]})
+            if tracer is not None else nullcontext()
+        )
+        start = time.perf_counter()
+        with root:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # Route endpoint rather than raw path keeps label cardinality bounded
+                endpoint = scope.get("endpoint")
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - start,
+                    scope["method"],
+                    getattr(endpoint, "__name__", "unmatched"),
+                    str(status["code"])
+                )
+
+
+def instrument_agents() -> None:
+    """Export pydantic_ai's per-LLM-call spans when telemetry is enabled."""
+    if not TELEMETRY_ENABLED:
+        return
+    
+    from pydantic_ai import Agent
+    
+    Agent.instrument_all()
@@ -8,10 +8,13 @@ from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 import asyncio
 
+import numpy as np
+import openai
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 from .db_utils import (
+    get_chunk_embeddings,
     vector_search,
     hybrid_search,
     get_document,
@@ -21,9 +24,12 @@ from .db_utils import (
 from .graph_utils import (
     search_knowledge_graph,
     get_entity_relationships,
-    graph_client
+    get_entity_timeline
 )
-from .models import ChunkResult, GraphSearchResult, DocumentMetadata
+from .models import ChunkResult, GraphSearchResult, DocumentMetadata, SearchFilters
+from .rerank import rerank, candidate_count
+from .diversify import near_duplicate_keep_mask, mmr_select, MMR_LAMBDA
+from .telemetry import traced, EMBEDDING_IN_FLIGHT, EMBEDDING_REQUESTS
 from .providers import get_embedding_client, get_embedding_model
 from .schemas import ProviderType, convert_to_provider_format, convert_from_provider_format
 from duckduckgo_search import DDGS  # <-- Add this import
@@ -40,7 +46,11 @@ logger = logging.getLogger(__name__)
 embedding_client = get_embedding_client()
 EMBEDDING_MODEL = get_embedding_model()
 
+# Latency budget for perform_comprehensive_search; branches still running are cancelled
+RETRIEVAL_BUDGET_MS = int(os.getenv("RETRIEVAL_BUDGET_MS", "3000"))
 
+
+@traced("embedding.query")
 async def generate_embedding(text: str) -> List[float]:
     """
     Generate embedding for text using OpenAI.
@@ -55,6 +65,7 @@ async def generate_embedding(text: str) -> List[float]:
     logger.debug("Using embedding model: %s", EMBEDDING_MODEL)
     
     start_time = datetime.now()
+    EMBEDDING_IN_FLIGHT.inc()
     try:
         response = await embedding_client.embeddings.create(
             model=EMBEDDING_MODEL,
@@ -64,12 +75,48 @@ async def generate_embedding(text: str) -> List[float]:
         duration = (end_time - start_time).total_seconds() * 1000
         
         embedding = response.data[0].embedding
+        EMBEDDING_REQUESTS.inc("ok")
         logger.debug("Embedding generated successfully in %.2f ms, vector length: %d", duration, len(embedding))
         return embedding
     except Exception as e:
+        EMBEDDING_REQUESTS.inc("rate_limited" if isinstance(e, openai.RateLimitError) else "error")
         logger.error("Failed to generate embedding: %s", e)
         logger.debug("Embedding generation error details", exc_info=True)
         raise
+    finally:
+        EMBEDDING_IN_FLIGHT.dec()
+
+
+@traced("embedding.batch")
+async def generate_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for several texts in one provider call.
+    
+    Args:
+        texts: Texts to embed
+    
+    Returns:
+        Embedding vectors, in the order of texts
+    """
+    if not texts:
+        return []
+    
+    EMBEDDING_IN_FLIGHT.inc()
+    try:
+        response = await embedding_client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts
+        )
+        EMBEDDING_REQUESTS.inc("ok")
+    except Exception as e:
+        EMBEDDING_REQUESTS.inc("rate_limited" if isinstance(e, openai.RateLimitError) else "error")
+        logger.error("Failed to generate %d embeddings: %s", len(texts), e)
+        raise
+    finally:
+        EMBEDDING_IN_FLIGHT.dec()
+    
+    # Providers may return items out of order; index is authoritative
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
 
 
 # Tool Input Models
@@ -77,6 +124,10 @@ class VectorSearchInput(BaseModel):
     """Input for vector search tool."""
     query: str = Field(..., description="Search query")
     limit: int = Field(default=10, description="Maximum number of results")
+    filters: SearchFilters = Field(default_factory=SearchFilters, description="Document filters")
+    dedup: bool = Field(default=False, description="Collapse near-duplicate chunks")
+    diversify: bool = Field(default=False, description="Select chunks with Maximal Marginal Relevance")
+    mmr_lambda: float = Field(default=MMR_LAMBDA, ge=0.0, le=1.0, description="MMR relevance weight (1 = relevance only)")
 
 
 class GraphSearchInput(BaseModel):
@@ -89,6 +140,10 @@ class HybridSearchInput(BaseModel):
     query: str = Field(..., description="Search query")
     limit: int = Field(default=10, description="Maximum number of results")
     text_weight: float = Field(default=0.3, description="Weight for text similarity (0-1)")
+    filters: SearchFilters = Field(default_factory=SearchFilters, description="Document filters")
+    dedup: bool = Field(default=False, description="Collapse near-duplicate chunks")
+    diversify: bool = Field(default=False, description="Select chunks with Maximal Marginal Relevance")
+    mmr_lambda: float = Field(default=MMR_LAMBDA, ge=0.0, le=1.0, description="MMR relevance weight (1 = relevance only)")
 
 
 class DocumentInput(BaseModel):
@@ -100,12 +155,14 @@ class DocumentListInput(BaseModel):
     """Input for listing documents."""
     limit: int = Field(default=20, description="Maximum number of documents")
     offset: int = Field(default=0, description="Number of documents to skip")
+    cursor: Optional[str] = Field(default=None, description="Cursor from the previous page")
 
 
 class EntityRelationshipInput(BaseModel):
     """Input for entity relationship query."""
     entity_name: str = Field(..., description="Name of the entity")
     depth: int = Field(default=2, description="Maximum traversal depth")
+    relationship_types: Optional[List[str]] = Field(default=None, description="Relationship names to follow")
 
 
 class EntityTimelineInput(BaseModel):
@@ -113,6 +170,8 @@ class EntityTimelineInput(BaseModel):
     entity_name: str = Field(..., description="Name of the entity")
     start_date: str = Field("", description="Start date (ISO format)")
     end_date: str = Field("", description="End date (ISO format)")
+    limit: int = Field(default=20, ge=1, le=100, description="Maximum facts per page")
+    cursor: str = Field("", description="Cursor from the previous page")
 
 
 class WebSearchInput(BaseModel):
@@ -160,162 +219,316 @@ class ListMessagesInput(BaseModel):
 
 
 # Tool Implementation Functions
-async def vector_search_tool(input_data: VectorSearchInput) -> List[ChunkResult]:
+async def _refine_chunks(
+    input_data: Union[VectorSearchInput, HybridSearchInput],
+    candidates: List[ChunkResult],
+    embedding: List[float],
+    stage_timings: Dict[str, float]
+) -> List[ChunkResult]:
     """
-    Perform vector similarity search.
+    Cut over-fetched candidates down to the requested limit.
+    
+    Near-duplicates are collapsed first, then candidates are reranked; with
+    diversify on, MMR picks the final chunks from the reranked scores.
+    
+    Args:
+        input_data: Search parameters
+        candidates: Retrieved chunks, best first
+        embedding: Query embedding
+        stage_timings: Dict that receives per-stage timings in ms
+    
+    Returns:
+        Final chunks
+    """
+    if input_data.dedup and candidates:
+        start_time = datetime.now()
+        keep = near_duplicate_keep_mask([c.content for c in candidates])
+        candidates = [c for c, k in zip(candidates, keep) if k]
+        stage_timings["dedup_ms"] = (datetime.now() - start_time).total_seconds() * 1000
+    
+    if not input_data.diversify:
+        candidates, rerank_timings = await rerank(input_data.query, candidates, input_data.limit)
+        stage_timings.update(rerank_timings)
+        return candidates
+    
+    candidates, rerank_timings = await rerank(input_data.query, candidates, len(candidates))
+    stage_timings.update(rerank_timings)
+    
+    start_time = datetime.now()
+    stored = await get_chunk_embeddings([c.chunk_id for c in candidates])
+    # Chunks without a stored embedding can't take part in MMR
+    candidates = [c for c in candidates if c.chunk_id in stored]
+    selected = mmr_select(
+        embedding,
+        np.array([stored[c.chunk_id] for c in candidates], dtype=np.float32),
+        input_data.limit,
+        lambda_mult=input_data.mmr_lambda,
+        relevance=np.array([c.score for c in candidates], dtype=np.float32)
+    )
+    stage_timings["mmr_ms"] = (datetime.now() - start_time).total_seconds() * 1000
+    
+    return [candidates[i] for i in selected]
+
+
+async def _run_vector_search(
+    input_data: VectorSearchInput,
+    query_embedding: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[ChunkResult]:
+    """
+    Run vector similarity search, raising on failure.
+    
+    Candidates are over-fetched and reranked down to the requested limit.
     
     Args:
         input_data: Search parameters
+        query_embedding: Precomputed query embedding, generated if omitted
+        timings: Optional dict that receives per-stage timings in ms
     
     Returns:
         List of matching chunks
     """
-    logger.debug("Vector search tool called with input: %s", input_data)
+    stage_timings = timings if timings is not None else {}
     
-    try:
-        # Generate embedding for the query
+    embedding = query_embedding
+    if embedding is None:
         logger.debug("Generating embedding for vector search")
-        embedding = await generate_embedding(input_data.query)
-        
-        # Perform vector search
-        logger.debug("Performing vector search with embedding length: %d, limit: %d", len(embedding), input_data.limit)
         start_time = datetime.now()
-        
-        results = await vector_search(
-            embedding=embedding,
-            limit=input_data.limit
+        embedding = await generate_embedding(input_data.query)
+        stage_timings["embed_ms"] = (datetime.now() - start_time).total_seconds() * 1000
+    
+    # Perform vector search
+    logger.debug("Performing vector search with embedding length: %d, limit: %d", len(embedding), input_data.limit)
+    start_time = datetime.now()
+    
+    results = await vector_search(
+        embedding=embedding,
+        limit=candidate_count(input_data.limit, input_data.dedup or input_data.diversify),
+        filters=input_data.filters.to_sql_filters()
+    )
+    
+    end_time = datetime.now()
+    duration = (end_time - start_time).total_seconds() * 1000
+    stage_timings["retrieve_ms"] = duration
+    logger.debug("Vector search completed in %.2f ms, found %d raw results", duration, len(results))
+
+    # Convert to ChunkResult models
+    chunk_results = [
+        ChunkResult(
+            chunk_id=str(r["chunk_id"]),
+            document_id=str(r["document_id"]),
+            content=r["content"],
+            score=r["similarity"],
+            metadata=r["metadata"],
+            document_title=r["document_title"],
+            document_source=r["document_source"]
         )
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        logger.debug("Vector search completed in %.2f ms, found %d raw results", duration, len(results))
-
-        # Convert to ChunkResult models
-        chunk_results = [
-            ChunkResult(
-                chunk_id=str(r["chunk_id"]),
-                document_id=str(r["document_id"]),
-                content=r["content"],
-                score=r["similarity"],
-                metadata=r["metadata"],
-                document_title=r["document_title"],
-                document_source=r["document_source"]
-            )
-            for r in results
-        ]
-        
-        logger.debug("Converted %d results to ChunkResult models", len(chunk_results))
-        return chunk_results
-        
+        for r in results
+    ]
+    
+    chunk_results = await _refine_chunks(input_data, chunk_results, embedding, stage_timings)
+    
+    logger.debug("Returning %d chunks, stage timings: %s", len(chunk_results), stage_timings)
+    return chunk_results
+
+
+async def vector_search_tool(
+    input_data: VectorSearchInput,
+    query_embedding: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[ChunkResult]:
+    """
+    Perform vector similarity search.
+    
+    Candidates are over-fetched and reranked down to the requested limit.
+    
+    Args:
+        input_data: Search parameters
+        query_embedding: Precomputed query embedding, generated if omitted
+        timings: Optional dict that receives per-stage timings in ms
+    
+    Returns:
+        List of matching chunks (empty if the search failed)
+    """
+    logger.debug("Vector search tool called with input: %s", input_data)
+    
+    try:
+        return await _run_vector_search(input_data, query_embedding, timings)
     except Exception as e:
         logger.error("Vector search failed: %s", e)
         logger.debug("Vector search error details", exc_info=True)
         return []
 
 
-async def graph_search_tool(input_data: GraphSearchInput) -> List[GraphSearchResult]:
+async def _run_graph_search(
+    input_data: GraphSearchInput,
+    query_embedding: Optional[List[float]] = None
+) -> List[GraphSearchResult]:
     """
-    Search the knowledge graph.
+    Run a knowledge graph search, raising on failure.
     
     Args:
         input_data: Search parameters
+        query_embedding: Precomputed query embedding, generated if omitted
     
     Returns:
         List of graph search results
     """
-    logger.debug("Graph search tool called with input: %s", input_data)
+    logger.debug("Performing knowledge graph search")
+    start_time = datetime.now()
     
-    try:
-        logger.debug("Performing knowledge graph search")
-        start_time = datetime.now()
-        
-        results = await search_knowledge_graph(
-            query=input_data.query
-        )
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        logger.debug("Knowledge graph search completed in %.2f ms, found %d raw results", duration, len(results))
-        
-        # Convert database results to provider format for Cohere compatibility
-        provider = ProviderType.COHERE  # Default to Cohere for now
-        converted_results = []
-        
-        for r in results:
-            # Convert database format to provider format
-            provider_data = convert_to_provider_format(r, provider)
-            
-            # Convert back to database format for GraphSearchResult
-            db_data = convert_from_provider_format(provider_data, provider, "relationship")
-            
-            graph_results = GraphSearchResult(
-                fact=db_data.get("fact", r.get("fact", "")),
-                uuid=db_data.get("uuid", r.get("uuid", "")),
-                valid_at=db_data.get("valid_at", r.get("valid_at")),
-                invalid_at=db_data.get("invalid_at", r.get("invalid_at")),
-                source_node_uuid=db_data.get("source_node_uuid", r.get("source_node_uuid"))
-            )
-            converted_results.append(graph_results)
+    # Embed the query so facts can be matched by similarity, not just keywords
+    if query_embedding is None:
+        try:
+            query_embedding = await generate_embedding(input_data.query)
+        except Exception as e:
+            logger.warning("Query embedding failed, using text-only graph search: %s", e)
+    
+    results = await search_knowledge_graph(
+        query=input_data.query,
+        query_embedding=query_embedding
+    )
+    
+    end_time = datetime.now()
+    duration = (end_time - start_time).total_seconds() * 1000
+    logger.debug("Knowledge graph search completed in %.2f ms, found %d raw results", duration, len(results))
+    
+    # Convert database results to provider format for Cohere compatibility
+    provider = ProviderType.COHERE  # Default to Cohere for now
+    converted_results = []
+    
+    for r in results:
+        # Convert database format to provider format
+        provider_data = convert_to_provider_format(r, provider)
         
-        logger.debug("Converted %d results to GraphSearchResult models", len(converted_results))
-        return converted_results
+        # Convert back to database format for GraphSearchResult
+        db_data = convert_from_provider_format(provider_data, provider, "relationship")
         
+        graph_results = GraphSearchResult(
+            fact=db_data.get("fact", r.get("fact", "")),
+            uuid=db_data.get("uuid", r.get("uuid", "")),
+            valid_at=db_data.get("valid_at", r.get("valid_at")),
+            invalid_at=db_data.get("invalid_at", r.get("invalid_at")),
+            source_node_uuid=db_data.get("source_node_uuid", r.get("source_node_uuid")),
+            score=r.get("score")
+        )
+        converted_results.append(graph_results)
+    
+    logger.debug("Converted %d results to GraphSearchResult models", len(converted_results))
+    return converted_results
+
+
+async def graph_search_tool(
+    input_data: GraphSearchInput,
+    query_embedding: Optional[List[float]] = None
+) -> List[GraphSearchResult]:
+    """
+    Search the knowledge graph.
+    
+    Args:
+        input_data: Search parameters
+        query_embedding: Precomputed query embedding, generated if omitted
+    
+    Returns:
+        List of graph search results (empty if the search failed)
+    """
+    logger.debug("Graph search tool called with input: %s", input_data)
+    
+    try:
+        return await _run_graph_search(input_data, query_embedding)
     except Exception as e:
         logger.error("Graph search failed: %s", e)
         logger.debug("Graph search error details", exc_info=True)
         return []
 
 
-async def hybrid_search_tool(input_data: HybridSearchInput) -> List[ChunkResult]:
+async def _run_hybrid_search(
+    input_data: HybridSearchInput,
+    query_embedding: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[ChunkResult]:
     """
-    Perform hybrid search (vector + keyword).
+    Run hybrid (vector + keyword) search, raising on failure.
+    
+    Candidates are over-fetched and reranked down to the requested limit.
     
     Args:
         input_data: Search parameters
+        query_embedding: Precomputed query embedding, generated if omitted
+        timings: Optional dict that receives per-stage timings in ms
     
     Returns:
         List of matching chunks
     """
-    logger.debug("Hybrid search tool called with input: %s", input_data)
+    stage_timings = timings if timings is not None else {}
     
-    try:
-        # Generate embedding for the query
+    embedding = query_embedding
+    if embedding is None:
         logger.debug("Generating embedding for hybrid search")
-        embedding = await generate_embedding(input_data.query)
-        
-        # Perform hybrid search
-        logger.debug("Performing hybrid search with embedding length: %d, limit: %d, text_weight: %.2f", 
-                    len(embedding), input_data.limit, input_data.text_weight)
         start_time = datetime.now()
-        
-        results = await hybrid_search(
-            embedding=embedding,
-            query_text=input_data.query,
-            limit=input_data.limit,
-            text_weight=input_data.text_weight
+        embedding = await generate_embedding(input_data.query)
+        stage_timings["embed_ms"] = (datetime.now() - start_time).total_seconds() * 1000
+    
+    # Perform hybrid search
+    logger.debug("Performing hybrid search with embedding length: %d, limit: %d, text_weight: %.2f", 
+                len(embedding), input_data.limit, input_data.text_weight)
+    start_time = datetime.now()
+    
+    results = await hybrid_search(
+        embedding=embedding,
+        query_text=input_data.query,
+        limit=candidate_count(input_data.limit, input_data.dedup or input_data.diversify),
+        text_weight=input_data.text_weight,
+        filters=input_data.filters.to_sql_filters()
+    )
+    
+    end_time = datetime.now()
+    duration = (end_time - start_time).total_seconds() * 1000
+    stage_timings["retrieve_ms"] = duration
+    logger.debug("Hybrid search completed in %.2f ms, found %d raw results", duration, len(results))
+    
+    # Convert to ChunkResult models
+    chunk_results = [
+        ChunkResult(
+            chunk_id=str(r["chunk_id"]),
+            document_id=str(r["document_id"]),
+            content=r["content"],
+            score=r["combined_score"],
+            metadata=r["metadata"],
+            document_title=r["document_title"],
+            document_source=r["document_source"]
         )
-        
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds() * 1000
-        logger.debug("Hybrid search completed in %.2f ms, found %d raw results", duration, len(results))
-        
-        # Convert to ChunkResult models
-        chunk_results = [
-            ChunkResult(
-                chunk_id=str(r["chunk_id"]),
-                document_id=str(r["document_id"]),
-                content=r["content"],
-                score=r["combined_score"],
-                metadata=r["metadata"],
-                document_title=r["document_title"],
-                document_source=r["document_source"]
-            )
-            for r in results
-        ]
-        
-        logger.debug("Converted %d results to ChunkResult models", len(chunk_results))
-        return chunk_results
-        
+        for r in results
+    ]
+    
+    chunk_results = await _refine_chunks(input_data, chunk_results, embedding, stage_timings)
+    
+    logger.debug("Returning %d chunks, stage timings: %s", len(chunk_results), stage_timings)
+    return chunk_results
+
+
+async def hybrid_search_tool(
+    input_data: HybridSearchInput,
+    query_embedding: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> List[ChunkResult]:
+    """
+    Perform hybrid search (vector + keyword).
+    
+    Candidates are over-fetched and reranked down to the requested limit.
+    
+    Args:
+        input_data: Search parameters
+        query_embedding: Precomputed query embedding, generated if omitted
+        timings: Optional dict that receives per-stage timings in ms
+    
+    Returns:
+        List of matching chunks (empty if the search failed)
+    """
+    logger.debug("Hybrid search tool called with input: %s", input_data)
+    
+    try:
+        return await _run_hybrid_search(input_data, query_embedding, timings)
     except Exception as e:
         logger.error("Hybrid search failed: %s", e)
         logger.debug("Hybrid search error details", exc_info=True)
@@ -332,14 +545,12 @@ async def web_search_tool(input_data: WebSearchInput) -> List[Dict[str, Any]]:
     """
     logger.debug("Web search tool called with input: %s", input_data)
     try:
-        with DDGS() as ddgs:
-            # Use better search parameters for more relevant results
-            results = list(ddgs.text(
-                input_data.query,
-                max_results=input_data.max_results * 2,  # Get more results to filter
-                region='us-en',
-                safesearch='off'
-            ))
+        # DDGS is synchronous; run it in a thread so it doesn't block the event loop
+        results = await asyncio.to_thread(
+            _ddgs_text_search,
+            input_data.query,
+            input_data.max_results * 2  # Get more results to filter
+        )
         
         # Filter and rank results for relevance
         formatted_results = []
@@ -385,6 +596,18 @@ async def web_search_tool(input_data: WebSearchInput) -> List[Dict[str, Any]]:
         return _get_fallback_web_results(input_data.query, input_data.max_results)
 
 
+def _ddgs_text_search(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """Run a blocking DuckDuckGo text search."""
+    with DDGS() as ddgs:
+        # Use better search parameters for more relevant results
+        return list(ddgs.text(
+            query,
+            max_results=max_results,
+            region='us-en',
+            safesearch='off'
+        ))
+
+
 def _get_fallback_web_results(query: str, max_results: int) -> List[Dict[str, Any]]:
     """Provide relevant fallback results when web search fails or returns poor results."""
     query_lower = query.lower()
@@ -564,7 +787,8 @@ async def list_documents_tool(input_data: DocumentListInput) -> List[DocumentMet
     try:
         documents = await list_documents(
             limit=input_data.limit,
-            offset=input_data.offset
+            offset=input_data.offset,
+            cursor=input_data.cursor
         )
         
         # Convert to DocumentMetadata models
@@ -599,7 +823,8 @@ async def get_entity_relationships_tool(input_data: EntityRelationshipInput) ->
     try:
         return await get_entity_relationships(
             entity=input_data.entity_name,
-            depth=input_data.depth
+            depth=input_data.depth,
+            relationship_types=input_data.relationship_types
         )
         
     except Exception as e:
@@ -613,7 +838,7 @@ async def get_entity_relationships_tool(input_data: EntityRelationshipInput) ->
         }
 
 
-async def get_entity_timeline_tool(input_data: EntityTimelineInput) -> List[Dict[str, Any]]:
+async def get_entity_timeline_tool(input_data: EntityTimelineInput) -> Dict[str, Any]:
     """
     Get timeline of facts for an entity.
     
@@ -621,7 +846,7 @@ async def get_entity_timeline_tool(input_data: EntityTimelineInput) -> List[Dict
         input_data: Timeline query parameters
     
     Returns:
-        Timeline of facts
+        Timeline page (facts sorted by time) with next_cursor
     """
     try:
         # Parse dates if provided
@@ -634,17 +859,22 @@ async def get_entity_timeline_tool(input_data: EntityTimelineInput) -> List[Dict
             end_date = datetime.fromisoformat(input_data.end_date)
         
         # Get timeline from graph
-        timeline = await graph_client.get_entity_timeline(
-            entity_name=input_data.entity_name,
+        return await get_entity_timeline(
+            entity=input_data.entity_name,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            limit=input_data.limit,
+            cursor=input_data.cursor or None
         )
         
-        return timeline
-        
     except Exception as e:
         logger.error(f"Entity timeline query failed: {e}")
-        return []
+        return {
+            "entity_name": input_data.entity_name,
+            "timeline": [],
+            "next_cursor": None,
+            "error": str(e)
+        }
 
 
 # Combined search function for agent use
@@ -652,47 +882,142 @@ async def perform_comprehensive_search(
     query: str,
     use_vector: bool = True,
     use_graph: bool = True,
-    limit: int = 10
+    limit: int = 10,
+    use_hybrid: bool = False,
+    use_web: bool = False,
+    budget_ms: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Perform a comprehensive search using multiple methods.
     
+    All enabled branches run concurrently and share one query embedding.
+    Whatever has finished when the latency budget runs out is returned;
+    branches still running are cancelled and reported as timed out, and
+    branches that raise are reported as errors.
+    
     Args:
         query: Search query
         use_vector: Whether to use vector search
         use_graph: Whether to use graph search
-        limit: Maximum results per search type (only applies to vector search)
+        limit: Maximum results per search type (not applied to graph search)
+        use_hybrid: Whether to use hybrid (vector + keyword) search
+        use_web: Whether to use web search
+        budget_ms: Latency budget in milliseconds (defaults to RETRIEVAL_BUDGET_MS)
     
     Returns:
-        Combined search results
+        Combined search results, with per-branch status under "sources"
     """
+    loop = asyncio.get_running_loop()
+    budget = (RETRIEVAL_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+    deadline = loop.time() + budget
+    
     results = {
         "query": query,
         "vector_results": [],
+        "hybrid_results": [],
         "graph_results": [],
+        "web_results": [],
+        "sources": {},
         "total_results": 0
     }
     
-    tasks = []
+    enabled = {
+        "vector": use_vector,
+        "hybrid": use_hybrid,
+        "graph": use_graph,
+        "web": use_web
+    }
+    
+    # Embed once; every branch that needs the embedding awaits the same task.
+    # Branches await it through shield() so cancelling one branch leaves it alone.
+    embedding_task = None
+    if use_vector or use_hybrid or use_graph:
+        embedding_task = asyncio.ensure_future(generate_embedding(query))
     
-    if use_vector:
-        tasks.append(vector_search_tool(VectorSearchInput(query=query, limit=limit)))
+    async def vector_branch():
+        embedding = await asyncio.shield(embedding_task)
+        return await _run_vector_search(
+            VectorSearchInput(query=query, limit=limit), query_embedding=embedding
+        )
     
-    if use_graph:
-        tasks.append(graph_search_tool(GraphSearchInput(query=query)))
+    async def hybrid_branch():
+        embedding = await asyncio.shield(embedding_task)
+        return await _run_hybrid_search(
+            HybridSearchInput(query=query, limit=limit), query_embedding=embedding
+        )
+    
+    async def graph_branch():
+        try:
+            embedding = await asyncio.shield(embedding_task)
+        except Exception as e:
+            logger.warning("Query embedding failed, using text-only graph search: %s", e)
+            embedding = None
+        return await _run_graph_search(GraphSearchInput(query=query), query_embedding=embedding)
+    
+    async def web_branch():
+        return await web_search_tool(WebSearchInput(query=query, max_results=limit))
+    
+    branches = {
+        "vector": vector_branch,
+        "hybrid": hybrid_branch,
+        "graph": graph_branch,
+        "web": web_branch
+    }
+    durations: Dict[str, float] = {}
     
+    async def timed(name: str):
+        start = loop.time()
+        try:
+            return await branches[name]()
+        finally:
+            durations[name] = (loop.time() - start) * 1000
+    
+    tasks = {
+        asyncio.ensure_future(timed(name)): name
+        for name, on in enabled.items() if on
+    }
+    
+    done, pending = set(), set()
     if tasks:
-        search_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        if use_vector and not isinstance(search_results[0], Exception):
-            results["vector_results"] = search_results[0]
+        done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - loop.time()))
+    
+    for task in pending:
+        task.cancel()
+    if embedding_task is not None and not embedding_task.done():
+        embedding_task.cancel()
+    
+    for name, on in enabled.items():
+        if not on:
+            results["sources"][name] = {"status": "disabled"}
+    
+    for task in pending:
+        name = tasks[task]
+        logger.warning("%s search missed the %.0f ms retrieval budget, cancelled", name, budget * 1000)
+        results["sources"][name] = {"status": "timeout", "duration_ms": round(budget * 1000, 2)}
+    
+    for task in done:
+        name = tasks[task]
+        error = task.exception()
+        if error is not None:
+            logger.error("%s search failed: %s", name, error)
+            results["sources"][name] = {
+                "status": "error",
+                "error": str(error),
+                "duration_ms": round(durations.get(name, 0.0), 2)
+            }
+            continue
         
-        if use_graph:
-            graph_idx = 1 if use_vector else 0
-            if not isinstance(search_results[graph_idx], Exception):
-                results["graph_results"] = search_results[graph_idx]
+        branch_results = task.result()
+        results[f"{name}_results"] = branch_results
+        results["sources"][name] = {
+            "status": "included",
+            "count": len(branch_results),
+            "duration_ms": round(durations.get(name, 0.0), 2)
+        }
     
-    results["total_results"] = len(results["vector_results"]) + len(results["graph_results"])
+    results["total_results"] = sum(
+        len(results[f"{name}_results"]) for name in enabled
+    )
     
     return results
 
@@ -0,0 +1,165 @@
+"""
+Agent statistics shared across API worker processes.
+
+Each worker keeps its own counters in memory (the master agents'
+agent_stats). With several workers, every process periodically writes its
+counters to the worker_stats table and the stats endpoints sum the rows of
+live workers, so they report the same totals whichever process answers.
+"""
+
+import os
+import json
+import socket
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .db_utils import db_pool, APP_WORKERS
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Share stats through Postgres; on by default when running several workers
+SHARED_STATS_ENABLED = os.getenv("SHARED_STATS_ENABLED", "true" if APP_WORKERS > 1 else "false").lower() == "true"
+WORKER_STATS_INTERVAL_SECONDS = float(os.getenv("WORKER_STATS_INTERVAL_SECONDS", "5"))
+# Workers that haven't reported for this long are treated as gone
+WORKER_STATS_STALE_SECONDS = float(os.getenv("WORKER_STATS_STALE_SECONDS", "60"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Stats source: returns (agent_stats, task_count)
+StatsSource = Callable[[], Tuple[Dict[str, Dict[str, int]], int]]
+
+
+async def publish_stats(component: str, stats: Dict[str, Dict[str, int]], task_count: int = 0) -> None:
+    """
+    Write this worker's counters for a component.
+    
+    Args:
+        component: Stats owner (e.g. "master_agent")
+        stats: Counters per agent, e.g. {"email": {"calls": 3, ...}}
+        task_count: Number of tasks handled by this worker
+    """
+    async with db_pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO worker_stats (component, worker_id, stats, task_count, updated_at)
+            VALUES ($1, $2, $3::jsonb, $4, CURRENT_TIMESTAMP)
+            ON CONFLICT (component, worker_id) DO UPDATE
+            SET stats = EXCLUDED.stats, task_count = EXCLUDED.task_count, updated_at = EXCLUDED.updated_at
+            """,
+            component,
+            WORKER_ID,
+            json.dumps(stats),
+            task_count
+        )
+
+
+async def aggregate_stats(component: str) -> Dict[str, Any]:
+    """
+    Sum a component's counters over all live workers.
+    
+    Args:
+        component: Stats owner (e.g. "master_agent")
+    
+    Returns:
+        Dict with agent_stats, task_count and workers
+    """
+    async with db_pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT stats, task_count
+            FROM worker_stats
+            WHERE component = $1
+            AND updated_at > CURRENT_TIMESTAMP - make_interval(secs => $2)
+            """,
+            component,
+            WORKER_STATS_STALE_SECONDS
+        )
+    
+    totals: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        for agent, counters in json.loads(row["stats"]).items():
+            agent_totals = totals.setdefault(agent, {})
+            for key, value in counters.items():
+                agent_totals[key] = agent_totals.get(key, 0) + value
+    
+    return {
+        "agent_stats": totals,
+        "task_count": sum(row["task_count"] for row in rows),
+        "workers": len(rows)
+    }
+
+
+class StatsPublisher:
+    """Periodically publishes this worker's stats."""
+    
+    def __init__(self, interval_seconds: float = WORKER_STATS_INTERVAL_SECONDS):
+        """
+        Initialize the publisher.
+        
+        Args:
+            interval_seconds: Seconds between publishes
+        """
+        self.interval_seconds = interval_seconds
+        self.sources: Dict[str, StatsSource] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def register(self, component: str, source: StatsSource) -> None:
+        """
+        Add a component to publish.
+        
+        Args:
+            component: Stats owner
+            source: Callable returning (agent_stats, task_count)
+        """
+        self.sources[component] = source
+    
+    async def publish(self, component: str) -> None:
+        """
+        Publish one component now.
+        
+        Args:
+            component: Stats owner
+        """
+        stats, task_count = self.sources[component]()
+        await publish_stats(component, stats, task_count)
+    
+    async def publish_all(self) -> None:
+        """Publish every registered component, logging failures."""
+        for component in self.sources:
+            try:
+                await self.publish(component)
+            except Exception as e:
+                logger.warning("Publishing %s stats failed: %s", component, e)
+    
+    def start(self) -> None:
+        """Start publishing in the background."""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop publishing after a final publish."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.publish_all()
+    
+    async def _run(self) -> None:
+        """Publish every interval."""
+        while True:
+            await self.publish_all()
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Global stats publisher instance
+stats_publisher = StatsPublisher()
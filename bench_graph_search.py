@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark entity/relationship search plans in PostgreSQL.
+
+Compares the old ILIKE-only predicate with the trigram-backed search used by
+search_entities / search_relationships in sql/schema_v2.sql. For each query
+it prints the plan nodes from EXPLAIN (ANALYZE) and the median latency.
+
+With --seed N, synthetic rows are loaded into session-local temporary copies
+of the entities/relationships tables (indexes included), which shadow the
+real tables for this connection only, so nothing is written to your data.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import asyncpg
+from dotenv import load_dotenv
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+load_dotenv()
+
+LEGACY_QUERIES = {
+    "entities": """
+        SELECT e.uuid FROM entities e
+        WHERE e.name ILIKE '%' || $1 || '%'
+        OR e.summary ILIKE '%' || $1 || '%'
+        OR to_tsvector('english', e.name || ' ' || e.summary) @@ plainto_tsquery('english', $1)
+        LIMIT 10
+    """,
+    "relationships": """
+        SELECT r.uuid FROM relationships r
+        WHERE r.name ILIKE '%' || $1 || '%'
+        OR r.fact ILIKE '%' || $1 || '%'
+        OR to_tsvector('english', r.name || ' ' || r.fact) @@ plainto_tsquery('english', $1)
+        LIMIT 10
+    """
+}
+
+# Same predicates as the schema_v2.sql functions
+TRIGRAM_QUERIES = {
+    "entities": """
+        SELECT e.uuid FROM entities e
+        WHERE e.name ILIKE '%' || $1 || '%'
+        OR e.name %> $1
+        OR e.summary %> $1
+        OR to_tsvector('english', e.name || ' ' || e.summary) @@ plainto_tsquery('english', $1)
+        ORDER BY GREATEST(word_similarity($1, e.name), word_similarity($1, e.summary)) DESC
+        LIMIT 10
+    """,
+    "relationships": """
+        SELECT r.uuid FROM relationships r
+        WHERE r.name ILIKE '%' || $1 || '%'
+        OR r.name %> $1
+        OR r.fact %> $1
+        OR to_tsvector('english', r.name || ' ' || r.fact) @@ plainto_tsquery('english', $1)
+        ORDER BY GREATEST(word_similarity($1, r.name), word_similarity($1, r.fact)) DESC
+        LIMIT 10
+    """
+}
+
+FUNCTION_CALLS = {
+    "entities": "SELECT * FROM search_entities($1, NULL, 10, $2)",
+    "relationships": "SELECT * FROM search_relationships($1, NULL, 10, $2)"
+}
+
+WORDS = [
+    "openai", "microsoft", "google", "nvidia", "anthropic", "deepmind", "azure",
+    "investment", "partnership", "acquisition", "model", "research", "chip",
+    "cloud", "compute", "startup", "funding", "launch", "safety", "language"
+]
+
+
+def plan_nodes(plan: dict) -> list:
+    """Flatten an EXPLAIN JSON plan into "Node Type [on index]" strings."""
+    node = plan["Node Type"]
+    if plan.get("Index Name"):
+        node += f" on {plan['Index Name']}"
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+async def seed(conn: asyncpg.Connection, rows: int):
+    """Load synthetic rows into temporary copies of the graph tables."""
+    await conn.execute("CREATE TEMP TABLE entities (LIKE public.entities INCLUDING ALL)")
+    await conn.execute("CREATE TEMP TABLE relationships (LIKE public.relationships INCLUDING ALL)")
+    
+    rng = random.Random(42)
+    entity_ids = [uuid4() for _ in range(rows)]
+    await conn.copy_records_to_table(
+        "entities",
+        records=[
+            (uid, f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+             " ".join(rng.choices(WORDS, k=12)))
+            for i, uid in enumerate(entity_ids)
+        ],
+        columns=["uuid", "name", "summary"],
+        schema_name="pg_temp"
+    )
+    await conn.copy_records_to_table(
+        "relationships",
+        records=[
+            (uuid4(), rng.choice(WORDS).upper(), " ".join(rng.choices(WORDS, k=10)),
+             rng.choice(entity_ids), rng.choice(entity_ids))
+            for _ in range(rows * 2)
+        ],
+        columns=["uuid", "name", "fact", "source_node_uuid", "target_node_uuid"],
+        schema_name="pg_temp"
+    )
+    await conn.execute("ANALYZE pg_temp.entities")
+    await conn.execute("ANALYZE pg_temp.relationships")
+    print(f"Seeded {rows} entities and {rows * 2} relationships (temporary tables)")
+
+
+async def time_query(conn: asyncpg.Connection, sql: str, args: tuple, runs: int) -> float:
+    """Return the median latency in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await conn.fetch(sql, *args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def explain(conn: asyncpg.Connection, sql: str, args: tuple) -> list:
+    """Return the plan nodes of an EXPLAIN ANALYZE run."""
+    result = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", *args)
+    plan = json.loads(result) if isinstance(result, str) else result
+    return plan_nodes(plan[0]["Plan"])
+
+
+async def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark graph text search plans")
+    parser.add_argument("--queries", nargs="+", default=["openai", "invest", "microsft azure"],
+                        help="Search strings to benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Seed N synthetic entities into temporary tables")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Word similarity threshold")
+    args = parser.parse_args()
+    
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL environment variable not set")
+        return
+    
+    conn = await asyncpg.connect(database_url)
+    try:
+        if args.seed:
+            await seed(conn, args.seed)
+        
+        await conn.execute(f"SET pg_trgm.word_similarity_threshold = {args.threshold}")
+        
+        for table in ("entities", "relationships"):
+            print(f"\n=== {table} ===")
+            for query in args.queries:
+                legacy_plan = await explain(conn, LEGACY_QUERIES[table], (query,))
+                trigram_plan = await explain(conn, TRIGRAM_QUERIES[table], (query,))
+                legacy_ms = await time_query(conn, LEGACY_QUERIES[table], (query,), args.runs)
+                trigram_ms = await time_query(conn, TRIGRAM_QUERIES[table], (query,), args.runs)
+                function_ms = await time_query(conn, FUNCTION_CALLS[table], (query, args.threshold), args.runs)
+                matches = len(await conn.fetch(FUNCTION_CALLS[table], query, args.threshold))
+                
+                print(f"\nquery={query!r} matches={matches}")
+                print(f"  legacy ILIKE : {legacy_ms:8.2f} ms  plan: {' -> '.join(legacy_plan)}")
+                print(f"  trigram      : {trigram_ms:8.2f} ms  plan: {' -> '.join(trigram_plan)}")
+                print(f"  function call: {function_ms:8.2f} ms")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark serialization of a 50-result SearchResponse.
+
+Compares what /search/vector did before (FastAPI's jsonable_encoder pass
+followed by json.dumps in JSONResponse) with FastJSONResponse (orjson when
+installed), with and without response slimming. Also times SSE frame
+encoding for a typical text delta. No database or API keys are needed.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agent import serialization
+from agent.models import ChunkResult, SearchResponse
+from agent.serialization import FastJSONResponse, slim_chunks
+from agent.streaming import sse_event
+
+WORDS = [
+    "openai", "microsoft", "google", "nvidia", "anthropic", "deepmind", "azure",
+    "investment", "partnership", "acquisition", "model", "research", "chip",
+    "cloud", "compute", "startup", "funding", "launch", "safety", "language"
+]
+
+
+def make_response(results: int, content_chars: int) -> SearchResponse:
+    """Build a search response with realistic chunk sizes."""
+    rng = random.Random(42)
+    
+    def text(chars: int) -> str:
+        words = []
+        while sum(len(w) + 1 for w in words) < chars:
+            words.append(rng.choice(WORDS))
+        return " ".join(words)[:chars]
+    
+    return SearchResponse(
+        results=[
+            ChunkResult(
+                chunk_id=f"00000000-0000-0000-0000-{i:012d}",
+                document_id=f"00000000-0000-0000-0001-{i % 7:012d}",
+                content=text(content_chars),
+                score=rng.random(),
+                metadata={"chunk_index": i, "token_count": content_chars // 4, "title": text(40), "tags": WORDS[:5]},
+                document_title=text(40),
+                document_source=f"documents/{i % 7}.md"
+            )
+            for i in range(results)
+        ],
+        total_results=results,
+        search_type="vector",
+        query_time_ms=12.5,
+        stage_timings_ms={"embed_ms": 80.1, "retrieve_ms": 9.7, "rerank_ms": 2.4}
+    )
+
+
+def time_call(fn, runs: int) -> float:
+    """Median duration of fn in microseconds."""
+    fn()
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(durations)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark API response serialization")
+    parser.add_argument("--results", type=int, default=50, help="Chunks in the response")
+    parser.add_argument("--content-chars", type=int, default=1500, help="Characters per chunk")
+    parser.add_argument("--runs", type=int, default=500, help="Timed runs per case")
+    args = parser.parse_args()
+    
+    response = make_response(args.results, args.content_chars)
+    
+    def slimmed() -> bytes:
+        return FastJSONResponse(response.model_copy(update={"results": slim_chunks(response.results)})).body
+    
+    cases = [
+        ("jsonable_encoder + json.dumps (before)", lambda: JSONResponse(jsonable_encoder(response)).body),
+        ("FastJSONResponse", lambda: FastJSONResponse(response).body),
+        ("FastJSONResponse + slimming", slimmed)
+    ]
+    
+    encoder = "orjson" if serialization.get_orjson() else "json"
+    print(f"SearchResponse with {args.results} results of {args.content_chars} chars, encoder: {encoder}\n")
+    
+    baseline = None
+    for name, fn in cases:
+        micros = time_call(fn, args.runs)
+        baseline = baseline or micros
+        print(f"  {name:40s} {micros:9.1f} µs  {len(fn()):8d} bytes  {baseline / micros:5.1f}x")
+    
+    event = {"type": "text", "content": "Microsoft invested $10 billion in OpenAI"}
+    print("\nSSE text frame")
+    print(f"  {'json.dumps (before)':40s} {time_call(lambda: f'data: {json.dumps(event)}', args.runs * 10):9.2f} µs")
+    print(f"  {'sse_event':40s} {time_call(lambda: sse_event(event), args.runs * 10):9.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Gazetteer-based entity extraction using a compiled Aho-Corasick automaton.
+"""
+
+import os
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.json")
+
+
+@dataclass
+class GazetteerCategory:
+    """A named list of terms plus the matching semantics for that category."""
+    name: str
+    terms: List[str] = field(default_factory=list)
+    case_sensitive: bool = False
+    word_boundary: bool = False
+
+
+@dataclass(frozen=True)
+class _PatternEntry:
+    """A single gazetteer term as stored in the automaton output table."""
+    category: str
+    term: str
+    length: int
+    case_sensitive: bool
+    word_boundary: bool
+
+
+def load_gazetteer(
+    path: Optional[str] = None,
+    extra_paths: Optional[Iterable[str]] = None
+) -> Dict[str, GazetteerCategory]:
+    """
+    Load gazetteer categories from JSON files.
+
+    The base file is merged with any extra files: terms are unioned and
+    per-category flags in later files override earlier ones.
+
+    Args:
+        path: Base gazetteer file (defaults to the bundled gazetteer.json)
+        extra_paths: Additional gazetteer files to merge in
+
+    Returns:
+        Categories keyed by name
+    """
+    categories: Dict[str, GazetteerCategory] = {}
+
+    for file_path in [path or DEFAULT_GAZETTEER_PATH, *(extra_paths or [])]:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        for name, spec in data.items():
+            category = categories.setdefault(name, GazetteerCategory(name=name))
+            category.case_sensitive = spec.get("case_sensitive", category.case_sensitive)
+            category.word_boundary = spec.get("word_boundary", category.word_boundary)
+
+            known = set(category.terms)
+            for term in spec.get("terms", []):
+                if term and term not in known:
+                    category.terms.append(term)
+                    known.add(term)
+
+    return categories
+
+
+def _fold(text: str) -> str:
+    """Lowercase text while keeping a 1:1 character mapping to the original."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # Some characters (e.g. 'İ') expand when lowercased; keep those as-is so
+    # match offsets in the folded text stay valid for the original text.
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def _is_word_char(ch: str) -> bool:
+    """Match the definition of a word character used by re's \\b."""
+    return ch.isalnum() or ch == "_"
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    """Check for a \\b-style word boundary at index."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+class AhoCorasickAutomaton:
+    """Multi-pattern string matcher reporting all (overlapping) matches in one pass."""
+
+    def __init__(self):
+        """Initialize an empty automaton."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[Any, ...]] = [()]
+        self._built = False
+
+    def add(self, key: str, value: Any):
+        """
+        Add a pattern to the automaton.
+
+        Args:
+            key: Pattern string
+            value: Value reported when the pattern matches
+        """
+        if not key:
+            return
+
+        state = 0
+        for ch in key:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        self._output[state] = self._output[state] + (value,)
+        self._built = False
+
+    def build(self):
+        """Compute failure links (breadth-first) and merge output sets."""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                fail_state = self._goto[fallback].get(ch, 0)
+                if fail_state == next_state:
+                    fail_state = 0
+
+                self._fail[next_state] = fail_state
+                self._output[next_state] = self._output[next_state] + self._output[fail_state]
+
+        self._built = True
+
+    def iter(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """
+        Scan text once and yield every match.
+
+        Args:
+            text: Text to scan
+
+        Yields:
+            Tuples of (end index exclusive, value)
+        """
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+
+        for index, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for value in output[state]:
+                yield index + 1, value
+
+
+class EntityExtractor:
+    """Extracts gazetteer entities for all categories with a single scan per text."""
+
+    def __init__(self, categories: Dict[str, GazetteerCategory]):
+        """
+        Initialize extractor.
+
+        Args:
+            categories: Gazetteer categories to compile
+        """
+        self.categories = categories
+        self._automaton = AhoCorasickAutomaton()
+
+        for category in categories.values():
+            for term in category.terms:
+                # All patterns live in one automaton over case-folded text;
+                # case-sensitive terms are verified against the original text.
+                self._automaton.add(
+                    _fold(term),
+                    _PatternEntry(
+                        category=category.name,
+                        term=term,
+                        length=len(term),
+                        case_sensitive=category.case_sensitive,
+                        word_boundary=category.word_boundary
+                    )
+                )
+
+        self._automaton.build()
+
+    def extract(
+        self,
+        text: str,
+        categories: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Extract entities from text.
+
+        Args:
+            text: Text to scan
+            categories: Categories to return (defaults to all)
+
+        Returns:
+            Canonical terms per category, in order of first occurrence
+        """
+        wanted = set(categories) if categories is not None else set(self.categories)
+        found: Dict[str, Dict[str, None]] = {name: {} for name in self.categories if name in wanted}
+
+        if not text:
+            return {name: [] for name in found}
+
+        for end, entry in self._automaton.iter(_fold(text)):
+            if entry.category not in found or entry.term in found[entry.category]:
+                continue
+
+            start = end - entry.length
+            if entry.case_sensitive and text[start:end] != entry.term:
+                continue
+            if entry.word_boundary and not (_is_boundary(text, start) and _is_boundary(text, end)):
+                continue
+
+            found[entry.category][entry.term] = None
+
+        return {name: list(terms) for name, terms in found.items()}
+
+
+@lru_cache(maxsize=None)
+def _load_extractor(path: Optional[str], extra_paths: Tuple[str, ...]) -> EntityExtractor:
+    """Build and memoize an extractor for a set of gazetteer files."""
+    categories = load_gazetteer(path, extra_paths)
+    logger.info(
+        "Compiled entity gazetteer with %d terms across %d categories",
+        sum(len(c.terms) for c in categories.values()),
+        len(categories)
+    )
+    return EntityExtractor(categories)
+
+
+def get_entity_extractor() -> EntityExtractor:
+    """
+    Get the shared entity extractor.
+
+    Extra gazetteer files can be listed in ENTITY_GAZETTEER_PATH
+    (separated by the OS path separator) and are merged with the bundled one.
+
+    Returns:
+        Compiled entity extractor
+    """
+    extra = os.getenv("ENTITY_GAZETTEER_PATH", "")
+    extra_paths = tuple(p for p in extra.split(os.pathsep) if p)
+    return _load_extractor(None, extra_paths)
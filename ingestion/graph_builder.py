@@ -13,16 +13,19 @@ from graphiti_core import Graphiti
 from dotenv import load_dotenv
 
 from .chunker import DocumentChunk
+from .entity_extractor import get_entity_extractor
 
 # Import graph utilities
 try:
     from ..agent.graph_utils import GraphitiClient
+    from ..agent.graph_backend import get_graph_backend_name, postgres_graph_backend
 except ImportError:
     # For direct execution or testing
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from agent.graph_utils import GraphitiClient
+    from agent.graph_backend import get_graph_backend_name, postgres_graph_backend
 
 # Load environment variables
 load_dotenv()
@@ -36,6 +39,7 @@ class GraphBuilder:
     def __init__(self):
         """Initialize graph builder."""
         self.graph_client = GraphitiClient()
+        self.entity_extractor = get_entity_extractor()
         self._initialized = False
     
     async def initialize(self):
@@ -87,6 +91,7 @@ class GraphBuilder:
         
         episodes_created = 0
         errors = []
+        started_at = datetime.now(timezone.utc)
         
         # Process chunks one by one to avoid overwhelming Graphiti
         for i, chunk in enumerate(chunks):
@@ -134,8 +139,28 @@ class GraphBuilder:
                 # Continue processing other chunks even if one fails
                 continue
         
+        # Embed the facts extracted from the new episodes in batches
+        fact_embeddings_created = 0
+        if episodes_created:
+            try:
+                fact_embeddings_created = await self.graph_client.backfill_fact_embeddings()
+            except Exception as e:
+                error_msg = f"Failed to embed graph facts: {str(e)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+        
+        # Mirror the new entities and relationships when the graph is served from PostgreSQL
+        if episodes_created and get_graph_backend_name() == "postgres":
+            try:
+                await postgres_graph_backend.sync_from_neo4j(since=started_at)
+            except Exception as e:
+                error_msg = f"Failed to sync graph to PostgreSQL: {str(e)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+        
         result = {
             "episodes_created": episodes_created,
+            "fact_embeddings_created": fact_embeddings_created,
             "total_chunks": len(chunks),
             "errors": errors
         }
@@ -220,31 +245,24 @@ class GraphBuilder:
         
         enriched_chunks = []
         
+        categories = ["locations"]
+        if extract_companies:
+            categories.append("companies")
+        if extract_technologies:
+            categories.append("technologies")
+        if extract_people:
+            categories.append("people")
+        
         for chunk in chunks:
+            # Single automaton pass over the chunk for all requested categories
+            found = self.entity_extractor.extract(chunk.content, categories)
             entities = {
-                "companies": [],
-                "technologies": [],
-                "people": [],
-                "locations": []
+                "companies": found.get("companies", []),
+                "technologies": found.get("technologies", []),
+                "people": found.get("people", []),
+                "locations": found.get("locations", [])
             }
             
-            content = chunk.content
-            
-            # Extract companies
-            if extract_companies:
-                entities["companies"] = self._extract_companies(content)
-            
-            # Extract technologies
-            if extract_technologies:
-                entities["technologies"] = self._extract_technologies(content)
-            
-            # Extract people
-            if extract_people:
-                entities["people"] = self._extract_people(content)
-            
-            # Extract locations
-            entities["locations"] = self._extract_locations(content)
-            
             # Create enriched chunk
             enriched_chunk = DocumentChunk(
                 content=chunk.content,
@@ -270,84 +288,34 @@ class GraphBuilder:
     
     def _extract_companies(self, text: str) -> List[str]:
         """Extract company names from text."""
-        # Known tech companies (extend this list as needed)
-        tech_companies = {
-            "Google", "Microsoft", "Apple", "Amazon", "Meta", "Facebook",
-            "Tesla", "OpenAI", "Anthropic", "Nvidia", "Intel", "AMD",
-            "IBM", "Oracle", "Salesforce", "Adobe", "Netflix", "Uber",
-            "Airbnb", "Spotify", "Twitter", "LinkedIn", "Snapchat",
-            "TikTok", "ByteDance", "Baidu", "Alibaba", "Tencent",
-            "Samsung", "Sony", "Huawei", "Xiaomi", "DeepMind"
-        }
-        
-        found_companies = set()
-        text_lower = text.lower()
-        
-        for company in tech_companies:
-            # Case-insensitive search with word boundaries
-            pattern = r'\b' + re.escape(company.lower()) + r'\b'
-            if re.search(pattern, text_lower):
-                found_companies.add(company)
-        
-        return list(found_companies)
+        return self.entity_extractor.extract(text, ["companies"])["companies"]
     
     def _extract_technologies(self, text: str) -> List[str]:
         """Extract technology terms from text."""
-        tech_terms = {
-            "AI", "artificial intelligence", "machine learning", "ML",
-            "deep learning", "neural network", "LLM", "large language model",
-            "GPT", "transformer", "NLP", "natural language processing",
-            "computer vision", "reinforcement learning", "generative AI",
-            "foundation model", "multimodal", "chatbot", "API",
-            "cloud computing", "edge computing", "quantum computing",
-            "blockchain", "cryptocurrency", "IoT", "5G", "AR", "VR",
-            "autonomous vehicles", "robotics", "automation"
-        }
-        
-        found_terms = set()
-        text_lower = text.lower()
-        
-        for term in tech_terms:
-            if term.lower() in text_lower:
-                found_terms.add(term)
-        
-        return list(found_terms)
+        return self.entity_extractor.extract(text, ["technologies"])["technologies"]
     
     def _extract_people(self, text: str) -> List[str]:
         """Extract person names from text."""
-        # Known tech leaders (extend this list as needed)
-        tech_leaders = {
-            "Elon Musk", "Jeff Bezos", "Tim Cook", "Satya Nadella",
-            "Sundar Pichai", "Mark Zuckerberg", "Sam Altman",
-            "Dario Amodei", "Daniela Amodei", "Jensen Huang",
-            "Bill Gates", "Larry Page", "Sergey Brin", "Jack Dorsey",
-            "Reed Hastings", "Marc Benioff", "Andy Jassy"
-        }
-        
-        found_people = set()
-        
-        for person in tech_leaders:
-            if person in text:
-                found_people.add(person)
-        
-        return list(found_people)
+        return self.entity_extractor.extract(text, ["people"])["people"]
     
     def _extract_locations(self, text: str) -> List[str]:
         """Extract location names from text."""
-        locations = {
-            "Silicon Valley", "San Francisco", "Seattle", "Austin",
-            "New York", "Boston", "London", "Tel Aviv", "Singapore",
-            "Beijing", "Shanghai", "Tokyo", "Seoul", "Bangalore",
-            "Mountain View", "Cupertino", "Redmond", "Menlo Park"
-        }
+        return self.entity_extractor.extract(text, ["locations"])["locations"]
+    
+    async def backfill_fact_embeddings(self, batch_size: int = 100) -> int:
+        """
+        Embed existing graph facts that have no fact embedding.
         
-        found_locations = set()
+        Args:
+            batch_size: Number of facts per embedding call
         
-        for location in locations:
-            if location in text:
-                found_locations.add(location)
+        Returns:
+            Number of facts embedded
+        """
+        if not self._initialized:
+            await self.initialize()
         
-        return list(found_locations)
+        return await self.graph_client.backfill_fact_embeddings(batch_size=batch_size)
     
     async def clear_graph(self):
         """Clear all data from the knowledge graph."""
@@ -362,41 +330,29 @@ class GraphBuilder:
 class SimpleEntityExtractor:
     """Simple rule-based entity extractor as fallback."""
     
+    # Company names with a legal suffix that are not in the gazetteer
+    company_suffix_pattern = re.compile(
+        r'\b\w+\s+(?:Inc|Corp|Corporation|Ltd|Limited|AG|SE)\b',
+        re.IGNORECASE
+    )
+    
     def __init__(self):
         """Initialize extractor."""
-        self.company_patterns = [
-            r'\b(?:Google|Microsoft|Apple|Amazon|Meta|Facebook|Tesla|OpenAI)\b',
-            r'\b\w+\s+(?:Inc|Corp|Corporation|Ltd|Limited|AG|SE)\b'
-        ]
-        
-        self.tech_patterns = [
-            r'\b(?:AI|artificial intelligence|machine learning|ML|deep learning)\b',
-            r'\b(?:neural network|transformer|GPT|LLM|NLP)\b',
-            r'\b(?:cloud computing|API|blockchain|IoT|5G)\b'
-        ]
+        self.entity_extractor = get_entity_extractor()
     
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
-        """Extract entities using patterns."""
-        entities = {
-            "companies": [],
-            "technologies": []
-        }
-        
-        # Extract companies
-        for pattern in self.company_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            entities["companies"].extend(matches)
+        """Extract entities using the gazetteer and suffix patterns."""
+        found = self.entity_extractor.extract(text, ["companies", "technologies"])
         
-        # Extract technologies
-        for pattern in self.tech_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            entities["technologies"].extend(matches)
+        companies = found["companies"]
+        for match in self.company_suffix_pattern.findall(text):
+            if match not in companies:
+                companies.append(match)
         
-        # Remove duplicates and clean up
-        entities["companies"] = list(set(entities["companies"]))
-        entities["technologies"] = list(set(entities["technologies"]))
-        
-        return entities
+        return {
+            "companies": companies,
+            "technologies": found["technologies"]
+        }
 
 
 # Factory function
@@ -23,6 +23,8 @@ from .graph_builder import create_graph_builder
 try:
     from ..agent.db_utils import initialize_database, close_database, db_pool
     from ..agent.graph_utils import initialize_graph, close_graph
+    from ..agent.graph_backend import postgres_graph_backend
+    from ..agent.semantic_cache import bump_corpus_version
     from ..agent.models import IngestionConfig, IngestionResult
 except ImportError:
     # For direct execution or testing
@@ -31,6 +33,8 @@ except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from agent.db_utils import initialize_database, close_database, db_pool
     from agent.graph_utils import initialize_graph, close_graph
+    from agent.graph_backend import postgres_graph_backend
+    from agent.semantic_cache import bump_corpus_version
     from agent.models import IngestionConfig, IngestionResult
 
 # Load environment variables
@@ -156,6 +160,10 @@ class DocumentIngestionPipeline:
         
         logger.info(f"Ingestion complete: {len(results)} documents, {total_chunks} chunks, {total_errors} errors")
         
+        # Cached chat answers were built on the old corpus
+        if total_chunks:
+            await self._bump_corpus_version()
+        
         return results
     
     async def _ingest_single_document(self, file_path: str) -> IngestionResult:
@@ -348,14 +356,15 @@ class DocumentIngestionPipeline:
                 # Insert document
                 document_result = await conn.fetchrow(
                     """
-                    INSERT INTO documents (title, source, content, metadata)
-                    VALUES ($1, $2, $3, $4)
+                    INSERT INTO documents (title, source, content, metadata, chunk_count)
+                    VALUES ($1, $2, $3, $4, $5)
                     RETURNING id::text
                     """,
                     title,
                     source,
                     content,
-                    json.dumps(metadata)
+                    json.dumps(metadata),
+                    len(chunks)
                 )
                 
                 document_id = document_result["id"]
@@ -400,6 +409,15 @@ class DocumentIngestionPipeline:
         # Clean knowledge graph
         await self.graph_builder.clear_graph()
         logger.info("Cleaned knowledge graph")
+        
+        await self._bump_corpus_version()
+    
+    async def _bump_corpus_version(self):
+        """Invalidate semantic cache entries built on the previous corpus."""
+        try:
+            await bump_corpus_version()
+        except Exception as e:
+            logger.warning(f"Could not bump corpus version: {e}")
 
 
 async def main():
@@ -413,6 +431,8 @@ async def main():
     parser.add_argument("--no-entities", action="store_true", help="Disable entity extraction")
     parser.add_argument("--fast", "-f", action="store_true", help="Fast mode: skip knowledge graph building")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--backfill-fact-embeddings", action="store_true", help="Only embed existing graph facts that have no embedding, then exit")
+    parser.add_argument("--sync-graph-to-postgres", action="store_true", help="Only copy the Neo4j graph into the PostgreSQL entities/relationships tables, then exit")
     
     args = parser.parse_args()
     
@@ -442,6 +462,24 @@ async def main():
     def progress_callback(current: int, total: int):
         print(f"Progress: {current}/{total} documents processed")
     
+    if args.backfill_fact_embeddings:
+        try:
+            await pipeline.initialize()
+            embedded = await pipeline.graph_builder.backfill_fact_embeddings()
+            print(f"Embedded {embedded} graph facts")
+        finally:
+            await pipeline.close()
+        return
+    
+    if args.sync_graph_to_postgres:
+        try:
+            await pipeline.initialize()
+            counts = await postgres_graph_backend.sync_from_neo4j()
+            print(f"Synced {counts['entities']} entities and {counts['relationships']} relationships to PostgreSQL")
+        finally:
+            await pipeline.close()
+        return
+    
     try:
         start_time = datetime.now()
         
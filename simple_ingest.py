@@ -216,12 +216,13 @@ class SimpleDocumentIngestionPipeline:
         """Save document and chunks to PostgreSQL."""
         async with self.db_pool.acquire() as conn:
             async with conn.transaction():
-                # Insert document
+                # Insert document (chunks without an embedding are skipped below)
+                chunk_count = sum(1 for chunk in chunks if chunk.embedding is not None)
                 document_id = await conn.fetchval("""
-                    INSERT INTO documents (title, source, content, metadata)
-                    VALUES ($1, $2, $3, $4)
+                    INSERT INTO documents (title, source, content, metadata, chunk_count)
+                    VALUES ($1, $2, $3, $4, $5)
                     RETURNING id
-                """, title, source, content, json.dumps(metadata))
+                """, title, source, content, json.dumps(metadata), chunk_count)
                 
                 # Insert chunks
                 for chunk in chunks:
@@ -211,10 +211,10 @@ class SimpleDocumentIngestionPipeline:
             async with conn.transaction():
                 # Insert document
                 document_id = await conn.fetchval("""
-                    INSERT INTO documents (title, source, content, metadata)
-                    VALUES ($1, $2, $3, $4)
+                    INSERT INTO documents (title, source, content, metadata, chunk_count)
+                    VALUES ($1, $2, $3, $4, $5)
                     RETURNING id
-                """, title, source, content, json.dumps(metadata))
+                """, title, source, content, json.dumps(metadata), len(chunks))
                 
                 # Insert chunks (without embeddings for now)
                 for chunk in chunks:
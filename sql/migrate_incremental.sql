@@ -0,0 +1,209 @@
+-- Incremental migration for existing databases
+-- Brings a database created from schema.sql, schema_dynamic.sql or schema_v2.sql
+-- up to date without dropping data. Every step is idempotent, so the script
+-- can be re-run after pulling new changes.
+-- Usage: psql -d "$DATABASE_URL" -f sql/migrate_incremental.sql
+-- If your embeddings are not 1024-dimensional, change vector(1024) below first.
+
+BEGIN;
+
+-- Stored chunk counts for document listings
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE documents d
+SET chunk_count = c.chunk_count
+FROM (SELECT document_id, COUNT(*) AS chunk_count FROM chunks GROUP BY document_id) c
+WHERE c.document_id = d.id
+AND d.chunk_count <> c.chunk_count;
+
+-- Keyset pagination order; older schemas indexed created_at alone
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE tablename = 'documents'
+        AND indexname = 'idx_documents_created_at'
+        AND indexdef LIKE '%created_at DESC, id DESC%'
+    ) THEN
+        DROP INDEX IF EXISTS idx_documents_created_at;
+        CREATE INDEX idx_documents_created_at ON documents (created_at DESC, id DESC);
+    END IF;
+END $$;
+
+-- Document source lookups
+CREATE INDEX IF NOT EXISTS idx_documents_source ON documents (source);
+
+-- Knowledge graph search (schema_v2 databases): trigram indexes and the
+-- index-backed search functions that take a similarity threshold
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+    IF to_regclass('entities') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_entities_name_trgm ON entities USING GIN (name gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_entities_summary_trgm ON entities USING GIN (summary gin_trgm_ops);
+    END IF;
+    IF to_regclass('relationships') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_relationships_name_trgm ON relationships USING GIN (name gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_relationships_fact_trgm ON relationships USING GIN (fact gin_trgm_ops);
+    END IF;
+END $$;
+
+-- The old three-argument versions would make calls without a threshold ambiguous
+DROP FUNCTION IF EXISTS search_entities(TEXT, TEXT[], INT);
+DROP FUNCTION IF EXISTS search_relationships(TEXT, TEXT[], INT);
+
+CREATE OR REPLACE FUNCTION search_entities(
+    search_query TEXT,
+    group_ids TEXT[] DEFAULT NULL,
+    limit_count INT DEFAULT 10,
+    similarity_threshold FLOAT DEFAULT 0.3
+)
+RETURNS TABLE (
+    uuid UUID,
+    name TEXT,
+    summary TEXT,
+    entity_type TEXT,
+    group_id TEXT,
+    metadata JSONB,
+    created_at TIMESTAMP WITH TIME ZONE,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Threshold for the %> operator, scoped to the current transaction
+    PERFORM set_config('pg_trgm.word_similarity_threshold', similarity_threshold::text, true);
+
+    RETURN QUERY
+    SELECT m.*
+    FROM (
+        SELECT 
+            e.uuid,
+            e.name,
+            e.summary,
+            e.entity_type,
+            e.group_id,
+            e.metadata,
+            e.created_at,
+            GREATEST(
+                word_similarity(search_query, e.name),
+                word_similarity(search_query, e.summary)
+            )::FLOAT AS match_score
+        FROM entities e
+        WHERE (group_ids IS NULL OR e.group_id = ANY(group_ids))
+        AND (
+            e.name ILIKE '%' || search_query || '%'
+            OR e.name %> search_query
+            OR e.summary %> search_query
+            OR to_tsvector('english', e.name || ' ' || e.summary) @@ plainto_tsquery('english', search_query)
+        )
+    ) m
+    ORDER BY 
+        (m.name ILIKE search_query) DESC,
+        m.match_score DESC,
+        m.created_at DESC
+    LIMIT limit_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION search_relationships(
+    search_query TEXT,
+    group_ids TEXT[] DEFAULT NULL,
+    limit_count INT DEFAULT 10,
+    similarity_threshold FLOAT DEFAULT 0.3
+)
+RETURNS TABLE (
+    uuid UUID,
+    name TEXT,
+    fact TEXT,
+    source_node_uuid UUID,
+    target_node_uuid UUID,
+    group_id TEXT,
+    valid_at TIMESTAMP WITH TIME ZONE,
+    invalid_at TIMESTAMP WITH TIME ZONE,
+    metadata JSONB,
+    created_at TIMESTAMP WITH TIME ZONE,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Threshold for the %> operator, scoped to the current transaction
+    PERFORM set_config('pg_trgm.word_similarity_threshold', similarity_threshold::text, true);
+
+    RETURN QUERY
+    SELECT m.*
+    FROM (
+        SELECT 
+            r.uuid,
+            r.name,
+            r.fact,
+            r.source_node_uuid,
+            r.target_node_uuid,
+            r.group_id,
+            r.valid_at,
+            r.invalid_at,
+            r.metadata,
+            r.created_at,
+            GREATEST(
+                word_similarity(search_query, r.name),
+                word_similarity(search_query, r.fact)
+            )::FLOAT AS match_score
+        FROM relationships r
+        WHERE (group_ids IS NULL OR r.group_id = ANY(group_ids))
+        AND (
+            r.name ILIKE '%' || search_query || '%'
+            OR r.name %> search_query
+            OR r.fact %> search_query
+            OR to_tsvector('english', r.name || ' ' || r.fact) @@ plainto_tsquery('english', search_query)
+        )
+    ) m
+    ORDER BY 
+        (m.name ILIKE search_query) DESC,
+        m.match_score DESC,
+        m.created_at DESC
+    LIMIT limit_count;
+END;
+$$;
+
+-- Semantic answer cache
+CREATE TABLE IF NOT EXISTS corpus_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO corpus_state DEFAULT VALUES ON CONFLICT (id) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS semantic_cache (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    query TEXT NOT NULL,
+    embedding vector(1024) NOT NULL,
+    response TEXT NOT NULL,
+    tools_used JSONB DEFAULT '[]',
+    user_id TEXT,
+    corpus_version BIGINT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Entries cached before answers were scoped to a user may belong to anyone
+ALTER TABLE semantic_cache ADD COLUMN IF NOT EXISTS user_id TEXT;
+DELETE FROM semantic_cache WHERE user_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_semantic_cache_embedding ON semantic_cache USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_semantic_cache_created_at ON semantic_cache (created_at);
+
+-- Per-worker agent statistics
+CREATE TABLE IF NOT EXISTS worker_stats (
+    component TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    stats JSONB NOT NULL DEFAULT '{}',
+    task_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (component, worker_id)
+);
+
+COMMIT;
@@ -1,6 +1,7 @@
 -- Migration script from schema v1 to v2
 -- This script migrates existing data to the new provider-independent schema
 -- Run this after applying schema_v2.sql
+-- To upgrade an existing database in place instead, use migrate_incremental.sql
 
 -- Migration: Create new tables and migrate data
 BEGIN;
@@ -10,6 +10,9 @@ DROP TABLE IF EXISTS messages CASCADE;
 DROP TABLE IF EXISTS sessions CASCADE;
 DROP TABLE IF EXISTS chunks CASCADE;
 DROP TABLE IF EXISTS documents CASCADE;
+DROP TABLE IF EXISTS semantic_cache CASCADE;
+DROP TABLE IF EXISTS corpus_state CASCADE;
+DROP TABLE IF EXISTS worker_stats CASCADE;
 DROP INDEX IF EXISTS idx_chunks_embedding;
 DROP INDEX IF EXISTS idx_chunks_document_id;
 DROP INDEX IF EXISTS idx_documents_metadata;
@@ -21,12 +24,15 @@ CREATE TABLE documents (
     source TEXT NOT NULL,
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
+    -- Written by the ingestion writer with the chunks, so listings don't aggregate chunks
+    chunk_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_documents_metadata ON documents USING GIN (metadata);
-CREATE INDEX idx_documents_created_at ON documents (created_at DESC);
+-- Keyset pagination order for document listings
+CREATE INDEX idx_documents_created_at ON documents (created_at DESC, id DESC);
 
 CREATE TABLE chunks (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -67,6 +73,44 @@ CREATE TABLE messages (
 
 CREATE INDEX idx_messages_session_id ON messages (session_id, created_at);
 
+-- Corpus version: bumped by ingestion so cached answers over old content are dropped
+CREATE TABLE corpus_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO corpus_state DEFAULT VALUES;
+
+-- Semantic answer cache for /chat, looked up by query embedding
+CREATE TABLE semantic_cache (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    query TEXT NOT NULL,
+    embedding vector(__EMBEDDING_DIMENSION__) NOT NULL,
+    response TEXT NOT NULL,
+    tools_used JSONB DEFAULT '[]',
+    -- Asking user; entries are only served back to the same user
+    user_id TEXT,
+    corpus_version BIGINT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP WITH TIME ZONE
+);
+
+-- HNSW builds incrementally, so it works from an empty table (unlike ivfflat)
+CREATE INDEX idx_semantic_cache_embedding ON semantic_cache USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX idx_semantic_cache_created_at ON semantic_cache (created_at);
+
+-- Per-process agent statistics, summed across API workers by the stats endpoints
+CREATE TABLE worker_stats (
+    component TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    stats JSONB NOT NULL DEFAULT '{}',
+    task_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (component, worker_id)
+);
+
 CREATE OR REPLACE FUNCTION match_chunks(
     query_embedding vector(__EMBEDDING_DIMENSION__),
     match_count INT DEFAULT 10
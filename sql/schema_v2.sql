@@ -15,16 +15,29 @@ DROP TABLE IF EXISTS entities CASCADE;
 DROP TABLE IF EXISTS relationships CASCADE;
 DROP TABLE IF EXISTS communities CASCADE;
 DROP TABLE IF EXISTS episodic_data CASCADE;
+DROP TABLE IF EXISTS semantic_cache CASCADE;
+DROP TABLE IF EXISTS corpus_state CASCADE;
+DROP TABLE IF EXISTS worker_stats CASCADE;
 
 -- Drop existing indexes
 DROP INDEX IF EXISTS idx_chunks_embedding;
 DROP INDEX IF EXISTS idx_chunks_document_id;
 DROP INDEX IF EXISTS idx_documents_metadata;
+DROP INDEX IF EXISTS idx_documents_source;
 DROP INDEX IF EXISTS idx_chunks_content_trgm;
 DROP INDEX IF EXISTS idx_entities_uuid;
 DROP INDEX IF EXISTS idx_relationships_uuid;
 DROP INDEX IF EXISTS idx_communities_uuid;
 DROP INDEX IF EXISTS idx_episodic_uuid;
+DROP INDEX IF EXISTS idx_entities_name_trgm;
+DROP INDEX IF EXISTS idx_entities_summary_trgm;
+DROP INDEX IF EXISTS idx_relationships_name_trgm;
+DROP INDEX IF EXISTS idx_relationships_fact_trgm;
+DROP INDEX IF EXISTS idx_semantic_cache_embedding;
+
+-- Search functions change their return type, so CREATE OR REPLACE is not enough
+DROP FUNCTION IF EXISTS search_entities(TEXT, TEXT[], INT);
+DROP FUNCTION IF EXISTS search_relationships(TEXT, TEXT[], INT);
 
 -- Core document storage (unchanged from v1)
 CREATE TABLE documents (
@@ -33,12 +46,16 @@ CREATE TABLE documents (
     source TEXT NOT NULL,
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
+    -- Written by the ingestion writer with the chunks, so listings don't aggregate chunks
+    chunk_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_documents_metadata ON documents USING GIN (metadata);
-CREATE INDEX idx_documents_created_at ON documents (created_at DESC);
+-- Keyset pagination order for document listings
+CREATE INDEX idx_documents_created_at ON documents (created_at DESC, id DESC);
+CREATE INDEX idx_documents_source ON documents (source);
 
 -- Document chunks (unchanged from v1)
 CREATE TABLE chunks (
@@ -159,12 +176,56 @@ CREATE INDEX idx_episodic_group_id ON episodic_data (group_id);
 CREATE INDEX idx_episodic_timestamp ON episodic_data (timestamp);
 CREATE INDEX idx_episodic_metadata ON episodic_data USING GIN (metadata);
 
+-- Corpus version: bumped by ingestion so cached answers over old content are dropped
+CREATE TABLE corpus_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO corpus_state DEFAULT VALUES;
+
+-- Semantic answer cache for /chat, looked up by query embedding
+CREATE TABLE semantic_cache (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    query TEXT NOT NULL,
+    embedding vector(1024) NOT NULL,
+    response TEXT NOT NULL,
+    tools_used JSONB DEFAULT '[]',
+    -- Asking user; entries are only served back to the same user
+    user_id TEXT,
+    corpus_version BIGINT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP WITH TIME ZONE
+);
+
+-- HNSW builds incrementally, so it works from an empty table (unlike ivfflat)
+CREATE INDEX idx_semantic_cache_embedding ON semantic_cache USING hnsw (embedding vector_cosine_ops);
+CREATE INDEX idx_semantic_cache_created_at ON semantic_cache (created_at);
+
+-- Per-process agent statistics, summed across API workers by the stats endpoints
+CREATE TABLE worker_stats (
+    component TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    stats JSONB NOT NULL DEFAULT '{}',
+    task_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (component, worker_id)
+);
+
 -- Full-text search indexes for the new tables
 CREATE INDEX idx_entities_name_summary ON entities USING GIN (to_tsvector('english', name || ' ' || summary));
 CREATE INDEX idx_relationships_name_fact ON relationships USING GIN (to_tsvector('english', name || ' ' || fact));
 CREATE INDEX idx_communities_name_description ON communities USING GIN (to_tsvector('english', name || ' ' || description));
 CREATE INDEX idx_episodic_content ON episodic_data USING GIN (to_tsvector('english', content));
 
+-- Trigram indexes: back ILIKE substring matches and word-similarity (%>) lookups
+CREATE INDEX idx_entities_name_trgm ON entities USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_entities_summary_trgm ON entities USING GIN (summary gin_trgm_ops);
+CREATE INDEX idx_relationships_name_trgm ON relationships USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_relationships_fact_trgm ON relationships USING GIN (fact gin_trgm_ops);
+
 -- Vector search functions (unchanged from v1)
 CREATE OR REPLACE FUNCTION match_chunks(
     query_embedding vector(1024),
@@ -267,7 +328,8 @@ $$;
 CREATE OR REPLACE FUNCTION search_entities(
     search_query TEXT,
     group_ids TEXT[] DEFAULT NULL,
-    limit_count INT DEFAULT 10
+    limit_count INT DEFAULT 10,
+    similarity_threshold FLOAT DEFAULT 0.3
 )
 RETURNS TABLE (
     uuid UUID,
@@ -276,34 +338,43 @@ RETURNS TABLE (
     entity_type TEXT,
     group_id TEXT,
     metadata JSONB,
-    created_at TIMESTAMP WITH TIME ZONE
+    created_at TIMESTAMP WITH TIME ZONE,
+    similarity FLOAT
 )
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- Threshold for the %> operator, scoped to the current transaction
+    PERFORM set_config('pg_trgm.word_similarity_threshold', similarity_threshold::text, true);
+
     RETURN QUERY
-    SELECT 
-        e.uuid,
-        e.name,
-        e.summary,
-        e.entity_type,
-        e.group_id,
-        e.metadata,
-        e.created_at
-    FROM entities e
-    WHERE (group_ids IS NULL OR e.group_id = ANY(group_ids))
-    AND (
-        e.name ILIKE '%' || search_query || '%'
-        OR e.summary ILIKE '%' || search_query || '%'
-        OR to_tsvector('english', e.name || ' ' || e.summary) @@ plainto_tsquery('english', search_query)
-    )
+    SELECT m.*
+    FROM (
+        SELECT 
+            e.uuid,
+            e.name,
+            e.summary,
+            e.entity_type,
+            e.group_id,
+            e.metadata,
+            e.created_at,
+            GREATEST(
+                word_similarity(search_query, e.name),
+                word_similarity(search_query, e.summary)
+            )::FLOAT AS match_score
+        FROM entities e
+        WHERE (group_ids IS NULL OR e.group_id = ANY(group_ids))
+        AND (
+            e.name ILIKE '%' || search_query || '%'
+            OR e.name %> search_query
+            OR e.summary %> search_query
+            OR to_tsvector('english', e.name || ' ' || e.summary) @@ plainto_tsquery('english', search_query)
+        )
+    ) m
     ORDER BY 
-        CASE 
-            WHEN e.name ILIKE search_query THEN 1
-            WHEN e.name ILIKE '%' || search_query || '%' THEN 2
-            ELSE 3
-        END,
-        e.created_at DESC
+        (m.name ILIKE search_query) DESC,
+        m.match_score DESC,
+        m.created_at DESC
     LIMIT limit_count;
 END;
 $$;
@@ -311,7 +382,8 @@ $$;
 CREATE OR REPLACE FUNCTION search_relationships(
     search_query TEXT,
     group_ids TEXT[] DEFAULT NULL,
-    limit_count INT DEFAULT 10
+    limit_count INT DEFAULT 10,
+    similarity_threshold FLOAT DEFAULT 0.3
 )
 RETURNS TABLE (
     uuid UUID,
@@ -323,42 +395,50 @@ RETURNS TABLE (
     valid_at TIMESTAMP WITH TIME ZONE,
     invalid_at TIMESTAMP WITH TIME ZONE,
     metadata JSONB,
-    created_at TIMESTAMP WITH TIME ZONE
+    created_at TIMESTAMP WITH TIME ZONE,
+    similarity FLOAT
 )
 LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- Threshold for the %> operator, scoped to the current transaction
+    PERFORM set_config('pg_trgm.word_similarity_threshold', similarity_threshold::text, true);
+
     RETURN QUERY
-    SELECT 
-        r.uuid,
-        r.name,
-        r.fact,
-        r.source_node_uuid,
-        r.target_node_uuid,
-        r.group_id,
-        r.valid_at,
-        r.invalid_at,
-        r.metadata,
-        r.created_at
-    FROM relationships r
-    WHERE (group_ids IS NULL OR r.group_id = ANY(group_ids))
-    AND (
-        r.name ILIKE '%' || search_query || '%'
-        OR r.fact ILIKE '%' || search_query || '%'
-        OR to_tsvector('english', r.name || ' ' || r.fact) @@ plainto_tsquery('english', search_query)
-    )
+    SELECT m.*
+    FROM (
+        SELECT 
+            r.uuid,
+            r.name,
+            r.fact,
+            r.source_node_uuid,
+            r.target_node_uuid,
+            r.group_id,
+            r.valid_at,
+            r.invalid_at,
+            r.metadata,
+            r.created_at,
+            GREATEST(
+                word_similarity(search_query, r.name),
+                word_similarity(search_query, r.fact)
+            )::FLOAT AS match_score
+        FROM relationships r
+        WHERE (group_ids IS NULL OR r.group_id = ANY(group_ids))
+        AND (
+            r.name ILIKE '%' || search_query || '%'
+            OR r.name %> search_query
+            OR r.fact %> search_query
+            OR to_tsvector('english', r.name || ' ' || r.fact) @@ plainto_tsquery('english', search_query)
+        )
+    ) m
     ORDER BY 
-        CASE 
-            WHEN r.name ILIKE search_query THEN 1
-            WHEN r.name ILIKE '%' || search_query || '%' THEN 2
-            ELSE 3
-        END,
-        r.created_at DESC
+        (m.name ILIKE search_query) DESC,
+        m.match_score DESC,
+        m.created_at DESC
     LIMIT limit_count;
 END;
 $$;
 
--- Utility functions
 CREATE OR REPLACE FUNCTION get_document_chunks(doc_id UUID)
 RETURNS TABLE (
     chunk_id UUID,
@@ -0,0 +1,144 @@
+"""
+Tests for admission control.
+"""
+
+import asyncio
+
+import pytest
+import httpx
+from unittest.mock import patch
+
+from agent.admission import AdmissionController, AdmissionRejected
+from agent.api import app
+
+
+class TestAdmissionController:
+    """Test concurrency caps and the wait queue."""
+    
+    @pytest.mark.asyncio
+    async def test_admits_within_caps(self):
+        """Test requests under the caps are admitted at once."""
+        controller = AdmissionController("test", max_concurrent=2)
+        
+        first = await controller.acquire()
+        second = await controller.acquire()
+        
+        assert controller.active == 2
+        first.release()
+        first.release()
+        second.release()
+        assert controller.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_queue_full_rejected(self):
+        """Test requests beyond the queue bound are shed with retry_after."""
+        controller = AdmissionController("test", max_concurrent=1, max_queue=0, retry_after=5)
+        await controller.acquire()
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await controller.acquire()
+        
+        assert exc_info.value.reason == "queue_full"
+        assert exc_info.value.retry_after == 5
+    
+    @pytest.mark.asyncio
+    async def test_waiter_times_out(self):
+        """Test a queued request is shed when no slot frees in time."""
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=0.01)
+        await controller.acquire()
+        
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await controller.acquire()
+        
+        assert exc_info.value.reason == "timeout"
+        assert controller.queued == 0
+    
+    @pytest.mark.asyncio
+    async def test_release_hands_slot_to_oldest_waiter(self):
+        """Test a freed slot goes to the first queued request."""
+        controller = AdmissionController("test", max_concurrent=1, max_queue=2)
+        held = await controller.acquire()
+        order = []
+        
+        async def wait(name):
+            slot = await controller.acquire()
+            order.append(name)
+            slot.release()
+        
+        tasks = [asyncio.create_task(wait("a")), asyncio.create_task(wait("b"))]
+        await asyncio.sleep(0)
+        assert controller.queued == 2
+        
+        held.release()
+        await asyncio.gather(*tasks)
+        
+        assert order == ["a", "b"]
+        assert controller.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_per_user_cap(self):
+        """Test one user's burst waits while other users are admitted."""
+        controller = AdmissionController("test", max_concurrent=3, max_per_user=1, max_queue=2)
+        busy = await controller.acquire("alice")
+        
+        queued = asyncio.create_task(controller.acquire("alice"))
+        await asyncio.sleep(0)
+        other = await controller.acquire("bob")
+        
+        assert controller.queued == 1
+        assert controller.active == 2
+        
+        busy.release()
+        slot = await queued
+        
+        assert controller.active == 2
+        slot.release()
+        other.release()
+        assert controller.active == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test a client that goes away while queued doesn't keep a place."""
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+        held = await controller.acquire()
+        
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        
+        assert controller.queued == 0
+        held.release()
+        assert controller.active == 0
+
+
+class TestAdmissionEndpoints:
+    """Test load shedding through the API."""
+    
+    @pytest.mark.asyncio
+    async def test_chat_shed_with_429(self):
+        """Test a saturated agent lane answers 429 with Retry-After."""
+        lane = AdmissionController("agent", max_concurrent=1, max_queue=0, retry_after=3)
+        await lane.acquire()
+        
+        with patch("agent.api.agent_lane", lane):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/chat", json={"message": "hello"})
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+        assert response.json()["details"] == {"lane": "agent", "reason": "queue_full"}
+    
+    @pytest.mark.asyncio
+    async def test_light_lane_not_blocked_by_agent_runs(self):
+        """Test cheap endpoints are admitted while the agent lane is full."""
+        lane = AdmissionController("agent", max_concurrent=1, max_queue=0)
+        await lane.acquire()
+        
+        with patch("agent.api.agent_lane", lane), \
+             patch("agent.api.get_session", return_value=None):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.get("/sessions/abc")
+        
+        assert response.status_code == 404
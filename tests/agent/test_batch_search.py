@@ -0,0 +1,79 @@
+"""
+Tests for the batch search API.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+import httpx
+from pydantic import ValidationError
+from unittest.mock import AsyncMock, patch
+
+from agent import tools
+from agent.api import app
+from agent.models import BatchSearchRequest
+
+
+class TestGenerateEmbeddings:
+    """Test batched embedding."""
+    
+    @pytest.mark.asyncio
+    async def test_one_call_in_input_order(self):
+        """Test texts are embedded in one call and returned by index."""
+        response = SimpleNamespace(data=[
+            SimpleNamespace(index=1, embedding=[0.2]),
+            SimpleNamespace(index=0, embedding=[0.1])
+        ])
+        with patch.object(tools.embedding_client.embeddings, "create", AsyncMock(return_value=response)) as create:
+            embeddings = await tools.generate_embeddings(["a", "b"])
+        
+        create.assert_awaited_once()
+        assert create.call_args.kwargs["input"] == ["a", "b"]
+        assert embeddings == [[0.1], [0.2]]
+
+
+class TestBatchSearchRequest:
+    """Test batch request validation."""
+    
+    def test_graph_queries_rejected(self):
+        """Test only embedding-based searches are accepted."""
+        with pytest.raises(ValidationError):
+            BatchSearchRequest(queries=[{"query": "q", "search_type": "graph"}])
+    
+    def test_empty_batch_rejected(self):
+        """Test a batch needs at least one query."""
+        with pytest.raises(ValidationError):
+            BatchSearchRequest(queries=[])
+
+
+class TestBatchSearchEndpoint:
+    """Test /search/batch."""
+    
+    @pytest.mark.asyncio
+    async def test_streams_ndjson_per_query(self):
+        """Test each query is searched with its embedding and streamed as a line."""
+        vector = AsyncMock(return_value=[])
+        hybrid = AsyncMock(side_effect=RuntimeError("db down"))
+        body = {"queries": [
+            {"query": "first", "search_type": "vector", "limit": 3},
+            {"query": "second", "search_type": "hybrid"}
+        ]}
+        
+        with patch("agent.api.generate_embeddings", new=AsyncMock(return_value=[[0.1], [0.2]])) as embed, \
+             patch("agent.api.vector_search_tool", new=vector), \
+             patch("agent.api.hybrid_search_tool", new=hybrid):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/search/batch", json=body)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+        
+        embed.assert_awaited_once_with(["first", "second"])
+        assert vector.call_args.kwargs["query_embedding"] == [0.1]
+        assert vector.call_args.args[0].limit == 3
+        assert lines[0]["search_type"] == "vector"
+        assert lines[0]["total_results"] == 0
+        assert hybrid.call_args.kwargs["query_embedding"] == [0.2]
+        assert lines[1] == {"index": 1, "error": "db down"}
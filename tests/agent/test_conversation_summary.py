@@ -0,0 +1,120 @@
+"""
+Tests for conversation context and rolling summaries.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent import conversation_summary
+from agent.conversation_summary import update_conversation_summary, schedule_summary_update
+from agent.api import build_agent_prompt
+
+
+def make_messages(count):
+    """Build alternating user/assistant messages one second apart."""
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}",
+            "created_at": f"2024-01-01T00:00:{i:02d}+00:00"
+        }
+        for i in range(count)
+    ]
+
+
+class TestConversationSummary:
+    """Test summary updates."""
+    
+    @pytest.mark.asyncio
+    async def test_update_folds_messages_after_previous_summary(self):
+        """Test messages since the last summary are folded in and the marker advances."""
+        messages = make_messages(12)
+        metadata = {"conversation_summary": "Earlier", "summary_through": "2023-12-31T23:59:59+00:00"}
+        
+        with patch('agent.conversation_summary.get_messages_between', new=AsyncMock(return_value=messages)) as mock_between, \
+             patch('agent.conversation_summary.summarize_messages', new=AsyncMock(return_value="Updated")) as mock_summarize, \
+             patch('agent.conversation_summary.update_session', new=AsyncMock(return_value=True)) as mock_update:
+            assert await update_conversation_summary("session-1", metadata, "2024-01-01T00:01:00+00:00")
+        
+        assert mock_between.call_args.kwargs["after"] == "2023-12-31T23:59:59+00:00"
+        assert mock_summarize.call_args.args == ("Earlier", messages)
+        mock_update.assert_awaited_once_with("session-1", {
+            "conversation_summary": "Updated",
+            "summary_through": "2024-01-01T00:00:11+00:00"
+        })
+    
+    @pytest.mark.asyncio
+    async def test_update_waits_for_enough_messages(self):
+        """Test a handful of older messages does not trigger an LLM call."""
+        with patch('agent.conversation_summary.get_messages_between', new=AsyncMock(return_value=make_messages(3))), \
+             patch('agent.conversation_summary.summarize_messages', new=AsyncMock()) as mock_summarize:
+            assert not await update_conversation_summary("session-1", {}, "2024-01-01T00:01:00+00:00")
+        
+        mock_summarize.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_schedule_runs_once_per_session(self, monkeypatch):
+        """Test concurrent requests share a single in-flight update."""
+        monkeypatch.setattr(conversation_summary, "CONVERSATION_SUMMARY_ENABLED", True)
+        
+        with patch('agent.conversation_summary.update_conversation_summary', new=AsyncMock()) as mock_update:
+            schedule_summary_update("session-1", {}, "2024-01-01T00:00:00+00:00")
+            schedule_summary_update("session-1", {}, "2024-01-01T00:00:00+00:00")
+            await asyncio.gather(*conversation_summary._tasks)
+        
+        mock_update.assert_awaited_once()
+        assert "session-1" not in conversation_summary._updating
+
+
+class TestBuildAgentPrompt:
+    """Test prompt construction from conversation context."""
+    
+    @pytest.mark.asyncio
+    async def test_no_context_uses_message(self):
+        """Test a new session sends the message as is."""
+        with patch('agent.api.get_recent_messages', new=AsyncMock(return_value=[])):
+            assert await build_agent_prompt("Hello", "session-1") == "Hello"
+    
+    @pytest.mark.asyncio
+    async def test_summary_prepended_to_recent_messages(self, monkeypatch):
+        """Test a stored summary precedes the verbatim recent messages."""
+        monkeypatch.setattr("agent.api.CONVERSATION_SUMMARY_ENABLED", True)
+        recent = make_messages(6)
+        session = {"metadata": {"conversation_summary": "User asked about OpenAI funding."}}
+        
+        with patch('agent.api.get_recent_messages', new=AsyncMock(return_value=recent)), \
+             patch('agent.api.get_session', new=AsyncMock(return_value=session)), \
+             patch('agent.api.get_messages_between', new=AsyncMock(return_value=[])), \
+             patch('agent.api.schedule_summary_update') as mock_schedule:
+            prompt = await build_agent_prompt("And Microsoft?", "session-1")
+        
+        assert prompt.startswith("Summary of earlier conversation:\nUser asked about OpenAI funding.")
+        assert "user: message 0" in prompt
+        assert prompt.endswith("Current question: And Microsoft?")
+        mock_schedule.assert_called_once_with("session-1", session["metadata"], recent[0]["created_at"])
+    
+    @pytest.mark.asyncio
+    async def test_unsummarized_messages_stay_verbatim(self, monkeypatch):
+        """Test messages between summary_through and the window aren't dropped."""
+        monkeypatch.setattr("agent.api.CONVERSATION_SUMMARY_ENABLED", True)
+        messages = make_messages(12)
+        metadata = {
+            "conversation_summary": "User asked about OpenAI funding.",
+            "summary_through": messages[2]["created_at"]
+        }
+        
+        with patch('agent.api.get_recent_messages', new=AsyncMock(return_value=messages[6:])), \
+             patch('agent.api.get_messages_between', new=AsyncMock(return_value=messages[3:6])) as mock_between, \
+             patch('agent.api.schedule_summary_update'):
+            prompt = await build_agent_prompt("And Microsoft?", "session-1", {"metadata": metadata})
+        
+        mock_between.assert_awaited_once_with(
+            "session-1",
+            after=messages[2]["created_at"],
+            before=messages[6]["created_at"],
+            limit=conversation_summary.CONVERSATION_SUMMARY_BATCH,
+            latest=True
+        )
+        history = prompt.split("Previous conversation:\n")[1].split("\n\n")[0]
+        assert history.splitlines() == [f"{m['role']}: {m['content']}" for m in messages[3:]]
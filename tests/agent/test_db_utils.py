@@ -5,7 +5,7 @@ Tests for database utilities.
 import pytest
 import asyncio
 import json
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
 from datetime import datetime, timezone, timedelta
 
 from agent.db_utils import (
@@ -14,11 +14,15 @@ from agent.db_utils import (
     get_session,
     update_session,
     add_message,
+    add_messages,
     get_session_messages,
+    get_recent_messages,
     get_document,
     list_documents,
+    list_documents_page,
     vector_search,
     hybrid_search,
+    compile_chunk_filters,
     get_document_chunks,
     test_connection as db_test_connection
 )
@@ -59,6 +63,31 @@ class TestDatabasePool:
                 command_timeout=60
             )
     
+    def test_pool_budget_split_across_workers(self, monkeypatch):
+        """Test each worker's pool gets an equal share of the connection budget."""
+        monkeypatch.setattr("agent.db_utils.DB_POOL_BUDGET", 40)
+        monkeypatch.setattr("agent.db_utils.APP_WORKERS", 8)
+        pool = DatabasePool("postgresql://test")
+        
+        assert pool.max_size == 5
+        assert pool.min_size == 5
+        
+        monkeypatch.setattr("agent.db_utils.APP_WORKERS", 16)
+        assert DatabasePool("postgresql://test").min_size == 2
+    
+    @pytest.mark.asyncio
+    async def test_warm_pings_min_size_connections(self):
+        """Test warming runs a query on each of the pool's minimum connections."""
+        pool = DatabasePool("postgresql://test")
+        mock_conn = AsyncMock()
+        pool.pool = MagicMock()
+        pool.pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        pool.pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        
+        await pool.warm()
+        
+        assert mock_conn.fetchval.await_count == pool.min_size
+    
     @pytest.mark.asyncio
     async def test_close(self):
         """Test pool closure."""
@@ -203,6 +232,27 @@ class TestMessageManagement:
             assert call_args[0][2] == "user"  # role
             assert call_args[0][3] == "Hello"  # content
     
+    @pytest.mark.asyncio
+    async def test_add_messages_single_insert(self):
+        """Test several messages are written in one multi-row insert."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            now = datetime.now(timezone.utc)
+            
+            count = await add_messages([
+                {"id": "msg-1", "session_id": "session-123", "role": "user", "content": "Hello", "created_at": now},
+                {"id": "msg-2", "session_id": "session-123", "role": "assistant", "content": "Hi", "metadata": {"a": 1}, "created_at": now}
+            ])
+            
+            assert count == 2
+            mock_conn.execute.assert_awaited_once()
+            query, *args = mock_conn.execute.call_args[0]
+            assert "unnest" in query
+            assert args[0] == ["msg-1", "msg-2"]
+            assert args[4] == ['{}', '{"a": 1}']
+    
     @pytest.mark.asyncio
     async def test_get_session_messages(self):
         """Test getting session messages."""
@@ -234,6 +284,40 @@ class TestMessageManagement:
             assert messages[0]["role"] == "user"
             assert messages[1]["role"] == "assistant"
             mock_conn.fetch.assert_called_once()
+    
+    
+    @pytest.mark.asyncio
+    async def test_get_recent_messages(self):
+        """Test recent messages are read newest first and returned oldest first."""
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            now = datetime.now(timezone.utc)
+            mock_conn.fetch.return_value = [
+                {
+                    "id": "msg-2",
+                    "role": "assistant",
+                    "content": "Hi there!",
+                    "metadata": '{}',
+                    "created_at": now
+                },
+                {
+                    "id": "msg-1",
+                    "role": "user",
+                    "content": "Hello",
+                    "metadata": '{}',
+                    "created_at": now - timedelta(seconds=1)
+                }
+            ]
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            messages = await get_recent_messages("session-123", limit=6)
+            
+            assert [m["id"] for m in messages] == ["msg-1", "msg-2"]
+            query, *args = mock_conn.fetch.call_args[0]
+            assert "ORDER BY created_at DESC" in query
+            assert "LIMIT $2" in query
+            assert args == ["session-123", 6]
 
 
 class TestDocumentManagement:
@@ -300,6 +384,49 @@ class TestDocumentManagement:
             assert len(documents) == 2
             assert documents[0]["title"] == "Document 1"
             assert documents[1]["title"] == "Document 2"
+    
+    @pytest.mark.asyncio
+    async def test_list_documents_page_cursor(self):
+        """Test pages end with a cursor that continues after the last row."""
+        created_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        rows = [
+            {
+                "id": f"00000000-0000-0000-0000-00000000000{i}",
+                "title": f"Document {i}",
+                "source": f"doc{i}.md",
+                "metadata": '{}',
+                "created_at": created_at,
+                "updated_at": created_at,
+                "chunk_count": i
+            }
+            for i in range(3)
+        ]
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.fetch.return_value = rows
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            page = await list_documents_page(limit=2)
+            
+            assert [d["title"] for d in page["documents"]] == ["Document 0", "Document 1"]
+            assert "LIMIT $1" in mock_conn.fetch.call_args.args[0]
+            assert mock_conn.fetch.call_args.args[1] == 3
+            assert "JOIN chunks" not in mock_conn.fetch.call_args.args[0]
+            
+            mock_conn.fetch.return_value = rows[2:]
+            page = await list_documents_page(limit=2, cursor=page["next_cursor"])
+            
+            query, *params = mock_conn.fetch.call_args.args
+            assert "(d.created_at, d.id) < ($1::timestamptz, $2::uuid)" in query
+            assert params[:2] == [created_at, rows[1]["id"]]
+            assert page["next_cursor"] is None
+    
+    @pytest.mark.asyncio
+    async def test_list_documents_bad_cursor(self):
+        """Test malformed cursors are rejected before querying."""
+        with pytest.raises(ValueError):
+            await list_documents(cursor="not-a-cursor")
 
 
 class TestVectorSearch:
@@ -372,6 +499,52 @@ class TestVectorSearch:
             assert results[0]["vector_similarity"] == 0.85
             assert results[0]["text_similarity"] == 0.70
     
+    def test_compile_chunk_filters(self):
+        """Test filters compile to numbered, typed SQL predicates."""
+        created_after = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        predicates, params = compile_chunk_filters(
+            {
+                "metadata": {"company": "OpenAI"},
+                "sources": ["news.md"],
+                "created_after": created_after
+            },
+            3
+        )
+        
+        assert predicates == [
+            "d.metadata @> $3::jsonb",
+            "d.source = ANY($4::text[])",
+            "d.created_at >= $5::timestamptz"
+        ]
+        assert params == ['{"company": "OpenAI"}', ["news.md"], created_after]
+    
+    def test_compile_chunk_filters_rejects_unknown(self):
+        """Test unknown filter keys are rejected rather than ignored."""
+        with pytest.raises(ValueError, match="Unsupported search filter"):
+            compile_chunk_filters({"author": "x"}, 1)
+    
+    @pytest.mark.asyncio
+    async def test_filtered_vector_search_uses_iterative_scan(self, monkeypatch):
+        """Test filtered searches push predicates into SQL and enable iterative scans."""
+        monkeypatch.setattr('agent.db_utils._iterative_scan_supported', None)
+        with patch('agent.db_utils.db_pool') as mock_pool:
+            mock_conn = AsyncMock()
+            mock_conn.transaction = MagicMock()
+            mock_conn.transaction.return_value.__aenter__ = AsyncMock(return_value=None)
+            mock_conn.transaction.return_value.__aexit__ = AsyncMock(return_value=None)
+            mock_conn.fetchval.return_value = "0.8.0"
+            mock_conn.fetch.return_value = []
+            mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+            mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+            
+            await vector_search([0.1] * 4, limit=5, filters={"sources": ["news.md"]})
+            
+            assert "iterative_scan = relaxed_order" in mock_conn.execute.call_args[0][0]
+            query, *args = mock_conn.fetch.call_args[0]
+            assert "match_chunks" not in query
+            assert "d.source = ANY($3::text[])" in query
+            assert args[1:] == [5, ["news.md"]]
+    
     @pytest.mark.asyncio
     async def test_get_document_chunks(self):
         """Test getting document chunks."""
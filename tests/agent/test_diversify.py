@@ -0,0 +1,118 @@
+"""
+Tests for near-duplicate suppression and MMR diversification.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent.diversify import simhash, near_duplicate_keep_mask, mmr_select
+from agent.tools import vector_search_tool, VectorSearchInput
+
+
+BASE_TEXT = (
+    "Microsoft extended its partnership with OpenAI through a multiyear, "
+    "multibillion dollar investment to accelerate AI breakthroughs and deploy "
+    "models across Azure for enterprise customers worldwide. The agreement "
+    "follows earlier rounds in 2019 and 2021 and makes Azure the exclusive "
+    "cloud provider for OpenAI research, products and API services, while "
+    "Microsoft will increase its investment in specialized supercomputing "
+    "systems to support the development of independent AI research."
+)
+
+
+class TestSimHash:
+    """Test SimHash near-duplicate detection."""
+    
+    def test_identical_text_same_fingerprint(self):
+        """Test fingerprints are deterministic."""
+        assert simhash(BASE_TEXT) == simhash(BASE_TEXT)
+    
+    def test_collapses_near_duplicates_keeping_first(self):
+        """Test near-identical chunks collapse onto the best ranked one."""
+        texts = [
+            BASE_TEXT,
+            "Quarterly revenue at Nvidia grew on data center demand for GPUs.",
+            BASE_TEXT.replace("worldwide", "globally"),
+            BASE_TEXT
+        ]
+        
+        keep = near_duplicate_keep_mask(texts)
+        
+        assert keep.tolist() == [True, True, False, False]
+    
+    def test_distinct_texts_kept(self):
+        """Test unrelated chunks are all kept."""
+        texts = [
+            "Google DeepMind published new protein folding results.",
+            "Amazon announced custom Trainium chips for model training.",
+            "Meta released open weights for its latest language model."
+        ]
+        
+        assert near_duplicate_keep_mask(texts).all()
+
+
+class TestMMR:
+    """Test Maximal Marginal Relevance selection."""
+    
+    def test_skips_redundant_candidate(self):
+        """Test a near-copy of the top result loses to a novel one."""
+        query = [1.0, 0.0, 0.0]
+        embeddings = np.array([
+            [0.9, 0.1, 0.0],
+            [0.9, 0.11, 0.0],
+            [0.7, 0.0, 0.7]
+        ])
+        
+        assert mmr_select(query, embeddings, 2, lambda_mult=0.5) == [0, 2]
+    
+    def test_lambda_one_is_relevance_order(self):
+        """Test lambda 1.0 reduces to ranking by relevance."""
+        embeddings = np.eye(3)
+        relevance = np.array([0.2, 0.9, 0.5])
+        
+        assert mmr_select([1, 0, 0], embeddings, 3, lambda_mult=1.0, relevance=relevance) == [1, 2, 0]
+    
+    def test_k_larger_than_candidates(self):
+        """Test selection stops when candidates run out."""
+        assert mmr_select([1, 0], np.eye(2), 5) == [0, 1]
+
+
+class TestSearchDiversification:
+    """Test dedup and MMR in the vector search tool."""
+    
+    @pytest.mark.asyncio
+    async def test_vector_search_dedup_and_mmr(self):
+        """Test duplicates are dropped and MMR uses stored chunk embeddings."""
+        rows = [
+            {
+                "chunk_id": chunk_id,
+                "document_id": "doc",
+                "content": content,
+                "similarity": similarity,
+                "metadata": {},
+                "document_title": "Doc",
+                "document_source": "doc.md"
+            }
+            for chunk_id, content, similarity in [
+                ("a", BASE_TEXT, 0.9),
+                ("b", BASE_TEXT, 0.89),
+                ("c", "OpenAI models run on Azure for enterprise customers.", 0.85),
+                ("d", "Nvidia GPUs power the training clusters.", 0.6)
+            ]
+        ]
+        stored = {"a": [1.0, 0.0], "c": [0.99, 0.1], "d": [0.0, 1.0]}
+        timings = {}
+        
+        with patch('agent.tools.vector_search', new=AsyncMock(return_value=rows)), \
+             patch('agent.tools.get_chunk_embeddings', new=AsyncMock(return_value=stored)) as mock_embeddings, \
+             patch('agent.tools.rerank', new=AsyncMock(side_effect=lambda q, c, k: (c[:k], {}))):
+            results = await vector_search_tool(
+                VectorSearchInput(query="openai azure", limit=2, dedup=True, diversify=True, mmr_lambda=0.5),
+                query_embedding=[1.0, 0.0],
+                timings=timings
+            )
+        
+        assert mock_embeddings.call_args.args[0] == ["a", "c", "d"]
+        assert [r.chunk_id for r in results] == ["a", "d"]
+        assert {"dedup_ms", "mmr_ms"} <= timings.keys()
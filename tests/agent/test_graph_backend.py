@@ -0,0 +1,191 @@
+"""
+Tests for the pluggable graph backends.
+"""
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+from agent.graph_backend import (
+    PostgresGraphBackend,
+    Neo4jGraphBackend,
+    get_graph_backend
+)
+from agent.graph_utils import search_knowledge_graph
+
+
+# Patch agent.graph_backend's pool in tests that take mock_db_conn
+graph_backend_pool = pytest.mark.parametrize("mock_db_conn", ["agent.graph_backend.db_pool"], indirect=True)
+
+
+class TestBackendSelection:
+    """Test GRAPH_BACKEND configuration."""
+    
+    def test_default_is_neo4j(self, monkeypatch):
+        """Test Neo4j is used unless configured otherwise."""
+        monkeypatch.delenv("GRAPH_BACKEND", raising=False)
+        assert isinstance(get_graph_backend(), Neo4jGraphBackend)
+    
+    def test_postgres_backend(self, monkeypatch):
+        """Test GRAPH_BACKEND=postgres selects the PostgreSQL backend."""
+        monkeypatch.setenv("GRAPH_BACKEND", "postgres")
+        assert isinstance(get_graph_backend(), PostgresGraphBackend)
+    
+    @pytest.mark.asyncio
+    async def test_search_knowledge_graph_dispatch(self, monkeypatch):
+        """Test search_knowledge_graph routes to the configured backend."""
+        monkeypatch.setenv("GRAPH_BACKEND", "postgres")
+        
+        with patch.object(PostgresGraphBackend, "search", AsyncMock(return_value=[{"uuid": "r1"}])) as search:
+            results = await search_knowledge_graph("OpenAI")
+        
+        assert results == [{"uuid": "r1"}]
+        search.assert_awaited_once_with("OpenAI", query_embedding=None)
+
+
+class TestPostgresGraphBackend:
+    """Test the PostgreSQL graph backend."""
+    
+    @graph_backend_pool
+    @pytest.mark.asyncio
+    async def test_upsert_entities_single_statement(self, mock_db_conn):
+        """Test entities are written with one unnest-based upsert."""
+        written = await PostgresGraphBackend().upsert_entities([
+            {"uuid": "00000000-0000-0000-0000-000000000001", "name": "OpenAI"},
+            {"uuid": "00000000-0000-0000-0000-000000000002", "name": "Microsoft", "summary": "Company"}
+        ])
+        
+        assert written == 2
+        assert mock_db_conn.execute.call_count == 1
+        sql, uuids, names, summaries = mock_db_conn.execute.call_args[0][:4]
+        assert "unnest" in sql
+        assert "ON CONFLICT (uuid)" in sql
+        assert names == ["OpenAI", "Microsoft"]
+        assert summaries == ["", "Company"]
+    
+    @graph_backend_pool
+    @pytest.mark.asyncio
+    async def test_upsert_relationships_counts_inserted_rows(self, mock_db_conn):
+        """Test the written count comes from the INSERT status."""
+        mock_db_conn.execute.return_value = "INSERT 0 1"
+        written = await PostgresGraphBackend().upsert_relationships([
+            {
+                "uuid": "r1",
+                "name": "INVESTED_IN",
+                "fact": "Microsoft invested in OpenAI",
+                "source_node_uuid": "e2",
+                "target_node_uuid": "e1"
+            },
+            {
+                "uuid": "r2",
+                "name": "USES",
+                "source_node_uuid": "missing",
+                "target_node_uuid": "e1"
+            }
+        ])
+        
+        assert written == 1
+    
+    @graph_backend_pool
+    @pytest.mark.asyncio
+    async def test_search_maps_rows(self, mock_db_conn):
+        """Test search results use the Neo4j result shape."""
+        mock_db_conn.fetch.return_value = [
+            {
+                "uuid": "r1",
+                "fact": "Microsoft invested in OpenAI",
+                "valid_at": datetime(2023, 1, 23, tzinfo=timezone.utc),
+                "invalid_at": None,
+                "source_node_uuid": "e2",
+                "score": 0.4
+            }
+        ]
+        results = await PostgresGraphBackend().search("OpenAI investment", limit=5)
+        
+        assert results == [{
+            "uuid": "r1",
+            "fact": "Microsoft invested in OpenAI",
+            "valid_at": "2023-01-23T00:00:00+00:00",
+            "invalid_at": None,
+            "source_node_uuid": "e2",
+            "score": 0.4
+        }]
+        sql, query, limit = mock_db_conn.fetch.call_args[0]
+        assert "@@" in sql
+        assert (query, limit) == ("OpenAI investment", 5)
+    
+    @graph_backend_pool
+    @pytest.mark.asyncio
+    async def test_traversal_builds_subgraph(self, mock_db_conn):
+        """Test the recursive CTE result is returned in adjacency form."""
+        mock_db_conn.fetch.side_effect = [
+            [
+                {"uuid": "e1", "name": "OpenAI", "depth": 0},
+                {"uuid": "e2", "name": "Microsoft", "depth": 1}
+            ],
+            [
+                {
+                    "uuid": "r1",
+                    "name": "INVESTED_IN",
+                    "fact": "Microsoft invested in OpenAI",
+                    "valid_at": None,
+                    "source_uuid": "e2",
+                    "target_uuid": "e1"
+                }
+            ]
+        ]
+        result = await PostgresGraphBackend().get_related_entities(
+            "OpenAI", relationship_types=["INVESTED_IN"], depth=2
+        )
+        
+        traversal_sql = mock_db_conn.fetch.call_args_list[0][0][0]
+        assert "WITH RECURSIVE" in traversal_sql
+        assert mock_db_conn.fetch.call_args_list[0][0][4] == ["INVESTED_IN"]
+        assert result["related_entities"] == ["Microsoft"]
+        assert result["edges"][0]["source"] == 1
+        assert result["related_facts"][0]["fact"] == "Microsoft invested in OpenAI"
+    
+    @graph_backend_pool
+    @pytest.mark.asyncio
+    async def test_timeline_keyset_page(self, mock_db_conn):
+        """Test the timeline pages on (valid_at, uuid) with one extra row."""
+        mock_db_conn.fetch.return_value = [
+            {"uuid": "r2", "fact": "B", "valid_at": datetime(2024, 2, 1, tzinfo=timezone.utc), "invalid_at": None},
+            {"uuid": "r1", "fact": "A", "valid_at": datetime(2024, 1, 1, tzinfo=timezone.utc), "invalid_at": None}
+        ]
+        page = await PostgresGraphBackend().get_entity_timeline("OpenAI", limit=1)
+        
+        assert [f["fact"] for f in page["timeline"]] == ["B"]
+        assert page["next_cursor"] is not None
+        sql = mock_db_conn.fetch.call_args[0][0]
+        assert "(r.valid_at, r.uuid) < ($5::timestamptz, $6::uuid)" in sql
+        assert "ORDER BY r.valid_at DESC, r.uuid DESC" in sql
+        assert mock_db_conn.fetch.call_args[0][-1] == 2
+    
+    @pytest.mark.asyncio
+    async def test_sync_resyncs_retired_edges_with_endpoints(self):
+        """Test an incremental sync picks up expired edges and upserts their endpoints first."""
+        edge = {
+            "uuid": "r1",
+            "name": "INVESTED_IN",
+            "source_node_uuid": "e2",
+            "target_node_uuid": "e1"
+        }
+        endpoints = [{"uuid": "e1", "name": "OpenAI"}, {"uuid": "e2", "name": "Microsoft"}]
+        reads = AsyncMock(side_effect=[[], [edge], endpoints])
+        backend = PostgresGraphBackend()
+        calls = []
+        
+        with patch("agent.graph_backend.graph_client") as client, \
+             patch.object(backend, "upsert_entities", AsyncMock(side_effect=lambda rows: calls.append("entities") or len(rows))), \
+             patch.object(backend, "upsert_relationships", AsyncMock(side_effect=lambda rows: calls.append("relationships") or len(rows))):
+            client._initialized = True
+            client._read = reads
+            counts = await backend.sync_from_neo4j(since=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        
+        edge_query = reads.call_args_list[1][0][0]
+        assert "r.expired_at >= datetime($since)" in edge_query
+        assert "r.invalid_at >= datetime($since)" in edge_query
+        assert reads.call_args_list[2][0][1] == {"uuids": ["e1", "e2"]}
+        assert calls == ["entities", "relationships"]
+        assert counts == {"entities": 2, "relationships": 1}
@@ -0,0 +1,184 @@
+"""
+Tests for the in-memory graph snapshot.
+"""
+
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import numpy as np
+
+from agent import graph_snapshot
+from agent.graph_snapshot import GraphSnapshot
+
+
+def edge(uuid, source, target, name="RELATES", fact=None, updated_at=None):
+    """Build an edge dict keyed by entity name."""
+    return {
+        "uuid": uuid,
+        "name": name,
+        "fact": fact or f"{source} {name} {target}",
+        "source_uuid": f"id-{source}",
+        "source_name": source,
+        "target_uuid": f"id-{target}",
+        "target_name": target,
+        "updated_at": updated_at
+    }
+
+
+@pytest.fixture
+def snapshot():
+    """Snapshot with a small chain plus a branch: OpenAI-Microsoft-Azure, OpenAI-Nvidia."""
+    snapshot = GraphSnapshot()
+    snapshot.add_edges([
+        edge("r1", "Microsoft", "OpenAI", "INVESTED_IN", updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        edge("r2", "Microsoft", "Azure", "OWNS"),
+        edge("r3", "OpenAI", "Nvidia", "BUYS_FROM", updated_at=datetime(2024, 2, 1, tzinfo=timezone.utc))
+    ])
+    return snapshot
+
+
+class TestGraphSnapshot:
+    """Test snapshot construction and queries."""
+    
+    def test_csr_layout(self, snapshot):
+        """Test adjacency arrays are int32 CSR over both directions."""
+        assert snapshot.indices.dtype == np.int32
+        assert snapshot.node_count == 4
+        assert snapshot.edge_count == 3
+        assert snapshot.indptr[-1] == 6
+        
+        microsoft = snapshot.node_id("microsoft")
+        neighbors = snapshot.indices[snapshot.indptr[microsoft]:snapshot.indptr[microsoft + 1]]
+        assert sorted(snapshot._node_names[n] for n in neighbors) == ["Azure", "OpenAI"]
+    
+    def test_k_hop_neighborhood(self, snapshot):
+        """Test depth limits and the Subgraph result format."""
+        one_hop = snapshot.neighborhood("OpenAI", depth=1)
+        two_hop = snapshot.neighborhood("OpenAI", depth=2)
+        
+        assert sorted(one_hop["related_entities"]) == ["Microsoft", "Nvidia"]
+        assert sorted(two_hop["related_entities"]) == ["Azure", "Microsoft", "Nvidia"]
+        assert two_hop["search_method"] == "graph_snapshot"
+        assert {f["fact"] for f in two_hop["related_facts"]} == {
+            "Microsoft INVESTED_IN OpenAI", "Microsoft OWNS Azure", "OpenAI BUYS_FROM Nvidia"
+        }
+    
+    def test_relationship_type_filter(self, snapshot):
+        """Test only the requested relationship types are followed."""
+        result = snapshot.neighborhood("OpenAI", relationship_types=["INVESTED_IN", "OWNS"], depth=2)
+        
+        assert sorted(result["related_entities"]) == ["Azure", "Microsoft"]
+    
+    def test_unknown_entity(self, snapshot):
+        """Test unknown entities return None so callers can fall back."""
+        assert snapshot.neighborhood("Unknown Corp") is None
+    
+    def test_shortest_path(self, snapshot):
+        """Test BFS shortest path returns facts along the way."""
+        path = snapshot.shortest_path("Azure", "Nvidia")
+        
+        assert [(step["from"], step["to"]) for step in path] == [
+            ("Azure", "Microsoft"), ("Microsoft", "OpenAI"), ("OpenAI", "Nvidia")
+        ]
+        assert snapshot.shortest_path("Azure", "Nvidia", max_depth=2) is None
+        assert snapshot.shortest_path("Azure", "azure") == []
+    
+    def test_incremental_update(self, snapshot):
+        """Test edges are updated in place and the watermark advances."""
+        snapshot.add_edges([
+            edge("r1", "Microsoft", "OpenAI", "INVESTED_IN", fact="Microsoft invested $10B in OpenAI",
+                 updated_at=datetime(2024, 3, 1, tzinfo=timezone.utc)),
+            edge("r4", "Nvidia", "TSMC", "BUYS_FROM")
+        ])
+        
+        assert snapshot.edge_count == 4
+        assert snapshot.last_updated == datetime(2024, 3, 1, tzinfo=timezone.utc)
+        assert snapshot.fact(0) == "Microsoft invested $10B in OpenAI"
+        assert snapshot.shortest_path("Microsoft", "TSMC") is not None
+    
+    def test_memory_stats(self, snapshot):
+        """Test memory is reported per million edges."""
+        stats = snapshot.stats()
+        
+        assert stats["memory_bytes"] > 0
+        assert stats["bytes_per_million_edges"] == int(stats["memory_bytes"] * 1_000_000 / 3)
+
+
+class TestSnapshotRefresh:
+    """Test refreshing the global snapshot."""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_snapshot(self, monkeypatch):
+        """Start each test from an unloaded, enabled snapshot."""
+        monkeypatch.setattr(graph_snapshot, "GRAPH_SNAPSHOT_ENABLED", True)
+        monkeypatch.setattr(graph_snapshot, "get_graph_backend_name", lambda: "postgres")
+        graph_snapshot.reset_graph_snapshot()
+        yield
+        graph_snapshot.reset_graph_snapshot()
+    
+    def test_copy_leaves_original_untouched(self):
+        """Test updating a copy doesn't change the snapshot readers hold."""
+        original = GraphSnapshot()
+        original.add_edges([edge("r1", "Microsoft", "OpenAI", "INVESTED_IN")])
+        
+        updated = original.copy()
+        updated.add_edges([edge("r2", "OpenAI", "Nvidia", "BUYS_FROM")])
+        
+        assert original.edge_count == 1
+        assert original.node_id("Nvidia") is None
+        assert updated.edge_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_periodic_full_rebuild_drops_deleted_edges(self, monkeypatch):
+        """Test a full rebuild replaces edges loaded by earlier refreshes."""
+        fetch = AsyncMock(side_effect=[
+            [edge("r1", "Microsoft", "OpenAI", "INVESTED_IN")],
+            [edge("r2", "OpenAI", "Nvidia", "BUYS_FROM")]
+        ])
+        monkeypatch.setattr(graph_snapshot, "fetch_edges_from_postgres", fetch)
+        
+        await graph_snapshot.refresh_graph_snapshot()
+        monkeypatch.setattr(graph_snapshot, "GRAPH_SNAPSHOT_FULL_REBUILD_SECONDS", 0)
+        await graph_snapshot.refresh_graph_snapshot()
+        
+        assert fetch.call_args_list[1][0][0] is None
+        assert graph_snapshot.graph_snapshot.edge_count == 1
+        assert graph_snapshot.graph_snapshot.node_id("Microsoft") is None
+    
+    @pytest.mark.asyncio
+    async def test_reset_forces_reload(self, monkeypatch):
+        """Test clearing the graph drops the snapshot until it is reloaded."""
+        fetch = AsyncMock(side_effect=[[edge("r1", "Microsoft", "OpenAI", "INVESTED_IN")], []])
+        monkeypatch.setattr(graph_snapshot, "fetch_edges_from_postgres", fetch)
+        
+        assert (await graph_snapshot.get_graph_snapshot()).edge_count == 1
+        graph_snapshot.reset_graph_snapshot()
+        
+        assert (await graph_snapshot.get_graph_snapshot()).edge_count == 0
+        assert fetch.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_stale_snapshot_refreshed_in_background(self, monkeypatch):
+        """Test a stale snapshot is served while a background task refreshes it."""
+        release = asyncio.Event()
+        
+        async def slow_fetch(since):
+            await release.wait()
+            return [edge("r2", "OpenAI", "Nvidia", "BUYS_FROM")]
+        
+        monkeypatch.setattr(
+            graph_snapshot, "fetch_edges_from_postgres",
+            AsyncMock(return_value=[edge("r1", "Microsoft", "OpenAI", "INVESTED_IN")])
+        )
+        loaded = await graph_snapshot.get_graph_snapshot()
+        monkeypatch.setattr(graph_snapshot, "fetch_edges_from_postgres", slow_fetch)
+        monkeypatch.setattr(graph_snapshot, "GRAPH_SNAPSHOT_REFRESH_SECONDS", 0)
+        
+        assert await graph_snapshot.get_graph_snapshot() is loaded
+        release.set()
+        await graph_snapshot._refresh_task
+        
+        assert graph_snapshot.graph_snapshot.edge_count == 2
+        assert loaded.edge_count == 1
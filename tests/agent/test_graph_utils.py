@@ -0,0 +1,357 @@
+"""
+Tests for graph utilities.
+"""
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock, AsyncMock
+
+from agent.graph_utils import (
+    GraphitiClient,
+    build_fulltext_query,
+    ENTITY_NAME_INDEX,
+    FACT_INDEX,
+    FACT_EMBEDDING_INDEX,
+    GraphQueryCache
+)
+from agent.pagination import encode_cursor, decode_cursor
+
+
+class MockResult:
+    """Async-iterable stand-in for a Neo4j result."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def __aiter__(self):
+        self._iter = iter(self.records)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def make_client(records):
+    """Create a GraphitiClient whose driver session returns the given records."""
+    client = GraphitiClient()
+
+    session = AsyncMock()
+    session.run = AsyncMock(return_value=MockResult(records))
+
+    async def execute_read(work, *args):
+        # Managed read transactions run the unit of work against session.run
+        return await work(session, *args)
+
+    session.execute_read = AsyncMock(side_effect=execute_read)
+
+    class SessionContext:
+        async def __aenter__(self):
+            return session
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            return None
+
+    client.graphiti = Mock()
+    client.graphiti.driver.session = Mock(return_value=SessionContext())
+    client._initialized = True
+    return client, session
+
+
+class TestFulltextQuery:
+    """Test Lucene query construction."""
+
+    def test_terms_joined_with_or(self):
+        """Test each term becomes an alternative."""
+        assert build_fulltext_query("OpenAI funding") == "OpenAI OR funding"
+
+    def test_special_characters_escaped(self):
+        """Test Lucene syntax characters are escaped."""
+        assert build_fulltext_query("C++ (beta)") == "C\\+\\+ OR \\(beta\\)"
+
+    def test_boolean_operators_neutralized(self):
+        """Test bare boolean operators are not treated as syntax."""
+        assert build_fulltext_query("Google AND Microsoft") == "Google OR and OR Microsoft"
+
+    def test_empty_query(self):
+        """Test blank queries produce no Lucene query."""
+        assert build_fulltext_query("   ") == ""
+
+
+class TestTextSearch:
+    """Test full-text backed graph search."""
+
+    @pytest.mark.asyncio
+    async def test_text_search_uses_indexes_and_scores(self):
+        """Test the query goes through the full-text indexes and keeps scores."""
+        client, session = make_client([
+            {
+                "uuid": "rel-1",
+                "fact": "Microsoft invested in OpenAI",
+                "valid_at": None,
+                "invalid_at": None,
+                "source_node_uuid": "node-1",
+                "score": 2.5
+            }
+        ])
+
+        results = await client._text_search("OpenAI")
+
+        assert results[0]["score"] == 2.5
+        cypher, = session.run.call_args[0]
+        params = session.run.call_args[1]["parameters"]
+        assert "db.index.fulltext.queryRelationships" in cypher
+        assert "db.index.fulltext.queryNodes" in cypher
+        assert "CONTAINS" not in cypher
+        assert params["fact_index"] == FACT_INDEX
+        assert params["entity_index"] == ENTITY_NAME_INDEX
+
+    @pytest.mark.asyncio
+    async def test_text_search_blank_query(self):
+        """Test blank queries skip the database."""
+        client, session = make_client([])
+
+        assert await client._text_search("  ") == []
+        session.run.assert_not_called()
+
+
+class TestFactVectorSearch:
+    """Test embedding-based graph fact search."""
+
+    @pytest.mark.asyncio
+    async def test_vector_search_single_query(self):
+        """Test kNN and full-text scores are combined in one Cypher call."""
+        client, session = make_client([
+            {
+                "uuid": "rel-1",
+                "fact": "Microsoft invested in OpenAI",
+                "valid_at": None,
+                "invalid_at": None,
+                "source_node_uuid": "node-1",
+                "score": 0.91
+            }
+        ])
+        client._fact_embedding_dimension = 3
+
+        results = await client._custom_search("who funds OpenAI", query_embedding=[0.1, 0.2, 0.3])
+
+        assert results[0]["uuid"] == "rel-1"
+        assert results[0]["score"] == 0.91
+        assert session.run.call_count == 1
+        cypher, = session.run.call_args[0]
+        params = session.run.call_args[1]["parameters"]
+        assert "db.index.vector.queryRelationships" in cypher
+        assert "db.index.fulltext.queryRelationships" in cypher
+        assert params["vector_index"] == FACT_EMBEDDING_INDEX
+        assert params["embedding"] == [0.1, 0.2, 0.3]
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_uses_text_search(self):
+        """Test embeddings from a different model fall back to full-text search."""
+        client, session = make_client([])
+        client._fact_embedding_dimension = 1536
+
+        await client._custom_search("OpenAI", query_embedding=[0.1, 0.2, 0.3])
+
+        cypher, = session.run.call_args[0]
+        assert "db.index.vector.queryRelationships" not in cypher
+        assert "db.index.fulltext.queryRelationships" in cypher
+
+    @pytest.mark.asyncio
+    async def test_backfill_embeds_in_batches(self):
+        """Test missing fact embeddings are created with one embedder call per batch."""
+        client, session = make_client([])
+        session.run = AsyncMock(side_effect=[
+            MockResult([{"uuid": "rel-1", "fact": "A"}, {"uuid": "rel-2", "fact": "B"}]),
+            MockResult([]),  # vector index creation
+            MockResult([]),  # embedding write
+        ])
+        client.graphiti.embedder.create_batch = AsyncMock(return_value=[[0.1, 0.2], [0.3, 0.4]])
+
+        embedded = await client.backfill_fact_embeddings(batch_size=10)
+
+        assert embedded == 2
+        assert client._fact_embedding_dimension == 2
+        client.graphiti.embedder.create_batch.assert_awaited_once_with(["A", "B"])
+        write_params = session.run.call_args_list[-1][1]["parameters"]
+        assert write_params["rows"] == [
+            {"uuid": "rel-1", "embedding": [0.1, 0.2]},
+            {"uuid": "rel-2", "embedding": [0.3, 0.4]}
+        ]
+
+
+def edge_record(uuid, source, target, neighbor, neighbor_name, name="RELATES"):
+    """Build a traversal record for an edge reached from the frontier."""
+    return {
+        "uuid": uuid,
+        "name": name,
+        "fact": f"{source} {name} {target}",
+        "valid_at": None,
+        "source_uuid": source,
+        "target_uuid": target,
+        "neighbor_uuid": neighbor,
+        "neighbor_name": neighbor_name
+    }
+
+
+class TestRelatedEntities:
+    """Test bounded neighborhood traversal."""
+
+    @pytest.mark.asyncio
+    async def test_two_hop_traversal(self):
+        """Test each hop is one query and the result is an indexed subgraph."""
+        client, session = make_client([])
+        session.run = AsyncMock(side_effect=[
+            MockResult([{"uuid": "a", "name": "OpenAI"}]),
+            MockResult([edge_record("r1", "b", "a", "b", "Microsoft", "INVESTED_IN")]),
+            MockResult([edge_record("r2", "b", "c", "c", "Azure", "OWNS")]),
+        ])
+
+        result = await client.get_related_entities(
+            "OpenAI", relationship_types=["INVESTED_IN", "OWNS"], depth=2
+        )
+
+        assert session.run.call_count == 3
+        assert [n["name"] for n in result["nodes"]] == ["OpenAI", "Microsoft", "Azure"]
+        assert [n["depth"] for n in result["nodes"]] == [0, 1, 2]
+        assert result["edges"][0]["source"] == 1 and result["edges"][0]["target"] == 0
+        assert result["adjacency"][1] == [0, 2]
+        assert result["related_entities"] == ["Microsoft", "Azure"]
+        assert result["related_facts"][1]["target_entity"] == "Azure"
+        hop_params = session.run.call_args_list[1][1]["parameters"]
+        assert hop_params["frontier"] == ["a"]
+        assert hop_params["relationship_types"] == ["INVESTED_IN", "OWNS"]
+
+    @pytest.mark.asyncio
+    async def test_node_budget(self):
+        """Test traversal stops adding entities once the budget is reached."""
+        client, session = make_client([])
+        session.run = AsyncMock(side_effect=[
+            MockResult([{"uuid": "a", "name": "OpenAI"}]),
+            MockResult([
+                edge_record("r1", "a", "b", "b", "Microsoft"),
+                edge_record("r2", "a", "c", "c", "Nvidia"),
+            ]),
+        ])
+
+        result = await client.get_related_entities("OpenAI", depth=3, node_budget=2)
+
+        assert [n["name"] for n in result["nodes"]] == ["OpenAI", "Microsoft"]
+        assert len(result["edges"]) == 1
+        assert result["truncated"] is True
+        # No further hops are queried once the budget is used up
+        assert session.run.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_no_anchor(self):
+        """Test unknown entities return an empty subgraph."""
+        client, session = make_client([])
+
+        result = await client.get_related_entities("Unknown Corp", depth=2)
+
+        assert result["nodes"] == []
+        assert result["related_facts"] == []
+        assert session.run.call_count == 1
+
+
+class TestGraphQueryCache:
+    """Test read query caching."""
+
+    def test_hit_and_miss_counts(self):
+        """Test hit rate reflects lookups."""
+        cache = GraphQueryCache(ttl=60)
+        key = GraphQueryCache.make_key("MATCH (n) RETURN n", {"b": 1, "a": 2})
+
+        assert cache.get(key) is None
+        cache.put(key, [{"n": 1}])
+        assert cache.get(GraphQueryCache.make_key("MATCH (n) RETURN n", {"a": 2, "b": 1})) == [{"n": 1}]
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_expiry_and_eviction(self):
+        """Test expired entries miss and the oldest entries are evicted."""
+        cache = GraphQueryCache(ttl=-1)
+        cache.put("a", [1])
+        assert cache.get("a") is None
+
+        cache = GraphQueryCache(ttl=60, max_entries=2)
+        for key in ["a", "b", "c"]:
+            cache.put(key, [key])
+        assert cache.get("a") is None
+        assert cache.get("c") == ["c"]
+
+    @pytest.mark.asyncio
+    async def test_repeated_reads_served_from_cache(self):
+        """Test repeated searches hit the cache until a write invalidates it."""
+        client, session = make_client([
+            {
+                "uuid": "rel-1",
+                "fact": "Microsoft invested in OpenAI",
+                "valid_at": None,
+                "invalid_at": None,
+                "source_node_uuid": "node-1",
+                "score": 1.0
+            }
+        ])
+        client.graphiti.add_episode = AsyncMock()
+
+        first = await client._text_search("OpenAI")
+        second = await client._text_search("OpenAI")
+        assert first == second
+        assert session.execute_read.call_count == 1
+
+        await client.add_episode("episode-1", "content", "source")
+        await client._text_search("OpenAI")
+        assert session.execute_read.call_count == 2
+        assert client.query_cache.stats()["invalidations"] == 1
+
+
+class TestEntityTimeline:
+    """Test cursor-paginated timelines."""
+    
+    @pytest.mark.asyncio
+    async def test_first_page_and_cursor(self):
+        """Test filters and ordering are pushed into Cypher and a cursor is returned."""
+        client, session = make_client([
+            {"uuid": "r3", "fact": "C", "valid_at": "2024-03-01T00:00:00Z", "invalid_at": None},
+            {"uuid": "r2", "fact": "B", "valid_at": "2024-02-01T00:00:00Z", "invalid_at": None},
+            {"uuid": "r1", "fact": "A", "valid_at": "2024-01-01T00:00:00Z", "invalid_at": None}
+        ])
+        
+        page = await client.get_entity_timeline(
+            "OpenAI", start_date=datetime(2024, 1, 1, tzinfo=timezone.utc), limit=2
+        )
+        
+        assert [f["fact"] for f in page["timeline"]] == ["C", "B"]
+        assert decode_cursor(page["next_cursor"]) == {"valid_at": "2024-02-01T00:00:00Z", "uuid": "r2"}
+        cypher, = session.run.call_args[0]
+        params = session.run.call_args[1]["parameters"]
+        assert "ORDER BY r.valid_at DESC, r.uuid DESC" in cypher
+        assert params["start_date"] == "2024-01-01T00:00:00+00:00"
+        assert params["fetch"] == 3
+        assert params["after_time"] is None
+    
+    @pytest.mark.asyncio
+    async def test_next_page_uses_keyset(self):
+        """Test the cursor position becomes the keyset predicate parameters."""
+        client, session = make_client([
+            {"uuid": "r1", "fact": "A", "valid_at": "2024-01-01T00:00:00Z", "invalid_at": None}
+        ])
+        cursor = encode_cursor({"valid_at": "2024-02-01T00:00:00Z", "uuid": "r2"})
+        
+        page = await client.get_entity_timeline("OpenAI", limit=2, cursor=cursor)
+        
+        assert [f["fact"] for f in page["timeline"]] == ["A"]
+        assert page["next_cursor"] is None
+        params = session.run.call_args[1]["parameters"]
+        assert params["after_time"] == "2024-02-01T00:00:00Z"
+        assert params["after_uuid"] == "r2"
+    
+    def test_invalid_cursor(self):
+        """Test malformed cursors are rejected."""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
@@ -0,0 +1,196 @@
+"""
+Tests for the write-behind message writer.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import pytest
+import asyncpg
+from unittest.mock import AsyncMock, patch
+
+from agent.message_writer import MessageWriter
+from agent.api import save_conversation_turn, get_conversation_context
+
+
+class TestMessageWriter:
+    """Test batching, flushing and shutdown."""
+    
+    @pytest.mark.asyncio
+    async def test_writes_directly_when_not_started(self):
+        """Test messages are inserted at once without the flusher."""
+        writer = MessageWriter()
+        
+        with patch('agent.message_writer.add_messages', new=AsyncMock(return_value=1)) as mock_add:
+            message_id = await writer.add("session-1", "user", "Hello")
+        
+        mock_add.assert_awaited_once()
+        assert mock_add.call_args.args[0][0]["id"] == message_id
+    
+    @pytest.mark.asyncio
+    async def test_batches_queued_messages(self):
+        """Test queued messages land in one multi-row insert after the interval."""
+        writer = MessageWriter(batch_size=100, flush_interval_ms=10)
+        
+        with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=len)) as mock_add:
+            writer.start()
+            for i in range(5):
+                await writer.add("session-1", "user", f"message {i}")
+            mock_add.assert_not_awaited()
+            await asyncio.sleep(0.05)
+            await writer.stop()
+        
+        mock_add.assert_awaited_once()
+        batch = mock_add.call_args.args[0]
+        assert [m["content"] for m in batch] == [f"message {i}" for i in range(5)]
+        assert [m["created_at"] for m in batch] == sorted(m["created_at"] for m in batch)
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_early(self):
+        """Test reaching the batch size triggers a flush before the interval."""
+        writer = MessageWriter(batch_size=2, flush_interval_ms=60000)
+        
+        with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=len)) as mock_add:
+            writer.start()
+            await writer.add("session-1", "user", "Hello")
+            await writer.add("session-1", "assistant", "Hi")
+            await asyncio.sleep(0.01)
+            mock_add.assert_awaited_once()
+            await writer.stop()
+    
+    @pytest.mark.asyncio
+    async def test_stop_flushes_remaining(self):
+        """Test shutdown writes everything still queued."""
+        writer = MessageWriter(batch_size=2, flush_interval_ms=60000)
+        
+        with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=len)) as mock_add:
+            writer.start()
+            await writer.add("session-1", "user", "Hello")
+            await writer.stop()
+        
+        mock_add.assert_awaited_once()
+        assert writer.pending("session-1") == []
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried(self):
+        """Test a failed insert keeps the messages queued for the next flush."""
+        writer = MessageWriter()
+        writer._task = asyncio.create_task(asyncio.sleep(60))
+        try:
+            await writer.add("session-1", "user", "Hello")
+            with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=ConnectionError("down"))):
+                assert await writer.flush() == 0
+            assert len(writer.pending("session-1")) == 1
+            
+            with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=len)):
+                assert await writer.flush() == 1
+        finally:
+            writer._task.cancel()
+
+    
+    @pytest.mark.asyncio
+    async def test_connection_errors_back_off_and_keep_messages(self):
+        """Test repeated failures double the delay and never drop queued messages."""
+        writer = MessageWriter(retry_base_ms=100, retry_max_ms=300)
+        writer._task = asyncio.create_task(asyncio.sleep(60))
+        try:
+            await writer.add("session-1", "user", "Hello")
+            with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=ConnectionError("down"))):
+                delays = []
+                for _ in range(5):
+                    assert await writer.flush() == 0
+                    delays.append(writer.retry_delay)
+            
+            assert delays == [0.1, 0.2, 0.3, 0.3, 0.3]
+            assert len(writer.pending("session-1")) == 1
+            
+            with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=len)):
+                assert await writer.flush() == 1
+            assert writer.retry_delay == 0
+        finally:
+            writer._task.cancel()
+    
+    @pytest.mark.asyncio
+    async def test_queue_bounded_while_failing(self):
+        """Test the oldest messages are dropped past max_pending."""
+        writer = MessageWriter(max_pending=2)
+        writer._task = asyncio.create_task(asyncio.sleep(60))
+        try:
+            for content in ("one", "two", "three"):
+                await writer.add("session-1", "user", content)
+        finally:
+            writer._task.cancel()
+        
+        assert [m["content"] for m in writer.pending("session-1")] == ["two", "three"]
+    
+    @pytest.mark.asyncio
+    async def test_data_error_drops_only_bad_row(self):
+        """Test a rejected batch is retried row by row."""
+        writer = MessageWriter()
+        writer._task = asyncio.create_task(asyncio.sleep(60))
+        
+        async def insert(messages):
+            if len(messages) > 1 or messages[0]["session_id"] == "swept":
+                raise asyncpg.ForeignKeyViolationError("session does not exist")
+            return 1
+        
+        try:
+            await writer.add("session-1", "user", "Hello")
+            await writer.add("swept", "user", "Gone")
+            await writer.add("session-1", "assistant", "Hi")
+            with patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=insert)) as mock_add:
+                assert await writer.flush() == 2
+        finally:
+            writer._task.cancel()
+        
+        assert mock_add.await_count == 4
+        assert writer.depth == 0
+        assert writer.retry_delay == 0
+
+
+class TestWriteBehindApi:
+    """Test the API helpers on top of the writer."""
+    
+    @pytest.mark.asyncio
+    async def test_save_turn_does_not_wait_for_database(self):
+        """Test a conversation turn is only queued while the writer runs."""
+        writer = MessageWriter(flush_interval_ms=60000)
+        
+        with patch('agent.api.message_writer', writer), \
+             patch('agent.message_writer.add_messages', new=AsyncMock(side_effect=len)) as mock_add:
+            writer.start()
+            await save_conversation_turn("session-1", "Hello", "Hi there!")
+            mock_add.assert_not_awaited()
+            
+            with patch('agent.api.get_recent_messages', new=AsyncMock(return_value=[])):
+                context = await get_conversation_context("session-1")
+            
+            await writer.stop()
+        
+        assert [m["role"] for m in context] == ["user", "assistant"]
+        mock_add.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_context_orders_by_time_across_offsets(self):
+        """Test stored and pending messages merge by instant, not by string."""
+        writer = MessageWriter()
+        writer._queue.append({
+            "id": "pending-1",
+            "session_id": "session-1",
+            "role": "user",
+            "content": "newest",
+            "metadata": {},
+            "created_at": datetime(2024, 1, 1, 0, 30, tzinfo=timezone.utc)
+        })
+        writer._task = asyncio.create_task(asyncio.sleep(60))
+        stored = [
+            {"id": "m1", "role": "user", "content": "oldest", "created_at": "2024-01-01T01:00:00+02:00"},
+            {"id": "m2", "role": "assistant", "content": "middle", "created_at": "2024-01-01T00:10:00+00:00"}
+        ]
+        
+        try:
+            with patch('agent.api.message_writer', writer):
+                context = await get_conversation_context("session-1", max_messages=2, messages=stored)
+        finally:
+            writer._task.cancel()
+        
+        assert [m["content"] for m in context] == ["middle", "newest"]
@@ -0,0 +1,154 @@
+"""
+Tests for saturation gauges and the JSON metrics view.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from agent.telemetry import Counter, Gauge, CallbackMetric, MetricsRegistry, CACHE_LOOKUPS
+from agent.db_utils import DatabasePool
+from agent.session_cache import SessionCache
+from agent.api import metrics, metrics_json
+
+
+class TestMetricTypes:
+    """Test counters, gauges and callback metrics."""
+    
+    def test_counter_and_gauge_render(self):
+        """Test labelled and unlabelled series in the exposition format."""
+        counter = Counter("test_total", "Test", ("outcome",))
+        counter.inc("ok")
+        counter.inc("ok", amount=2)
+        gauge = Gauge("test_open", "Test")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        
+        assert counter.render()[1:] == ["# TYPE test_total counter", 'test_total{outcome="ok"} 3']
+        assert gauge.render()[1:] == ["# TYPE test_open gauge", "test_open 1"]
+    
+    def test_callback_errors_do_not_break_scrape(self):
+        """Test a failing collector is skipped and others still render."""
+        def broken():
+            raise RuntimeError("boom")
+        
+        metrics_registry = MetricsRegistry()
+        metrics_registry.register(CallbackMetric("test_broken", "Test", (), broken))
+        metrics_registry.register(CallbackMetric("test_ok", "Test", (), lambda: {(): 7}))
+        
+        text = metrics_registry.render()
+        
+        assert "test_ok 7" in text
+        assert metrics_registry.snapshot() == {"test_broken": 0, "test_ok": 7}
+    
+    def test_snapshot_uses_label_keys(self):
+        """Test labelled series are keyed by their label values."""
+        metrics_registry = MetricsRegistry()
+        counter = metrics_registry.register(Counter("test_total", "Test", ("cache", "result")))
+        counter.inc("session", "hit")
+        
+        assert metrics_registry.snapshot() == {"test_total": {"cache=session,result=hit": 1}}
+
+
+class TestPoolStats:
+    """Test Postgres pool saturation."""
+    
+    @pytest.mark.asyncio
+    async def test_waiters_counted_until_acquired(self):
+        """Test callers blocked on acquire show up as waiting."""
+        release = asyncio.Event()
+        
+        class SlowAcquire:
+            async def __aenter__(self):
+                await release.wait()
+                return MagicMock()
+            
+            async def __aexit__(self, *exc):
+                return False
+        
+        pool = DatabasePool("postgresql://test")
+        pool.pool = MagicMock()
+        pool.pool.acquire = SlowAcquire
+        pool.pool.get_size.return_value = 4
+        pool.pool.get_idle_size.return_value = 1
+        
+        async def use():
+            async with pool.acquire():
+                pass
+        
+        task = asyncio.create_task(use())
+        await asyncio.sleep(0)
+        
+        assert pool.stats() == {"size": 4, "idle": 1, "in_use": 3, "max_size": pool.max_size, "waiting": 1}
+        
+        release.set()
+        await task
+        
+        assert pool.waiting == 0
+    
+    def test_stats_before_initialize(self):
+        """Test stats are zero before the pool exists."""
+        pool = DatabasePool("postgresql://test")
+        
+        assert pool.stats()["size"] == 0
+
+
+class TestCacheCounters:
+    """Test cache hit/miss counting."""
+    
+    def test_session_cache_lookups(self):
+        """Test session cache hits and misses are counted."""
+        cache = SessionCache()
+        hits = CACHE_LOOKUPS.value("session", "hit")
+        misses = CACHE_LOOKUPS.value("session", "miss")
+        
+        cache.get("unknown")
+        cache.mark_valid("known")
+        cache.get("known")
+        
+        assert CACHE_LOOKUPS.value("session", "hit") == hits + 1
+        assert CACHE_LOOKUPS.value("session", "miss") == misses + 1
+        assert len(cache) == 1
+
+
+class TestEmbeddingCounters:
+    """Test embedding provider saturation."""
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_counted(self):
+        """Test 429s are counted separately and in-flight returns to zero."""
+        import openai
+        from agent import tools
+        from agent.telemetry import EMBEDDING_IN_FLIGHT, EMBEDDING_REQUESTS
+        
+        rate_limited = EMBEDDING_REQUESTS.value("rate_limited")
+        error = openai.RateLimitError("slow down", response=MagicMock(status_code=429), body=None)
+        
+        with patch.object(tools.embedding_client.embeddings, "create", AsyncMock(side_effect=error)):
+            with pytest.raises(openai.RateLimitError):
+                await tools.generate_embedding("hello")
+        
+        assert EMBEDDING_REQUESTS.value("rate_limited") == rate_limited + 1
+        assert EMBEDDING_IN_FLIGHT.value() == 0
+
+
+class TestMetricsEndpoints:
+    """Test the Prometheus and JSON endpoints."""
+    
+    @pytest.mark.asyncio
+    async def test_saturation_gauges_exposed(self):
+        """Test pool, cache, stream and agent series appear in both views."""
+        with patch("agent.api.smart_master_agent") as smart_agent:
+            smart_agent.agent_stats = {"email": {"calls": 2, "success": 1, "errors": 1}}
+            
+            text = (await metrics()).body.decode()
+            snapshot = await metrics_json()
+        
+        assert "rag_db_pool_waiting 0" in text
+        assert "# TYPE rag_neo4j_active_reads gauge" in text
+        assert "rag_sse_streams_open" in text
+        assert 'rag_agent_tasks_total{component="smart_agent",agent="email",counter="errors"} 1' in text
+        assert snapshot["rag_agent_tasks_total"]["component=smart_agent,agent=email,counter=calls"] == 2
+        assert "rag_message_writer_pending" in snapshot
@@ -70,6 +70,19 @@ class TestRequestModels:
         assert request.limit == 20
         assert request.filters == {}
     
+    def test_search_request_filters(self):
+        """Test search filters are validated and unset ones dropped."""
+        request = SearchRequest(
+            query="OpenAI funding",
+            filters={"sources": ["news.md"], "created_after": "2024-01-01T00:00:00Z", "metadata": {}}
+        )
+        
+        assert set(request.filters) == {"sources", "created_after"}
+        assert request.filters["created_after"].year == 2024
+        
+        with pytest.raises(ValueError):
+            SearchRequest(query="test", filters={"author": "someone"})
+    
     def test_search_request_limit_validation(self):
         """Test search request limit validation."""
         # Test minimum limit
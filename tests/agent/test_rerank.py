@@ -0,0 +1,111 @@
+"""
+Tests for the chunk reranking stage.
+"""
+
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent.models import ChunkResult
+from agent.rerank import LexicalReranker, Reranker, rerank, candidate_count
+from agent.tools import vector_search_tool, VectorSearchInput
+
+
+def make_chunk(chunk_id: str, content: str, score: float = 0.5) -> ChunkResult:
+    """Build a chunk result for reranking."""
+    return ChunkResult(
+        chunk_id=chunk_id,
+        document_id="doc",
+        content=content,
+        score=score,
+        document_title="Doc",
+        document_source="doc.md"
+    )
+
+
+class TestLexicalReranker:
+    """Test BM25 scoring blended with retrieval scores."""
+    
+    def test_term_matches_outrank_equal_retrieval_scores(self):
+        """Test chunks containing the query terms score higher."""
+        candidates = [
+            make_chunk("a", "Quarterly earnings were flat."),
+            make_chunk("b", "Microsoft invested in OpenAI in 2023."),
+            make_chunk("c", "OpenAI released a new model.")
+        ]
+        
+        scores = LexicalReranker().score("microsoft openai investment", candidates)
+        
+        assert scores.shape == (3,)
+        assert np.argmax(scores) == 1
+        assert scores[0] == pytest.approx(0.5 * 0.7)
+    
+    def test_empty_query_keeps_retrieval_scores(self):
+        """Test a query without word tokens leaves scores unchanged."""
+        candidates = [make_chunk("a", "text", 0.9), make_chunk("b", "text", 0.1)]
+        
+        scores = LexicalReranker().score("?!", candidates)
+        
+        assert scores.tolist() == pytest.approx([0.9, 0.1])
+
+
+class TestRerank:
+    """Test the rerank stage."""
+    
+    @pytest.mark.asyncio
+    async def test_keeps_top_k_in_score_order(self):
+        """Test only the best top_k candidates are returned."""
+        candidates = [make_chunk(str(i), "openai", i / 10) for i in range(6)]
+        
+        reranked, timings = await rerank("openai", candidates, 2, LexicalReranker())
+        
+        assert [c.chunk_id for c in reranked] == ["5", "4"]
+        assert "rerank_ms" in timings
+    
+    def test_scores_in_batches(self):
+        """Test the default scorer splits candidates into batches."""
+        class CountingReranker(Reranker):
+            name = "counting"
+            batches = []
+            
+            def score_batch(self, query, candidates):
+                self.batches.append(len(candidates))
+                return np.array([c.score for c in candidates], dtype=np.float32)
+        
+        candidates = [make_chunk(str(i), "x", i / 10) for i in range(5)]
+        reranker = CountingReranker()
+        
+        scores = reranker.score("q", candidates, batch_size=2)
+        
+        assert reranker.batches == [2, 2, 1]
+        assert len(scores) == 5
+    
+    @pytest.mark.asyncio
+    async def test_vector_search_overfetches_and_reranks(self):
+        """Test the vector search tool fetches extra candidates and trims to the limit."""
+        rows = [
+            {
+                "chunk_id": str(i),
+                "document_id": "doc",
+                "content": "openai" if i == 4 else "other",
+                "similarity": 0.5,
+                "metadata": {},
+                "document_title": "Doc",
+                "document_source": "doc.md"
+            }
+            for i in range(6)
+        ]
+        timings = {}
+        
+        with patch('agent.tools.vector_search', new=AsyncMock(return_value=rows)) as mock_search:
+            results = await vector_search_tool(
+                VectorSearchInput(query="openai", limit=2),
+                query_embedding=[0.1],
+                timings=timings
+            )
+        
+        assert mock_search.call_args.kwargs["limit"] == candidate_count(2)
+        assert candidate_count(2) > 2
+        assert len(results) == 2
+        assert results[0].chunk_id == "4"
+        assert {"retrieve_ms", "rerank_ms"} <= timings.keys()
@@ -0,0 +1,160 @@
+"""
+Tests for the semantic answer cache.
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent.models import ChatRequest, ToolCall
+from agent.semantic_cache import SemanticCache, bump_corpus_version, is_cacheable
+from agent.api import chat
+
+
+# Patch agent.semantic_cache's pool in tests that take mock_db_conn
+cache_pool = pytest.mark.parametrize("mock_db_conn", ["agent.semantic_cache.db_pool"], indirect=True)
+
+
+class TestSemanticCache:
+    """Test cache lookups and stores."""
+    
+    @cache_pool
+    @pytest.mark.asyncio
+    async def test_disabled_cache_skips_database(self, mock_db_conn):
+        """Test a disabled cache never touches the database."""
+        cache = SemanticCache(enabled=False)
+        assert await cache.lookup([0.1]) is None
+        await cache.store("q", [0.1], "answer", [])
+        
+        mock_db_conn.fetchrow.assert_not_called()
+        mock_db_conn.execute.assert_not_called()
+    
+    @cache_pool
+    @pytest.mark.asyncio
+    async def test_lookup_hit(self, mock_db_conn):
+        """Test a hit returns the cached answer and rebuilt tool calls."""
+        mock_db_conn.fetchrow.return_value = {
+            "entry_id": "entry-1",
+            "response": "OpenAI raised new funding.",
+            "tools_used": json.dumps([{"tool_name": "vector_search", "args": {"query": "openai"}, "tool_call_id": None}]),
+            "similarity": 0.97
+        }
+        hit = await SemanticCache(enabled=True, threshold=0.9, ttl_seconds=60).lookup([0.1, 0.2], user_id="user-1")
+        
+        assert hit["response"] == "OpenAI raised new funding."
+        assert hit["tools_used"][0].tool_name == "vector_search"
+        query, *args = mock_db_conn.fetchrow.call_args[0]
+        assert "corpus_state" in query
+        assert "user_id IS NOT DISTINCT FROM $4" in query
+        assert args == ["[0.1,0.2]", 0.9, 60.0, "user-1"]
+    
+    @cache_pool
+    @pytest.mark.asyncio
+    async def test_lookup_miss(self, mock_db_conn):
+        """Test no row below the threshold means a miss."""
+        mock_db_conn.fetchrow.return_value = None
+        assert await SemanticCache(enabled=True).lookup([0.1]) is None
+    
+    @cache_pool
+    @pytest.mark.asyncio
+    async def test_store_scoped_to_user(self, mock_db_conn):
+        """Test a corpus-only answer is stored with the asking user."""
+        stored = await SemanticCache(enabled=True).store(
+            "q", [0.1], "answer", [ToolCall(tool_name="hybrid_search")], user_id="user-1"
+        )
+        
+        assert stored is True
+        query, *args = mock_db_conn.execute.call_args[0]
+        assert "user_id" in query
+        assert args[-1] == "user-1"
+    
+    @cache_pool
+    @pytest.mark.asyncio
+    async def test_store_skips_side_effect_tools(self, mock_db_conn):
+        """Test answers that used email or file tools are never cached."""
+        stored = await SemanticCache(enabled=True).store(
+            "q", [0.1], "answer",
+            [ToolCall(tool_name="vector_search"), ToolCall(tool_name="compose_email")]
+        )
+        
+        assert stored is False
+        mock_db_conn.execute.assert_not_called()
+    
+    def test_is_cacheable(self):
+        """Test only read-only corpus tools make an answer cacheable."""
+        assert is_cacheable([])
+        assert is_cacheable([ToolCall(tool_name="get_document"), ToolCall(tool_name="get_entity_timeline")])
+        for tool_name in ("save_message", "save_to_desktop", "open_gmail_browser", "list_emails",
+                          "read_email", "search_emails", "web_search"):
+            assert not is_cacheable([ToolCall(tool_name=tool_name)])
+    
+    @cache_pool
+    @pytest.mark.asyncio
+    async def test_bump_corpus_version_clears_old_entries(self, mock_db_conn):
+        """Test bumping the corpus version deletes entries for older versions."""
+        mock_db_conn.transaction = lambda: AsyncMock()
+        mock_db_conn.fetchval.return_value = 4
+        assert await bump_corpus_version() == 4
+        
+        mock_db_conn.execute.assert_awaited_once_with(
+            "DELETE FROM semantic_cache WHERE corpus_version < $1", 4
+        )
+
+
+class TestChatSemanticCache:
+    """Test the cache in the chat endpoint."""
+    
+    @pytest.mark.asyncio
+    async def test_hit_short_circuits_agent(self):
+        """Test a cache hit answers without running the agent."""
+        cache = SemanticCache(enabled=True)
+        cache.lookup = AsyncMock(return_value={
+            "entry_id": "entry-1",
+            "response": "Cached answer",
+            "tools_used": [ToolCall(tool_name="vector_search")],
+            "similarity": 0.98
+        })
+        
+        with patch('agent.api.semantic_cache', cache), \
+             patch('agent.api.open_session', new=AsyncMock(return_value={"session_id": "session-1"})), \
+             patch('agent.api.generate_embedding', new=AsyncMock(return_value=[0.1])), \
+             patch('agent.api.save_conversation_turn', new=AsyncMock()) as mock_save, \
+             patch('agent.api.execute_agent', new=AsyncMock()) as mock_execute:
+            response = await chat(ChatRequest(message="Latest on OpenAI funding?", user_id="user-1"))
+        
+        assert cache.lookup.call_args.kwargs["user_id"] == "user-1"
+        mock_execute.assert_not_awaited()
+        mock_save.assert_awaited_once()
+        assert response.message == "Cached answer"
+        assert response.metadata["semantic_cache"]["hit"] is True
+        assert response.metadata["semantic_cache"]["similarity"] == 0.98
+    
+    @pytest.mark.asyncio
+    async def test_miss_runs_agent_with_embedding(self):
+        """Test a miss runs the agent and hands it the embedding to cache."""
+        cache = SemanticCache(enabled=True)
+        cache.lookup = AsyncMock(return_value=None)
+        
+        with patch('agent.api.semantic_cache', cache), \
+             patch('agent.api.open_session', new=AsyncMock(return_value={"session_id": "session-1"})), \
+             patch('agent.api.generate_embedding', new=AsyncMock(return_value=[0.1])), \
+             patch('agent.api.execute_agent', new=AsyncMock(return_value=("Fresh answer", []))) as mock_execute:
+            response = await chat(ChatRequest(message="Latest on OpenAI funding?"))
+        
+        assert mock_execute.call_args.kwargs["cache_embedding"] == [0.1]
+        assert response.metadata["semantic_cache"] == {"hit": False}
+    
+    @pytest.mark.asyncio
+    async def test_existing_session_bypasses_cache(self):
+        """Test follow-up turns are never answered from the cache."""
+        cache = SemanticCache(enabled=True)
+        cache.lookup = AsyncMock()
+        
+        with patch('agent.api.semantic_cache', cache), \
+             patch('agent.api.open_session', new=AsyncMock(return_value={"session_id": "session-1"})), \
+             patch('agent.api.execute_agent', new=AsyncMock(return_value=("Answer", []))) as mock_execute:
+            response = await chat(ChatRequest(message="And Microsoft?", session_id="session-1"))
+        
+        cache.lookup.assert_not_awaited()
+        assert mock_execute.call_args.kwargs["cache_embedding"] is None
+        assert "semantic_cache" not in response.metadata
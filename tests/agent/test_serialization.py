@@ -0,0 +1,105 @@
+"""
+Tests for fast JSON encoding and response slimming.
+"""
+
+import sys
+import json
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import patch
+
+from agent import serialization
+from agent.serialization import FastJSONResponse, dumps, slim_chunks
+from agent.models import ChunkResult, SearchResponse
+from agent.streaming import sse_event
+
+
+def make_chunk(content: str = "x" * 1000) -> ChunkResult:
+    """Create a search result with metadata."""
+    return ChunkResult(
+        chunk_id="chunk-1",
+        document_id="doc-1",
+        content=content,
+        score=0.9,
+        metadata={"page": 3},
+        document_title="Doc",
+        document_source="doc.md"
+    )
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """Run a test with orjson and with the json fallback."""
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "_orjson", False)
+    else:
+        pytest.importorskip("orjson")
+        monkeypatch.setattr(serialization, "_orjson", None)
+    return request.param
+
+
+class TestDumps:
+    """Test encoding with either backend."""
+    
+    def test_models_and_datetimes(self, encoder):
+        """Test nested models and datetimes encode the same way."""
+        created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        
+        data = json.loads(dumps({"chunk": make_chunk("hi"), "at": created_at}))
+        
+        assert data["chunk"]["content"] == "hi"
+        assert datetime.fromisoformat(data["at"]) == created_at
+    
+    def test_response_renders_model(self, encoder):
+        """Test a model returned directly is encoded as the response body."""
+        response = FastJSONResponse(SearchResponse(
+            results=[make_chunk("hi")],
+            total_results=1,
+            search_type="vector",
+            query_time_ms=1.5
+        ))
+        
+        body = json.loads(response.body)
+        
+        assert body["search_type"] == "vector"
+        assert body["results"][0]["metadata"] == {"page": 3}
+    
+    def test_sse_frame_format(self, encoder):
+        """Test SSE frames keep their data: ...\\n\\n shape."""
+        frame = sse_event({"type": "text", "content": "héllo"})
+        
+        assert frame.startswith("data: ") and frame.endswith("\n\n")
+        assert json.loads(frame[6:]) == {"type": "text", "content": "héllo"}
+    
+    def test_required_orjson_missing(self, monkeypatch):
+        """Test JSON_ENCODER=orjson fails loudly without orjson."""
+        monkeypatch.setattr(serialization, "_orjson", None)
+        monkeypatch.setattr(serialization, "JSON_ENCODER", "orjson")
+        
+        with patch.dict(sys.modules, {"orjson": None}):
+            with pytest.raises(ImportError, match="pip install orjson"):
+                serialization.get_orjson()
+
+
+class TestSlimChunks:
+    """Test response slimming."""
+    
+    def test_drops_metadata_and_truncates(self):
+        """Test defaults drop metadata and cut content to a snippet."""
+        chunk = make_chunk()
+        
+        slimmed = slim_chunks([chunk], snippet_chars=10)[0]
+        
+        assert slimmed.metadata == {}
+        assert slimmed.content == "x" * 10
+        assert chunk.metadata == {"page": 3}
+        assert len(chunk.content) == 1000
+    
+    def test_requested_fields_kept(self):
+        """Test metadata and full content are returned when asked for."""
+        chunk = make_chunk()
+        
+        slimmed = slim_chunks([chunk], include_metadata=True, full_content=True)[0]
+        
+        assert slimmed is chunk
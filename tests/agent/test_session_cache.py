@@ -0,0 +1,140 @@
+"""
+Tests for the session cache, get-or-create and the expired-session sweeper.
+"""
+
+import json
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, patch
+
+from agent.db_utils import get_or_create_session_with_context, delete_expired_sessions
+from agent.models import ChatRequest
+from agent.session_cache import SessionCache
+from agent.api import open_session, get_or_create_session
+
+
+def session_row(session_id="session-1", created=False):
+    """Build a session as returned by get_or_create_session_with_context."""
+    return {
+        "session_id": session_id,
+        "created": created,
+        "metadata": {},
+        "expires_at": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+        "messages": []
+    }
+
+
+class TestSessionCache:
+    """Test cache entries and expiry."""
+    
+    def test_valid_and_invalid_entries(self):
+        """Test positive and negative entries are reported distinctly."""
+        cache = SessionCache()
+        cache.mark_valid("a")
+        cache.mark_invalid("b")
+        
+        assert cache.get("a") is True
+        assert cache.get("b") is False
+        assert cache.get("c") is None
+    
+    def test_ttl_capped_by_session_expiry(self):
+        """Test an already expired session is never cached as valid."""
+        cache = SessionCache(ttl_seconds=60)
+        cache.mark_valid("a", (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat())
+        
+        assert cache.get("a") is None
+    
+    def test_entries_expire(self):
+        """Test entries are dropped after their TTL."""
+        cache = SessionCache(ttl_seconds=0.01)
+        cache.mark_valid("a")
+        
+        with patch('agent.session_cache.time.monotonic', return_value=1e12):
+            assert cache.get("a") is None
+    
+    def test_evicts_oldest_when_full(self):
+        """Test the cache stays within its size bound."""
+        cache = SessionCache(max_size=2)
+        for session_id in ["a", "b", "c"]:
+            cache.mark_valid(session_id)
+        
+        assert cache.get("a") is None
+        assert cache.get("c") is True
+
+
+class TestGetOrCreateSession:
+    """Test session resolution."""
+    
+    @pytest.mark.asyncio
+    async def test_single_query_returns_session_and_context(self, mock_db_conn):
+        """Test get-or-create and recent messages come from one round trip."""
+        mock_db_conn.fetchrow.return_value = {
+            "session_id": "session-1",
+            "created": False,
+            "metadata": '{"conversation_summary": "Earlier"}',
+            "expires_at": None,
+            "messages": json.dumps([
+                {"id": "m1", "role": "user", "content": "Hello", "metadata": {}, "created_at": "2024-01-01T00:00:00+00:00"},
+                {"id": "m2", "role": "assistant", "content": "Hi", "metadata": None, "created_at": "2024-01-01T02:00:01+02:00"}
+            ])
+        }
+        session = await get_or_create_session_with_context("session-1", context_limit=6)
+        
+        mock_db_conn.fetchrow.assert_awaited_once()
+        query, *args = mock_db_conn.fetchrow.call_args[0]
+        assert "INSERT INTO sessions" in query
+        assert args[0] == "session-1"
+        assert args[-1] == 6
+        assert session["metadata"] == {"conversation_summary": "Earlier"}
+        assert [m["id"] for m in session["messages"]] == ["m1", "m2"]
+        assert session["messages"][1]["metadata"] == {}
+        assert session["messages"][1]["created_at"] == "2024-01-01T00:00:01+00:00"
+    
+    @pytest.mark.asyncio
+    async def test_cached_session_skips_database(self):
+        """Test a session seen recently is not looked up again."""
+        cache = SessionCache()
+        cache.mark_valid("session-1")
+        
+        with patch('agent.api.session_cache', cache), \
+             patch('agent.api.get_or_create_session_with_context', new=AsyncMock()) as mock_get:
+            session_id = await get_or_create_session(ChatRequest(message="Hi", session_id="session-1"))
+        
+        assert session_id == "session-1"
+        mock_get.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_unknown_session_cached_negatively(self):
+        """Test an unknown id is remembered and not looked up again."""
+        cache = SessionCache()
+        
+        with patch('agent.api.session_cache', cache), \
+             patch('agent.api.get_or_create_session_with_context', new=AsyncMock(side_effect=[
+                 session_row("new-1", created=True), session_row("new-2", created=True)
+             ])) as mock_get:
+            first = await open_session(ChatRequest(message="Hi", session_id="gone"))
+            second = await open_session(ChatRequest(message="Hi", session_id="gone"))
+        
+        assert first["session_id"] == "new-1"
+        assert second["session_id"] == "new-2"
+        assert mock_get.call_args_list[0].args[0] == "gone"
+        assert mock_get.call_args_list[1].args[0] is None
+        assert cache.get("gone") is False
+        assert cache.get("new-1") is True
+
+
+class TestExpiredSessionSweep:
+    """Test batched deletion of expired sessions."""
+    
+    @pytest.mark.asyncio
+    async def test_deletes_until_batch_not_full(self, mock_db_conn):
+        """Test batches repeat while full and stop on a partial batch."""
+        mock_db_conn.execute.side_effect = ["DELETE 2", "DELETE 2", "DELETE 1"]
+        deleted = await delete_expired_sessions(batch_size=2)
+        
+        assert deleted == 5
+        assert mock_db_conn.execute.await_count == 3
+        query, batch_size = mock_db_conn.execute.call_args[0]
+        assert "ORDER BY expires_at" in query
+        assert "SKIP LOCKED" in query
+        assert batch_size == 2
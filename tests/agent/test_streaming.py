@@ -0,0 +1,136 @@
+"""
+Tests for SSE streaming of agent runs.
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from agent.streaming import (
+    AgentEventStream,
+    HEARTBEAT_FRAME,
+    sse_event,
+    split_words,
+    with_heartbeats
+)
+
+
+ANSWER = "OpenAI is an AI research company backed by a multiyear Microsoft investment."
+
+
+def make_agent():
+    """Build an agent with one tool backed by the pydantic_ai test model."""
+    agent = Agent(TestModel(custom_output_text=ANSWER))
+    
+    @agent.tool_plain
+    def lookup(company: str) -> str:
+        """Look up a company."""
+        return f"{company} is a technology company."
+    
+    return agent
+
+
+class TestSplitWords:
+    """Test word-boundary chunking for pseudo-streaming."""
+    
+    def test_chunks_rejoin_to_original(self):
+        """Test no characters are lost or added."""
+        text = "  OpenAI and Microsoft\\nextended their   partnership. "
+        
+        chunks = split_words(text, words_per_chunk=2)
+        
+        assert "".join(chunks) == text
+        assert len(chunks) == 3
+    
+    def test_empty_text(self):
+        """Test empty text gives no chunks."""
+        assert split_words("") == []
+
+
+class TestAgentEventStream:
+    """Test events produced from an agent run."""
+    
+    @pytest.mark.asyncio
+    async def test_tool_events_in_order(self):
+        """Test tool start/finish events precede the answer text."""
+        stream = AgentEventStream(make_agent(), "Tell me about OpenAI", deps=None)
+        
+        events = [event async for event in stream]
+        types = [event["type"] for event in events]
+        
+        assert types.index("tool_start") < types.index("tool_end") < types.index("text")
+        tool_start = events[types.index("tool_start")]
+        assert tool_start["tool_name"] == "lookup"
+        assert events[types.index("tool_end")]["success"] is True
+        assert stream.text == "".join(e["content"] for e in events if e["type"] == "text")
+        assert stream.result is not None
+    
+    @pytest.mark.asyncio
+    async def test_pseudo_stream_replays_answer(self):
+        """Test non-streaming providers still produce several text events."""
+        stream = AgentEventStream(make_agent(), "Tell me about OpenAI", deps=None, stream_text=False)
+        
+        events = [event async for event in stream]
+        
+        text_events = [e for e in events if e["type"] == "text"]
+        assert len(text_events) > 1
+        assert stream.text == ANSWER
+
+
+class TestHeartbeats:
+    """Test the SSE relay."""
+    
+    @pytest.mark.asyncio
+    async def test_heartbeat_while_idle(self):
+        """Test a comment frame is sent while the producer is quiet."""
+        async def frames():
+            await asyncio.sleep(0.05)
+            yield sse_event({"type": "end"})
+        
+        out = [frame async for frame in with_heartbeats(frames(), heartbeat_seconds=0.01)]
+        
+        assert out[0] == HEARTBEAT_FRAME
+        assert json.loads(out[-1][6:]) == {"type": "end"}
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_producer(self):
+        """Test a disconnected client cancels the running producer."""
+        cancelled = asyncio.Event()
+        
+        async def frames():
+            try:
+                await asyncio.sleep(10)
+                yield "never"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        request = AsyncMock()
+        request.is_disconnected.return_value = True
+        
+        out = [frame async for frame in with_heartbeats(frames(), request, heartbeat_seconds=0.01)]
+        
+        assert out == []
+        assert cancelled.is_set()
+    
+    @pytest.mark.asyncio
+    async def test_bounded_queue_applies_backpressure(self):
+        """Test the producer stays at most queue_size frames ahead."""
+        produced = []
+        
+        async def frames():
+            for i in range(100):
+                produced.append(i)
+                yield str(i)
+        
+        relay = with_heartbeats(frames(), queue_size=4)
+        first = await relay.__anext__()
+        await asyncio.sleep(0.01)
+        
+        assert first == "0"
+        assert len(produced) <= 6
+        await relay.aclose()
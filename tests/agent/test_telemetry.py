@@ -0,0 +1,100 @@
+"""
+Tests for latency spans and Prometheus histograms.
+"""
+
+import pytest
+import httpx
+from fastapi import FastAPI
+
+from agent import telemetry
+from agent.telemetry import Histogram, TelemetryMiddleware, span, traced
+from agent.api import metrics
+
+
+class TestHistogram:
+    """Test histogram bookkeeping and exposition."""
+    
+    def test_cumulative_buckets(self):
+        """Test observations land in cumulative le buckets."""
+        histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+        for value in [0.05, 0.1, 0.5, 3.0]:
+            histogram.observe(value, "db")
+        
+        series = histogram.collect()[("db",)]
+        
+        assert series["buckets"] == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+        assert series["count"] == 4
+        assert series["sum"] == pytest.approx(3.65)
+    
+    def test_render_prometheus_text(self):
+        """Test the exposition format of a labelled series."""
+        histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(1.0,))
+        histogram.observe(0.5, 'say "hi"')
+        
+        lines = histogram.render()
+        
+        assert lines[:2] == ["# HELP test_seconds Test", "# TYPE test_seconds histogram"]
+        assert 'test_seconds_bucket{stage="say \\"hi\\"",le="1"} 1' in lines
+        assert 'test_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 1' in lines
+        assert 'test_seconds_count{stage="say \\"hi\\""} 1' in lines
+
+
+class TestSpans:
+    """Test stage spans."""
+    
+    def test_disabled_span_is_shared_noop(self, monkeypatch):
+        """Test nothing is allocated or recorded while telemetry is off."""
+        monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", False)
+        
+        assert span("db.a") is span("db.b")
+        with span("db.a"):
+            pass
+        assert ("db.a", "ok") not in telemetry.STAGE_SECONDS.collect()
+    
+    @pytest.mark.asyncio
+    async def test_traced_records_status(self, monkeypatch):
+        """Test decorated calls are timed with ok/error status."""
+        monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", True)
+        
+        @traced("test.stage")
+        async def stage(fail):
+            if fail:
+                raise ValueError("boom")
+            return "done"
+        
+        assert await stage(False) == "done"
+        with pytest.raises(ValueError):
+            await stage(True)
+        
+        collected = telemetry.STAGE_SECONDS.collect()
+        assert collected[("test.stage", "ok")]["count"] >= 1
+        assert collected[("test.stage", "error")]["count"] >= 1
+
+
+class TestMiddleware:
+    """Test request timing."""
+    
+    @pytest.mark.asyncio
+    async def test_request_labelled_by_endpoint(self, monkeypatch):
+        """Test requests are recorded under the route's endpoint name."""
+        monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", True)
+        app = FastAPI()
+        app.add_middleware(TelemetryMiddleware)
+        
+        @app.get("/items/{item_id}")
+        async def read_item(item_id: str):
+            return {"item_id": item_id}
+        
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/items/42")
+        
+        assert response.status_code == 200
+        assert ("GET", "read_item", "200") in telemetry.REQUEST_SECONDS.collect()
+    
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        """Test /metrics serves the registry in the Prometheus text format."""
+        response = await metrics()
+        
+        assert response.media_type.startswith("text/plain")
+        assert b"# TYPE rag_stage_duration_seconds histogram" in response.body
@@ -0,0 +1,86 @@
+"""
+Tests for agent tool functions.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent.tools import perform_comprehensive_search
+
+
+class TestComprehensiveSearch:
+    """Test concurrent retrieval under a latency budget."""
+    
+    @pytest.mark.asyncio
+    async def test_embeds_once_and_shares_embedding(self):
+        """Test every branch receives the single query embedding."""
+        embedding = [0.1] * 4
+        with patch('agent.tools.generate_embedding', new=AsyncMock(return_value=embedding)) as mock_embed, \
+             patch('agent.tools._run_vector_search', new=AsyncMock(return_value=["v"])) as mock_vector, \
+             patch('agent.tools._run_hybrid_search', new=AsyncMock(return_value=["h"])) as mock_hybrid, \
+             patch('agent.tools._run_graph_search', new=AsyncMock(return_value=["g"])) as mock_graph:
+            results = await perform_comprehensive_search("openai", use_hybrid=True, budget_ms=1000)
+        
+        mock_embed.assert_awaited_once_with("openai")
+        for tool in (mock_vector, mock_hybrid, mock_graph):
+            assert tool.call_args.kwargs["query_embedding"] == embedding
+        assert results["vector_results"] == ["v"]
+        assert results["hybrid_results"] == ["h"]
+        assert results["graph_results"] == ["g"]
+        assert results["total_results"] == 3
+        assert results["sources"]["vector"]["status"] == "included"
+        assert results["sources"]["web"] == {"status": "disabled"}
+    
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_stragglers(self):
+        """Test a stalled branch is cancelled and the rest are returned."""
+        cancelled = asyncio.Event()
+        
+        async def stalled_graph(*args, **kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        with patch('agent.tools.generate_embedding', new=AsyncMock(return_value=[0.1])), \
+             patch('agent.tools._run_vector_search', new=AsyncMock(return_value=["v"])), \
+             patch('agent.tools._run_graph_search', new=stalled_graph):
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await perform_comprehensive_search("openai", budget_ms=50)
+            elapsed = loop.time() - start
+            await asyncio.wait_for(cancelled.wait(), timeout=1)
+        
+        assert elapsed < 1
+        assert results["vector_results"] == ["v"]
+        assert results["graph_results"] == []
+        assert results["sources"]["graph"]["status"] == "timeout"
+        assert results["total_results"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_embedding_failure_falls_back_to_text_graph_search(self):
+        """Test embedding errors fail vector search but not graph search."""
+        with patch('agent.tools.generate_embedding', new=AsyncMock(side_effect=RuntimeError("down"))), \
+             patch('agent.tools._run_vector_search', new=AsyncMock(return_value=["v"])) as mock_vector, \
+             patch('agent.tools._run_graph_search', new=AsyncMock(return_value=["g"])) as mock_graph:
+            results = await perform_comprehensive_search("openai", budget_ms=1000)
+        
+        mock_vector.assert_not_awaited()
+        assert mock_graph.call_args.kwargs["query_embedding"] is None
+        assert results["sources"]["vector"]["status"] == "error"
+        assert results["graph_results"] == ["g"]
+    
+    @pytest.mark.asyncio
+    async def test_failed_branch_reported_as_error(self):
+        """Test a search that raises is reported as an error, not an empty result."""
+        with patch('agent.tools.generate_embedding', new=AsyncMock(return_value=[0.1])), \
+             patch('agent.tools.vector_search', new=AsyncMock(side_effect=RuntimeError("db down"))), \
+             patch('agent.tools._run_graph_search', new=AsyncMock(return_value=["g"])):
+            results = await perform_comprehensive_search("openai", budget_ms=1000)
+        
+        assert results["sources"]["vector"]["status"] == "error"
+        assert results["sources"]["vector"]["error"] == "db down"
+        assert results["sources"]["graph"]["status"] == "included"
+        assert results["total_results"] == 1
@@ -0,0 +1,62 @@
+"""
+Tests for agent statistics shared across worker processes.
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent.worker_stats import publish_stats, aggregate_stats, StatsPublisher, WORKER_ID
+from agent.api import get_master_agent_stats
+
+
+# Patch agent.worker_stats's pool in tests that take mock_db_conn
+worker_stats_pool = pytest.mark.parametrize("mock_db_conn", ["agent.worker_stats.db_pool"], indirect=True)
+
+
+class TestWorkerStats:
+    """Test publishing and aggregation."""
+    
+    @worker_stats_pool
+    @pytest.mark.asyncio
+    async def test_publish_upserts_worker_row(self, mock_db_conn):
+        """Test a worker overwrites its own row."""
+        await publish_stats("master_agent", {"email": {"calls": 2}}, 2)
+        
+        query, *args = mock_db_conn.execute.call_args[0]
+        assert "ON CONFLICT (component, worker_id) DO UPDATE" in query
+        assert args == ["master_agent", WORKER_ID, '{"email": {"calls": 2}}', 2]
+    
+    @worker_stats_pool
+    @pytest.mark.asyncio
+    async def test_aggregate_sums_workers(self, mock_db_conn):
+        """Test counters of all live workers are summed per agent."""
+        mock_db_conn.fetch.return_value = [
+            {"stats": json.dumps({"email": {"calls": 2, "success": 2, "errors": 0}}), "task_count": 2},
+            {"stats": json.dumps({"email": {"calls": 1, "success": 0, "errors": 1}, "web": {"calls": 4}}), "task_count": 5}
+        ]
+        totals = await aggregate_stats("master_agent")
+        
+        assert totals["agent_stats"] == {
+            "email": {"calls": 3, "success": 2, "errors": 1},
+            "web": {"calls": 4}
+        }
+        assert totals["task_count"] == 7
+        assert totals["workers"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_stats_endpoint_aggregates_when_shared(self, monkeypatch):
+        """Test the stats endpoint reports totals across workers."""
+        monkeypatch.setattr("agent.api.SHARED_STATS_ENABLED", True)
+        publisher = StatsPublisher()
+        publisher.register("master_agent", lambda: ({}, 0))
+        totals = {"agent_stats": {"email": {"calls": 9}}, "task_count": 9, "workers": 3}
+        
+        with patch('agent.api.stats_publisher', publisher), \
+             patch('agent.worker_stats.publish_stats', new=AsyncMock()) as mock_publish, \
+             patch('agent.api.aggregate_stats', new=AsyncMock(return_value=totals)):
+            response = await get_master_agent_stats()
+        
+        mock_publish.assert_awaited_once_with("master_agent", {}, 0)
+        assert response["agent_stats"] == {"email": {"calls": 9}}
+        assert response["workers"] == 3
@@ -45,6 +45,22 @@ def mock_database_pool():
         yield mock_pool
 
 
+@pytest.fixture
+def mock_db_conn(request):
+    """
+    Mock connection handed out by a module's database pool.
+    
+    Patches agent.db_utils.db_pool unless parametrized indirectly with
+    another module's pool, e.g. "agent.semantic_cache.db_pool".
+    """
+    target = getattr(request, "param", "agent.db_utils.db_pool")
+    with patch(target) as mock_pool:
+        mock_conn = AsyncMock()
+        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+        mock_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        yield mock_conn
+
+
 @pytest.fixture
 def mock_embedding_client():
     """Mock embedding client for testing."""
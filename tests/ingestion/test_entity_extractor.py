@@ -0,0 +1,154 @@
+"""
+Tests for gazetteer-based entity extraction.
+"""
+
+import json
+import pytest
+
+from ingestion.entity_extractor import (
+    AhoCorasickAutomaton,
+    EntityExtractor,
+    GazetteerCategory,
+    load_gazetteer,
+    get_entity_extractor
+)
+
+
+class TestAhoCorasickAutomaton:
+    """Test the multi-pattern automaton."""
+
+    def test_overlapping_matches(self):
+        """Test that overlapping and nested patterns are all reported."""
+        automaton = AhoCorasickAutomaton()
+        for word in ["he", "she", "his", "hers"]:
+            automaton.add(word, word)
+        automaton.build()
+
+        matches = sorted((end - len(word), word) for end, word in automaton.iter("ushers"))
+
+        assert matches == [(1, "she"), (2, "he"), (2, "hers")]
+
+    def test_no_matches(self):
+        """Test scanning text with no patterns present."""
+        automaton = AhoCorasickAutomaton()
+        automaton.add("openai", "openai")
+
+        assert list(automaton.iter("nothing to see here")) == []
+
+
+class TestEntityExtractor:
+    """Test entity extraction semantics per category."""
+
+    @pytest.fixture
+    def extractor(self):
+        """Create an extractor with one category per matching mode."""
+        return EntityExtractor({
+            "companies": GazetteerCategory(
+                name="companies", terms=["OpenAI", "Meta"], word_boundary=True
+            ),
+            "technologies": GazetteerCategory(
+                name="technologies", terms=["AI", "GPT"]
+            ),
+            "people": GazetteerCategory(
+                name="people", terms=["Sam Altman"], case_sensitive=True
+            )
+        })
+
+    def test_word_boundary_case_insensitive(self, extractor):
+        """Test companies match case-insensitively on word boundaries only."""
+        result = extractor.extract("openai and META announced metadata tools")
+
+        assert result["companies"] == ["OpenAI", "Meta"]
+
+    def test_substring_case_insensitive(self, extractor):
+        """Test technologies match as case-insensitive substrings."""
+        result = extractor.extract("OpenAI released chatgpt")
+
+        assert result["technologies"] == ["AI", "GPT"]
+
+    def test_case_sensitive(self, extractor):
+        """Test people require an exact case match."""
+        assert extractor.extract("sam altman spoke")["people"] == []
+        assert extractor.extract("Sam Altman spoke")["people"] == ["Sam Altman"]
+
+    def test_category_filter(self, extractor):
+        """Test only requested categories are returned."""
+        result = extractor.extract("OpenAI and Sam Altman", ["people"])
+
+        assert result == {"people": ["Sam Altman"]}
+
+    def test_empty_text(self, extractor):
+        """Test extraction from empty text."""
+        assert extractor.extract("") == {"companies": [], "technologies": [], "people": []}
+
+    def test_matches_legacy_semantics(self):
+        """Test the bundled gazetteer reproduces the per-term scan results."""
+        import re
+
+        categories = load_gazetteer()
+        extractor = EntityExtractor(categories)
+        text = (
+            "Google's DeepMind works on deep learning in London. "
+            "Sam Altman's OpenAI builds GPT models; hardware from Nvidia powers AI."
+        )
+
+        result = extractor.extract(text)
+
+        expected_companies = {
+            c for c in categories["companies"].terms
+            if re.search(r'\b' + re.escape(c.lower()) + r'\b', text.lower())
+        }
+        expected_tech = {
+            t for t in categories["technologies"].terms
+            if re.search(r'\b' + re.escape(t.lower()) + r'\b', text.lower())
+        }
+        expected_people = {p for p in categories["people"].terms if p in text}
+        expected_locations = {l for l in categories["locations"].terms if l in text}
+
+        assert set(result["companies"]) == expected_companies
+        assert set(result["technologies"]) == expected_tech
+        assert set(result["people"]) == expected_people
+        assert set(result["locations"]) == expected_locations
+
+    def test_technology_acronyms_need_word_boundaries(self):
+        """Test short acronyms aren't found inside ordinary words."""
+        from ingestion.graph_builder import SimpleEntityExtractor
+
+        entities = SimpleEntityExtractor().extract_entities(
+            "He said the email was sent to Maria in the capital."
+        )
+
+        assert entities["technologies"] == []
+
+        entities = SimpleEntityExtractor().extract_entities("The AI team shipped an API for AR and 5G.")
+
+        assert set(entities["technologies"]) == {"AI", "API", "AR", "5G"}
+
+
+class TestGazetteerLoading:
+    """Test gazetteer file loading."""
+
+    def test_merge_extra_file(self, tmp_path):
+        """Test extra gazetteer files extend and override categories."""
+        extra = tmp_path / "extra.json"
+        extra.write_text(json.dumps({
+            "companies": {"terms": ["Mistral", "Google"]},
+            "products": {"case_sensitive": True, "terms": ["Gemini"]}
+        }))
+
+        categories = load_gazetteer(extra_paths=[str(extra)])
+
+        assert "Mistral" in categories["companies"].terms
+        assert categories["companies"].terms.count("Google") == 1
+        assert categories["companies"].word_boundary is True
+        assert categories["products"].case_sensitive is True
+
+    def test_env_extension(self, tmp_path, monkeypatch):
+        """Test ENTITY_GAZETTEER_PATH adds terms to the shared extractor."""
+        extra = tmp_path / "extra.json"
+        extra.write_text(json.dumps({"companies": {"terms": ["Cohere"]}}))
+        monkeypatch.setenv("ENTITY_GAZETTEER_PATH", str(extra))
+
+        extractor = get_entity_extractor()
+
+        assert extractor.extract("Cohere ships models")["companies"] == ["Cohere"]